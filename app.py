@@ -16,190 +16,45 @@ Usage:
 """
 import streamlit as st
 import anthropic
-import requests
-import re
+import os
 import random
+import time
+import uuid
+from concurrent.futures import wait
 from pathlib import Path
+from urllib.parse import urlsplit
 
-from prompt import build_system_prompt
 from i18n import LANGUAGES, STRINGS
-from marketing_plan import get_plan
-from generate_pdf import generate_marketing_plan_pdf
+from chat import MODEL, build_request
+from history import KEEP_TURNS, TOKEN_BUDGET, HistoryManager
+from jobs import REGISTRY_PATH, JobRegistry
+from markup import parse_plan, to_markdown
+from fit import FIT_DIR, FitStore
+from matching import match_roster, narrative_request
+from gateway import Gateway, GatewayBusy, request_tokens
+from generate_pdf import ARTIFACT_DIR, get_marketing_plan_pdf
+from response_cache import CACHE_DIR, ResponseCache, replay
+from roster import AGENTS
+from semantic_cache import SemanticCache, config_key
+from tracing import PROMETHEUS_PATH, TRACE_PATH, Tracer, timed_stream
+from url_fetch import fetch_async, find_urls
+from usage import METRICS_PATH, Usage, UsageLedger
 
 
 # --- Configuration ---
-MODEL = "claude-haiku-4-5-20251001"
-MAX_TOKENS_FREE = 256
-MAX_TOKENS_UNLOCKED = 1024
+# Model, token limits and context budgets are set in chat.py, history
+# compaction (turns kept verbatim, fold budget) in history.py
 FREE_QUESTIONS = 5
 UNLOCKED_QUESTIONS = 30
-AGENTS_DIR = Path(__file__).parent / "agents"
-
-# --- Agent roster ---
-# Each agent: key -> (display_name, tagline, context_file, identities, default_identity)
-AGENTS = {
-    "vishal": {
-        "name": "Vishal Sood",
-        "tagline": "Senior Research Engineer | PhD Physics | HPC, Genomics, Scientific Computing",
-        "context": AGENTS_DIR / "vishal" / "context.txt",
-        "has_plan": True,
-        "identities": {
-            "Research Engineer": (
-                "Senior Research Engineer",
-                "A Senior Research Engineer with a PhD in Physics and extensive experience "
-                "building robust, scalable computational tools that accelerate scientific "
-                "discovery. Proven ability to translate complex research requirements — from "
-                "neuroscience to genomics — into production-grade software platforms.",
-            ),
-            "Software Engineer": (
-                "Senior Software Developer",
-                "A Systems Architect and Senior Engineer with a proven track record of "
-                "designing and building robust, scalable platforms for data-intensive "
-                "applications. Combines deep, first-principles expertise in statistical "
-                "modeling and algorithms from a PhD in Physics with hands-on experience "
-                "engineering high-performance backends (C++, Python) and complex workflow "
-                "engines for distributed systems.",
-            ),
-            "Quant Engineer": (
-                "Senior Quantitative Research Engineer",
-                "A first-principles thinker with a PhD in Statistical Physics and over a "
-                "decade of experience architecting high-performance computational ecosystems. "
-                "Proven ability to translate the complex stochastic systems underlying "
-                "financial derivatives into robust, low-latency C++ applications and scalable "
-                "Python validation pipelines.",
-            ),
-            "Genomics / Comp Bio": (
-                "Senior Research Engineer / Computational Biology Specialist",
-                "A Senior Research Engineer with extensive experience developing "
-                "high-performance bioinformatics pipelines and clinical-grade software. "
-                "Specialized in architecting scalable C++ / Python solutions for processing "
-                "complex biological data, from large-scale genomics to multi-terabyte "
-                "scientific simulations.",
-            ),
-            "Research Software Engineer": (
-                "Senior Research Software Developer",
-                "Senior research software developer (PhD, Statistical Physics) building "
-                "Python-first research platforms, complex workflow engines, data pipelines, "
-                "and analysis/visualization tooling used by front-office/bench scientists. "
-                "Expert in turning large, heterogeneous datasets into fast, reproducible insights.",
-            ),
-        },
-        "default_identity": "Research Engineer",
-    },
-    "marc": {
-        "name": "Marc Delarue",
-        "tagline": "Senior Risk Manager | 20 years Private Banking | CFA, FRM",
-        "context": AGENTS_DIR / "marc" / "context.txt",
-        "has_plan": False,
-        "identities": {
-            "Risk Manager": (
-                "Senior Risk Manager",
-                "A seasoned private banking professional with over 20 years in risk management, "
-                "portfolio oversight, and regulatory compliance across Geneva's leading financial "
-                "institutions. Known for building robust risk frameworks that balance client "
-                "service excellence with regulatory rigor.",
-            ),
-            "CRO / Executive": (
-                "Chief Risk Officer",
-                "An experienced risk executive ready for CRO-level responsibility at boutique "
-                "private banks or family offices. Two decades of building and leading risk teams, "
-                "presenting to board committees, and navigating FINMA regulatory cycles.",
-            ),
-            "Risk Consultant": (
-                "Risk & Compliance Consultant",
-                "A private banking risk specialist available for consulting engagements: "
-                "regulatory remediation, risk framework design, FIDLEG implementation, "
-                "and interim risk management mandates.",
-            ),
-        },
-        "default_identity": "Risk Manager",
-    },
-    "sophie": {
-        "name": "Sophie Andersen",
-        "tagline": "Senior Compliance Officer | 18 years Banking Regulation | MLaw, CAMS",
-        "context": AGENTS_DIR / "sophie" / "context.txt",
-        "has_plan": False,
-        "identities": {
-            "Compliance Officer": (
-                "Senior Compliance Officer",
-                "A compliance and regulatory specialist with 18 years across corporate banking, "
-                "trade finance, and asset management. Expert in Swiss and EU financial regulation, "
-                "cross-border banking, and sanctions compliance.",
-            ),
-            "Head of Compliance": (
-                "Head of Compliance",
-                "Ready for Head of Compliance roles at mid-sized banks or asset managers. "
-                "Built compliance programs from scratch at two Swiss banks, led FIDLEG "
-                "implementation, and managed regulatory examinations with consistently "
-                "positive outcomes.",
-            ),
-            "Regulatory Consultant": (
-                "Regulatory Affairs Consultant",
-                "Available for compliance consulting: FIDLEG implementation, regulatory "
-                "remediation, AML program design, and fintech regulatory advisory. "
-                "Bridges German-speaking and French-speaking Swiss banking cultures.",
-            ),
-        },
-        "default_identity": "Compliance Officer",
-    },
-    "olena": {
-        "name": "Olena Kovalenko",
-        "tagline": "Cardiologist (Ukraine) | Clinical Research | CHUV Lausanne",
-        "context": AGENTS_DIR / "olena" / "context.txt",
-        "has_plan": False,
-        "identities": {
-            "Clinical Researcher": (
-                "Clinical Research Professional",
-                "A physician with 12 years of cardiology experience and active clinical "
-                "research at CHUV. Experienced in multicenter clinical trials, GCP, "
-                "and medical device evaluations. Pursuing Swiss medical equivalence.",
-            ),
-            "Medical Doctor": (
-                "Cardiologist (MEBEKO pathway)",
-                "A board-certified cardiologist with 12 years of clinical practice, "
-                "3,000+ echocardiograms, and ward chief experience. Completing the "
-                "Swiss equivalence pathway while contributing to research at CHUV.",
-            ),
-            "Medtech / MSL": (
-                "Medical Science Liaison / Clinical Affairs",
-                "Leveraging deep cardiology expertise for medical device and pharmaceutical "
-                "roles: MSL, clinical affairs, medical writing, and regulatory documentation "
-                "from the physician's perspective.",
-            ),
-        },
-        "default_identity": "Clinical Researcher",
-    },
-    "david": {
-        "name": "David Chen",
-        "tagline": "Technical Writer | 15 years Medtech | EU MDR, Catalogs, CCMS",
-        "context": AGENTS_DIR / "david" / "context.txt",
-        "has_plan": False,
-        "identities": {
-            "Technical Writer": (
-                "Senior Technical Writer / Documentation Lead",
-                "A technical communicator with 15 years creating product catalogs, "
-                "regulatory documentation, and surgical technique guides for Swiss "
-                "medtech companies. Expert in structured content management and "
-                "multilingual publishing.",
-            ),
-            "Regulatory Documentation": (
-                "Regulatory Documentation Specialist",
-                "Specialized in EU MDR documentation: IFUs, labeling, technical files, "
-                "and CE marking submissions. Led MDR transition projects for 400+ documents "
-                "at a major spine surgery company.",
-            ),
-            "Content Strategy": (
-                "Content Strategy & PIM Specialist",
-                "Helping medtech companies move from legacy documentation to digital-first "
-                "product content. Experienced with CCMS, PIM systems, single-source publishing, "
-                "and automated translation workflows.",
-            ),
-        },
-        "default_identity": "Technical Writer",
-    },
-}
+PDF_CACHE_DIR = ARTIFACT_DIR  # prebuilt by `python generate_pdf.py`, filled on demand otherwise
+FETCH_WAIT = 0.5              # seconds a run waits for job URLs before they load in the background
+FETCH_POLL_SECONDS = 1.0
+BUILD_DIR = Path(__file__).parent / "build"
+STATE_DIR = os.environ.get("COMPTOIR_STATE_DIR")  # relocates caches and metrics (load tests)
 
 
+page_start = time.perf_counter()
+
 # --- Page config ---
 st.set_page_config(
     page_title="le comptoir",
@@ -209,10 +64,45 @@ st.set_page_config(
 
 
 # --- Cached resources ---
+def state_path(path: Path) -> Path:
+    """A store's default build/ path, moved under STATE_DIR when that is set."""
+    return Path(STATE_DIR) / path.relative_to(BUILD_DIR) if STATE_DIR else path
+
+
+@st.cache_resource
+def get_usage_ledger() -> UsageLedger:
+    """Process-wide token usage totals and JSONL log (cached)."""
+    return UsageLedger(state_path(METRICS_PATH))
+
+
+@st.cache_resource
+def get_tracer() -> Tracer:
+    """Process-wide latency histograms and span log (cached)."""
+    return Tracer(state_path(TRACE_PATH), state_path(PROMETHEUS_PATH))
+
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    """Answers to previously seen first-turn requests (cached)."""
+    return ResponseCache(state_path(CACHE_DIR))
+
+
+@st.cache_resource
+def get_fit_store() -> FitStore:
+    """Structured fit assessments of earlier roster matches (cached)."""
+    return FitStore(state_path(FIT_DIR))
+
+
 @st.cache_resource
-def load_context(path: str) -> str:
-    """Load a candidate's portfolio content (cached per path)."""
-    return Path(path).read_text(encoding="utf-8")
+def get_job_registry() -> JobRegistry:
+    """Canonical job postings, with near duplicates mapped together (cached)."""
+    return JobRegistry(state_path(REGISTRY_PATH))
+
+
+@st.cache_resource
+def get_semantic_cache() -> SemanticCache:
+    """Answers to earlier first questions, matched by similarity (cached)."""
+    return SemanticCache()
 
 
 @st.cache_resource
@@ -225,57 +115,32 @@ def get_client():
         return anthropic.Anthropic()
 
 
-def get_system_prompt(agent: dict, identity_key: str, job_description: str = "",
-                      language: str = "en", concise: bool = False) -> str:
-    """Build system prompt with identity framing and optional job context."""
-    content = load_context(str(agent["context"]))
-    name = agent["name"]
-    title, summary = agent["identities"][identity_key]
-
-    identity_block = (
-        f"\n\n--- Active Professional Identity ---\n\n"
-        f"Title: {title}\n"
-        f"Summary: {summary}\n\n"
-        f"When discussing {name}'s work, lead with this framing. "
-        f"Emphasize the aspects of their experience most relevant to a "
-        f'"{title}" positioning.\n'
-    )
+def admin_enabled() -> bool:
+    """Whether the metrics panel is shown: ?admin=<ADMIN_TOKEN secret>."""
+    try:
+        token = st.secrets["ADMIN_TOKEN"]
+    except (FileNotFoundError, KeyError):
+        return False
+    return st.query_params.get("admin") == token
 
-    job_block = ""
-    if job_description:
-        job_block = (
-            f"\n\n--- Job Description Under Evaluation ---\n\n"
-            f"{job_description}\n\n"
-            f"A recruiter or hiring manager has provided this job description. "
-            f"When the visitor asks about fit or match, analyze it using these lenses:\n"
-            f"1. The recruiter's filter: Does this candidate survive a 6-second scan "
-            f"for this role? What jumps out immediately?\n"
-            f"2. The hiring manager's filter: Does the candidate's experience map onto "
-            f"problems this role actually faces? Be specific.\n"
-            f"3. The honest broker: Where is the alignment strong? Where are gaps? "
-            f"Name gaps directly — the candidate can decide how to address them.\n"
-            f"4. Domain bridging: Where the candidate's experience is in a different "
-            f"domain but structurally similar, make the translation explicit.\n"
-        )
 
-    return build_system_prompt(content + identity_block + job_block,
-                               language=language, concise=concise)
+@st.cache_resource
+def get_gateway() -> Gateway:
+    """Process-wide async streaming gateway shared by all sessions (cached)."""
+    try:
+        api_key = st.secrets["ANTHROPIC_API_KEY"]
+        return Gateway(lambda: anthropic.AsyncAnthropic(api_key=api_key, max_retries=0))
+    except (FileNotFoundError, KeyError):
+        return Gateway()
 
 
-def fetch_url_text(url: str) -> str:
-    """Fetch a URL and extract readable text."""
-    try:
-        resp = requests.get(url, timeout=15, headers={
-            "User-Agent": "Mozilla/5.0 (compatible; LeComptoir/1.0)"
-        })
-        resp.raise_for_status()
-        text = re.sub(r'<script[^>]*>.*?</script>', '', resp.text, flags=re.DOTALL)
-        text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL)
-        text = re.sub(r'<[^>]+>', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text[:10000]
-    except Exception as e:
-        return f"[Could not fetch URL: {e}]"
+@st.fragment(run_every=FETCH_POLL_SECONDS)
+def await_fetches(fetches):
+    """Show job URL fetch progress; rerun the page once all are done."""
+    done = sum(future.done() for future in fetches)
+    if done == len(fetches):
+        st.rerun()
+    st.caption(f"{t['job_fetching']} {done}/{len(fetches)}")
 
 
 # --- Sidebar ---
@@ -306,6 +171,7 @@ with st.sidebar:
         st.session_state.current_agent = st.session_state._agent_select
         st.session_state.messages = []
         st.session_state.message_count = 0
+        st.session_state.history = HistoryManager(KEEP_TURNS, TOKEN_BUDGET)
 
     st.selectbox(
         t["candidate_label"],
@@ -355,15 +221,44 @@ with st.sidebar:
         )
     elif job_input_method == t["job_radio_url"]:
         job_url = st.text_input("URL", placeholder=t["job_url_placeholder"])
-        if job_url:
-            with st.spinner(t["job_fetching"]):
-                job_description = fetch_url_text(job_url)
-            if job_description.startswith("[Could not"):
-                st.warning(job_description)
-                job_description = ""
-            else:
+        # Several URLs may be pasted at once; they are fetched in parallel on
+        # worker threads, so a slow careers page never holds up the page
+        urls = find_urls(job_url)
+        if job_url.strip() and not urls:
+            urls = [job_url.strip()]  # the fetch reports what is wrong with it
+        fetch_tracer = get_tracer()
+        fetches = []
+        for url in urls:
+            future, started = fetch_async(url)
+            if started:
+                start = time.perf_counter()
+                future.add_done_callback(lambda _, start=start: fetch_tracer.record(
+                    "url_fetch", time.perf_counter() - start, {}))
+            fetches.append(future)
+        wait(fetches, timeout=FETCH_WAIT)
+        if not all(future.done() for future in fetches):
+            await_fetches(fetches)
+        else:
+            postings = []
+            for url, future in zip(urls, fetches):
+                if future.result().startswith("[Could not"):
+                    st.warning(future.result())
+                else:
+                    postings.append((url, future.result()))
+            pick = 0
+            if len(postings) > 1:
+                pick = st.selectbox(t["job_pick"], range(len(postings)),
+                                    format_func=lambda i: f"{urlsplit(postings[i][0]).netloc}: "
+                                                          f"{postings[i][1][:40]}")
+            if postings:
+                job_description = postings[pick][1]
                 st.success(f"Fetched {len(job_description):,} chars")
 
+    # Reformatted copies of a posting share one canonical text, so every cache
+    # keyed on the job description hits whichever way the posting was obtained
+    job = get_job_registry().register(job_description)
+    job_description = job.text
+
     st.divider()
 
     # Example questions
@@ -404,10 +299,12 @@ with st.sidebar:
     st.divider()
     st.caption(t["footer"])
     st.caption(f"Model: `{MODEL}`")
-    used = st.session_state.get("message_count", 0)
-    input_cost = used * 80_000 * 0.80 / 1_000_000
-    output_cost = used * 500 * 4.00 / 1_000_000
-    st.caption(t["cost_label"].format(cost=input_cost + output_cost))
+    session_usage = st.session_state.get("usage", Usage())
+    st.caption(t["cost_label"].format(cost=session_usage.cost(MODEL)))
+    if session_usage.requests:
+        st.caption(t["usage_label"].format(prompt=session_usage.prompt_tokens,
+                                           cached=session_usage.cache_hit_rate,
+                                           output=session_usage.output_tokens))
 
 
 # --- Initialize state ---
@@ -415,6 +312,12 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "message_count" not in st.session_state:
     st.session_state.message_count = 0
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if "usage" not in st.session_state:
+    st.session_state.usage = Usage()
+if "history" not in st.session_state:
+    st.session_state.history = HistoryManager(KEEP_TURNS, TOKEN_BUDGET)
 if "unlocked" not in st.session_state:
     st.session_state.unlocked = False
 if "email_submitted" not in st.session_state:
@@ -423,13 +326,41 @@ if "email_submitted" not in st.session_state:
 # --- Determine tier ---
 unlocked = st.session_state.unlocked
 max_questions = UNLOCKED_QUESTIONS if unlocked else FREE_QUESTIONS
-max_tokens = MAX_TOKENS_UNLOCKED if unlocked else MAX_TOKENS_FREE
-is_concise = not unlocked
 
 # --- Load resources ---
-system_prompt = get_system_prompt(current_agent, identity, job_description,
-                                  language=lang, concise=is_concise)
 client = get_client()
+gateway = get_gateway()
+ledger = get_usage_ledger()
+tracer = get_tracer()
+response_cache = get_response_cache()
+semantic_cache = get_semantic_cache()
+
+
+session_usage = st.session_state.usage
+session_id = st.session_state.session_id
+agent_key = st.session_state.current_agent
+
+
+def record_usage(api_usage, kind: str = "chat"):
+    """Add an API usage block to the session totals and the process ledger.
+
+    Safe to call from background threads: it only touches objects bound
+    during this script run, never st.session_state.
+    """
+    usage = Usage.from_api(api_usage)
+    session_usage.add(usage)
+    ledger.record(usage, MODEL, session_id, agent_key, lang, kind)
+
+
+def queue_notice(flight):
+    """Stream a flight's text, with a notice while it waits for a slot."""
+    notice = st.empty()
+    if flight.queued:
+        notice.caption(t["queued"])
+    for i, text in enumerate(flight.text_stream()):
+        if i == 0:
+            notice.empty()
+        yield text
 
 # --- Header ---
 st.title(current_agent["name"])
@@ -439,6 +370,8 @@ st.caption(f"*{title}*")
 tabs = [t["tab_chat"]]
 if current_agent["has_plan"]:
     tabs.append(t["tab_plan"])
+if job_description:
+    tabs.append(t["tab_match"])
 active_tabs = st.tabs(tabs)
 
 # ===================== TAB 1: CHAT =====================
@@ -506,42 +439,79 @@ with active_tabs[0]:
 
     elif prompt:
         st.session_state.messages.append({"role": "user", "content": prompt})
-        st.session_state.message_count += 1
+        # From the whole transcript: trimming can leave a later question alone
+        first_turn = len(st.session_state.messages) == 1
 
         with st.chat_message("user"):
             st.markdown(prompt)
 
+        history_summary, history = st.session_state.history.context(
+            st.session_state.messages)
+        with tracer.span("prompt_build") as span:
+            request = build_request(current_agent, identity, history,
+                                    job_description=job_description, language=lang,
+                                    unlocked=unlocked, history_summary=history_summary)
+            span.set(prompt_tokens=request_tokens(request))
+        prompt_config = config_key(request, agent_key, identity, lang, unlocked)
+        with tracer.span("cache_lookup") as span:
+            cached_response = response_cache.get(request)
+            cache_hit = "exact" if cached_response is not None else "none"
+            if cached_response is None and first_turn:
+                cached_response = semantic_cache.get(prompt_config, prompt, agent_name)
+                cache_hit = "semantic" if cached_response is not None else "none"
+            span.set(cache_hit=cache_hit)
+
         with st.chat_message("assistant"):
-            try:
-                with client.messages.stream(
-                    model=MODEL,
-                    max_tokens=max_tokens,
-                    system=system_prompt,
-                    messages=[
-                        {"role": m["role"], "content": m["content"]}
-                        for m in st.session_state.messages
-                    ],
-                ) as stream:
-                    full_response = st.write_stream(stream.text_stream)
-            except anthropic.AuthenticationError:
-                st.error("API configuration error. Please try again later.")
-                full_response = None
-            except anthropic.APIError:
-                st.error("Something went wrong. Please try again.")
-                full_response = None
+            if cached_response is not None:
+                with tracer.span("replay", cache_hit=cache_hit) as span:
+                    full_response = st.write_stream(timed_stream(replay(cached_response), span))
+            else:
+                try:
+                    flight, shared = gateway.stream(request)
+                    with tracer.span("model_stream", shared=str(shared)) as span:
+                        full_response = st.write_stream(timed_stream(queue_notice(flight), span))
+                        if flight.usage is not None:
+                            usage = Usage.from_api(flight.usage)
+                            generating = span.elapsed() - span.attrs.get("ttft", 0)
+                            span.set(prompt_tokens=usage.prompt_tokens,
+                                     output_tokens=usage.output_tokens,
+                                     tokens_per_second=usage.output_tokens / max(generating, 1e-3),
+                                     cache_hit_rate=usage.cache_hit_rate)
+                    if not shared:
+                        record_usage(flight.usage)
+                    if first_turn and full_response:
+                        response_cache.put(request, full_response)
+                        semantic_cache.put(prompt_config, prompt, full_response, agent_name)
+                except GatewayBusy:
+                    st.warning(t["busy"])
+                    full_response = None
+                except anthropic.AuthenticationError:
+                    st.error("API configuration error. Please try again later.")
+                    full_response = None
+                except anthropic.APIError:
+                    st.error("Something went wrong. Please try again.")
+                    full_response = None
 
         if full_response:
             st.session_state.messages.append(
                 {"role": "assistant", "content": full_response}
             )
+            st.session_state.message_count += 1
+            st.session_state.history.compact_async(
+                client, MODEL, list(st.session_state.messages),
+                on_usage=lambda u: record_usage(u, kind="summary"))
+        else:
+            # A failed turn costs no question; drop it so it can be asked again
+            st.session_state.messages.pop()
 
 # ===================== TAB 2: MARKETING PLAN (if available) =====================
-if current_agent["has_plan"] and len(active_tabs) > 1:
+if current_agent["has_plan"]:
     with active_tabs[1]:
-        plan = get_plan(lang)
+        plan = parse_plan(lang)
 
         # Download button
-        pdf_bytes = generate_marketing_plan_pdf(lang)
+        with tracer.span("pdf", lang=lang):
+            pdf_bytes = get_marketing_plan_pdf(lang, cache_dir=PDF_CACHE_DIR)
         st.download_button(
             label=f"{t['download_pdf']} ({LANGUAGES[lang]})",
             data=pdf_bytes,
@@ -554,5 +524,99 @@ if current_agent["has_plan"] and len(active_tabs) > 1:
         # Render plan sections
         for section in plan["sections"]:
             st.markdown(f"### {section['heading']}")
-            st.markdown(section["body"])
+            st.markdown(to_markdown(section["blocks"]))
             st.markdown("---")
+
+# ===================== TAB 3: ROSTER MATCH (with a job description) =====================
+if job_description:
+    with active_tabs[-1]:
+        st.markdown(t["match_intro"])
+        columns = t["match_columns"]
+
+        def match_table(results):
+            rows = [{columns[0]: r["name"], columns[1]: r["identity"], columns[2]: r["score"],
+                     columns[3]: r["overlap"], columns[4]: r["text"]}
+                    for r in results if r["error"] is None]
+            return sorted(rows, key=lambda row: (row[columns[2]] is not None,
+                                                 row[columns[2]] or 0, row[columns[3]]),
+                          reverse=True)
+
+        match_key = (job.id, lang)
+        if st.session_state.get("roster_match", (None, None))[0] == match_key:
+            st.dataframe(match_table(st.session_state.roster_match[1]), hide_index=True)
+        elif st.button(t["match_button"]):
+            table = st.empty()
+            results = []
+            with tracer.span("roster_match") as span:
+                for result in match_roster(gateway, job_description, lang, cache=response_cache,
+                                           fits=get_fit_store()):
+                    if result["usage"] is not None:
+                        record_usage(result["usage"], kind="match")
+                    results.append(result)
+                    table.dataframe(match_table(results), hide_index=True)
+                span.set(candidates=len(results))
+            if not results:
+                st.info(t["match_empty"])
+            elif any(r["error"] is not None for r in results):
+                st.warning(t["busy"])
+            st.session_state.roster_match = (match_key, results)
+
+        # Structured assessments render without another call; the prose
+        # analysis is only generated when asked for
+        stored_key, stored = st.session_state.get("roster_match", (None, []))
+        assessed = [r for r in stored if r["fit"] is not None] if stored_key == match_key else []
+        if assessed:
+            st.markdown(f"#### {t['match_detail']}")
+            assessed.sort(key=lambda r: r["score"], reverse=True)
+            choice = st.selectbox(t["match_detail"], range(len(assessed)),
+                                  format_func=lambda i: f"{assessed[i]['name']} ({assessed[i]['identity']})",
+                                  label_visibility="collapsed", key="_match_detail")
+            chosen = assessed[choice]
+            fit = chosen["fit"]
+            st.dataframe([{t["match_detail"]: label, columns[2]: fit.lenses[lens]["score"],
+                           columns[4]: fit.lenses[lens]["note"]}
+                          for lens, label in t["match_lenses"].items()], hide_index=True)
+            if fit.matched_requirements:
+                st.markdown(f"**{t['match_matched']}**")
+                st.markdown("\n".join(
+                    f"- **{m['requirement']}**: {m['evidence']}"
+                    + (f" *({m['section']})*" if m["section"] else "")
+                    for m in fit.matched_requirements))
+            if fit.gaps:
+                st.markdown(f"**{t['match_gaps']}**")
+                st.markdown("\n".join(f"- {gap}" for gap in fit.gaps))
+            if fit.cited_sections:
+                st.caption(f"{t['match_sections']}: {', '.join(fit.cited_sections)}")
+
+            narratives = st.session_state.setdefault("match_narratives", {})
+            narrative_key = (match_key, chosen["key"], chosen["identity"])
+            if narrative_key in narratives:
+                st.markdown(narratives[narrative_key])
+            elif st.button(t["match_narrative_button"]):
+                request = narrative_request(AGENTS[chosen["key"]], chosen["identity"],
+                                            job_description, lang)
+                narrative = response_cache.get(request)
+                try:
+                    with tracer.span("match_narrative", cached=str(narrative is not None)):
+                        if narrative is not None:
+                            st.write_stream(replay(narrative))
+                        else:
+                            flight, shared = gateway.stream(request)
+                            narrative = st.write_stream(queue_notice(flight))
+                            if not shared:
+                                record_usage(flight.usage, kind="match")
+                            response_cache.put(request, narrative)
+                    narratives[narrative_key] = narrative
+                except GatewayBusy:
+                    st.warning(t["busy"])
+                except anthropic.APIError:
+                    st.error("Something went wrong. Please try again.")
+
+# ===================== ADMIN: METRICS (optional) =====================
+if admin_enabled():
+    with st.sidebar.expander("Metrics", expanded=True):
+        st.dataframe(tracer.snapshot(), hide_index=True)
+        st.json({"gateway": gateway.stats(), "semantic_cache": semantic_cache.stats(),
+                 "usage": ledger.snapshot()}, expanded=False)
+
+tracer.record("page", time.perf_counter() - page_start, {"agent": agent_key})
@@ -0,0 +1,266 @@
+"""Offline bulk job matching for le comptoir.
+
+Scores a file of job postings against every candidate through the Message
+Batches API, for weekly sweeps of scraped postings that would be slow and
+costly as interactive calls (batched requests are billed at half price and
+are not subject to the interactive rate limits). Each (job, candidate,
+identity) combination becomes one fit-analysis request, built exactly as
+the app builds it (matching.fit_request), and requests are submitted in
+batches of up to BATCH_SIZE, sorted so that requests sharing a system
+prompt prefix are adjacent.
+
+Progress is checkpointed in the output directory: state.json records the
+submitted batches and what each request is, and results.jsonl receives one
+row per succeeded request as batches end. A rerun polls batches still in
+progress instead of resubmitting them, skips requests already in
+results.jsonl, and retries those that errored or expired.
+
+Jobs are read from a JSONL file with an "id" and either "text" or "url"
+per line, and canonicalized through the job registry (jobs.py): a posting
+that is a near duplicate of an earlier one in the file is skipped, and
+postings already seen by the app share its assessments. Output rows hold
+job_id, agent, identity, language, score (the "N/10" the fit question asks
+for, or null), rationale and token usage.
+With --structured, requests ask for a record_fit call instead (fit.py):
+rows also hold the validated assessment, which is added to the fit store
+the app's roster match reads from, and invalid ones are retried.
+
+Usage:
+    python batch_match.py jobs.jsonl --dry-run        # count requests
+    python batch_match.py jobs.jsonl --lang fr --identities best --structured
+    python batch_match.py jobs.jsonl --mock           # against mock_api.py
+"""
+import argparse
+import hashlib
+import json
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+import anthropic
+
+import mock_api
+from fit import FitStore, fit_key, from_message, section_titles, structured_request
+from jobs import JobRegistry
+from matching import best_identity, fit_request, parse_score
+from roster import AGENTS
+from url_fetch import fetch_many
+
+OUT_DIR = Path(__file__).parent / "build" / "matches"
+BATCH_SIZE = 1_000      # requests per batch (the API allows up to 100,000 / 256 MB)
+POLL_SECONDS = 30.0     # seconds between status checks of unfinished batches
+
+
+def load_jobs(path, registry: JobRegistry | None = None) -> list[dict]:
+    """Jobs with id and canonical text; URLs are fetched in parallel, and
+    unreachable ones and near duplicates skipped."""
+    registry = registry or JobRegistry()
+    entries = [json.loads(line) for line in Path(path).read_text(encoding="utf-8").splitlines()
+               if line.strip()]
+    pages = iter(fetch_many([job["url"] for job in entries if not job.get("text")]))
+    jobs, seen = [], {}
+    for job in entries:
+        text = job.get("text") or next(pages)
+        if text.startswith("[Could not"):
+            print(f"BATCH_SKIP: job {job['id']}: {text}")
+            continue
+        canonical = registry.register(text)
+        key = canonical.duplicate_of or canonical.id
+        if key in seen:
+            print(f"BATCH_SKIP: job {job['id']}: duplicate of {seen[key]}")
+            continue
+        seen[key] = job["id"]
+        jobs.append({"id": str(job["id"]), "text": canonical.text})
+    return jobs
+
+
+def custom_id(job: dict, agent_key: str, identity: str, language: str,
+              structured: bool) -> str:
+    """Stable request id; a changed posting text gets a new one."""
+    key = "\0".join([job["id"], job["text"], agent_key, identity, language,
+                     "structured" if structured else "text"])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def plan(jobs: list[dict], language: str, agent_keys=None, identities: str = "all",
+         structured: bool = False):
+    """Yield (custom_id, meta, request) for every job, candidate and identity."""
+    items = []
+    for key in agent_keys or AGENTS:
+        agent = AGENTS[key]
+        for job in jobs:
+            keys = (list(agent["identities"]) if identities == "all"
+                    else [best_identity(agent, job["text"])])
+            for identity in keys:
+                meta = {"job_id": job["id"], "agent": key, "identity": identity,
+                        "language": language}
+                if structured:
+                    request = structured_request(agent, identity, job["text"], language)
+                    meta["fit_key"] = fit_key(job["text"], key, agent, identity, language)
+                else:
+                    _, request = fit_request(agent, job["text"], language, identity)
+                items.append((custom_id(job, key, identity, language, structured),
+                              meta, request))
+    # Neighbours share the portfolio prefix, which prompt caching can reuse
+    items.sort(key=lambda item: (item[1]["agent"], item[1]["identity"], item[1]["job_id"]))
+    yield from items
+
+
+class Checkpoint:
+    """Submitted batches and collected results, persisted in a directory."""
+
+    def __init__(self, path=OUT_DIR, fits: FitStore | None = None):
+        self.path = Path(path)
+        self.fits = fits
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.state_file = self.path / "state.json"
+        self.results_file = self.path / "results.jsonl"
+        state = (json.loads(self.state_file.read_text(encoding="utf-8"))
+                 if self.state_file.exists() else {})
+        self.batches: dict[str, list[str]] = state.get("batches", {})
+        self.requests: dict[str, dict] = state.get("requests", {})
+        self.done: set[str] = set()
+        if self.results_file.exists():
+            for line in self.results_file.read_text(encoding="utf-8").splitlines():
+                self.done.add(json.loads(line)["custom_id"])
+
+    def pending(self) -> set[str]:
+        return {cid for ids in self.batches.values() for cid in ids}
+
+    def save(self):
+        tmp = self.state_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"batches": self.batches, "requests": self.requests}),
+                       encoding="utf-8")
+        tmp.replace(self.state_file)
+
+    def submitted(self, batch_id: str, items: list):
+        self.batches[batch_id] = [cid for cid, _, _ in items]
+        self.requests.update({cid: meta for cid, meta, _ in items})
+        self.save()
+
+    def collect(self, batch_id: str, results) -> dict:
+        """Append a finished batch's successes; returns counts by result type."""
+        counts: dict[str, int] = {}
+        with self.results_file.open("a", encoding="utf-8") as f:
+            for entry in results:
+                kind = entry.result.type
+                counts[kind] = counts.get(kind, 0) + 1
+                if kind != "succeeded" or entry.custom_id in self.done:
+                    continue
+                message = entry.result.message
+                meta = self.requests[entry.custom_id]
+                row = {"custom_id": entry.custom_id,
+                       **{k: v for k, v in meta.items() if k != "fit_key"}}
+                if "fit_key" in meta:
+                    try:
+                        fit = from_message(message, section_titles(AGENTS[meta["agent"]]))
+                    except ValueError as e:
+                        counts["invalid"] = counts.get("invalid", 0) + 1
+                        print(f"BATCH_INVALID: {entry.custom_id}: {e}")
+                        continue
+                    if self.fits is not None:
+                        self.fits.put(meta["fit_key"], fit)
+                    row.update(score=fit.overall, rationale=fit.summary(), fit=asdict(fit))
+                else:
+                    text = "".join(b.text for b in message.content if b.type == "text")
+                    row.update(score=parse_score(text), rationale=text)
+                usage = message.usage
+                f.write(json.dumps({
+                    **row,
+                    "input_tokens": usage.input_tokens,
+                    "cache_read_input_tokens": usage.cache_read_input_tokens or 0,
+                    "cache_creation_input_tokens": usage.cache_creation_input_tokens or 0,
+                    "output_tokens": usage.output_tokens,
+                }, ensure_ascii=False) + "\n")
+                self.done.add(entry.custom_id)
+        for cid in self.batches.pop(batch_id):
+            if cid not in self.done:
+                self.requests.pop(cid, None)
+        self.save()
+        return counts
+
+
+def run(client, checkpoint: Checkpoint, items: list, batch_size: int = BATCH_SIZE,
+        poll: float = POLL_SECONDS):
+    """Submit what is neither done nor in flight, then wait for every batch.
+
+    Args:
+        client: Anthropic client.
+        checkpoint: Where progress is recorded and resumed from.
+        items: (custom_id, meta, request) from plan().
+        batch_size: Requests per batch.
+        poll: Seconds between status checks.
+    """
+    skip = checkpoint.done | checkpoint.pending()
+    todo = [item for item in items if item[0] not in skip]
+    for start in range(0, len(todo), batch_size):
+        chunk = todo[start:start + batch_size]
+        batch = client.messages.batches.create(
+            requests=[{"custom_id": cid, "params": request} for cid, _, request in chunk])
+        checkpoint.submitted(batch.id, chunk)
+        print(f"BATCH_SUBMIT: {batch.id} ({len(chunk)} requests)")
+
+    while checkpoint.batches:
+        for batch_id in list(checkpoint.batches):
+            batch = client.messages.batches.retrieve(batch_id)
+            if batch.processing_status != "ended":
+                continue
+            counts = checkpoint.collect(batch_id, client.messages.batches.results(batch_id))
+            print(f"BATCH_DONE: {batch_id} {counts}")
+        if checkpoint.batches:
+            time.sleep(poll)
+
+
+def summary(checkpoint: Checkpoint) -> dict:
+    """Result counts, token totals and the best-scored candidate per job."""
+    rows = ([json.loads(line) for line in
+             checkpoint.results_file.read_text(encoding="utf-8").splitlines()]
+            if checkpoint.results_file.exists() else [])
+    best: dict[str, dict] = {}
+    for row in rows:
+        current = best.get(row["job_id"])
+        if row["score"] is not None and (current is None or row["score"] > current["score"]):
+            best[row["job_id"]] = row
+    return {
+        "results": len(rows),
+        "input_tokens": sum(r["input_tokens"] + r["cache_read_input_tokens"]
+                            + r["cache_creation_input_tokens"] for r in rows),
+        "output_tokens": sum(r["output_tokens"] for r in rows),
+        "best": {job: f"{r['agent']}/{r['identity']} {r['score']:g}/10"
+                 for job, r in sorted(best.items())},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Match job postings against the roster in bulk.")
+    parser.add_argument("jobs", help="JSONL file of jobs with id and text or url")
+    parser.add_argument("--out", default=OUT_DIR, help="checkpoint and results directory")
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--agent", nargs="*", help="agent keys (default: all)")
+    parser.add_argument("--identities", choices=["all", "best"], default="all",
+                        help="every identity, or only the one closest to each job")
+    parser.add_argument("--structured", action="store_true",
+                        help="ask for validated record_fit assessments instead of prose")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS)
+    parser.add_argument("--mock", action="store_true", help="run against an in-process mock API")
+    parser.add_argument("--dry-run", action="store_true", help="only count requests to submit")
+    args = parser.parse_args()
+
+    checkpoint = Checkpoint(args.out, FitStore())
+    items = list(plan(load_jobs(args.jobs), args.lang, args.agent, args.identities,
+                      args.structured))
+    if args.dry_run:
+        todo = sum(cid not in checkpoint.done | checkpoint.pending() for cid, _, _ in items)
+        print(f"{todo} of {len(items)} requests to submit, "
+              f"{len(checkpoint.batches)} batches in progress")
+    else:
+        if args.mock:
+            server = mock_api.serve(mock_api.MockState(), port=0)
+            client = anthropic.Anthropic(
+                base_url=f"http://127.0.0.1:{server.server_address[1]}", api_key="mock")
+            args.poll = min(args.poll, 1.0)
+        else:
+            client = anthropic.Anthropic()
+        run(client, checkpoint, items, args.batch_size, args.poll)
+        print(json.dumps(summary(checkpoint), indent=2))
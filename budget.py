@@ -0,0 +1,74 @@
+"""Pre-flight token budgeting for le comptoir.
+
+Before a request is sent, each prompt component is sized (with cheap
+character-based estimates; context files by their size on disk) and, if the total is
+over the tier's target, trimmed in a fixed order: conversation history
+first (oldest turns), then the job description, then the lowest-relevance
+portfolio sections. Request size, and therefore latency, stays predictable
+whatever the visitor pastes.
+"""
+import os
+from dataclasses import dataclass, field
+
+from retrieval import CHARS_PER_TOKEN, estimate_tokens
+
+MIN_JOB_TOKENS = 1_000       # job description is never cut below this
+MIN_CONTEXT_TOKENS = 3_000   # nor the portfolio
+
+
+def file_tokens(path) -> int:
+    """Token estimate for a file from its size, without reading it."""
+    return os.stat(path).st_size // CHARS_PER_TOKEN
+
+
+@dataclass
+class PromptPlan:
+    """What to send: a portfolio budget, the job text and the history."""
+    context_budget: int
+    job_description: str
+    history: list[dict]
+    total_tokens: int
+    trimmed: list[str] = field(default_factory=list)
+
+
+def plan_prompt(target: int, fixed_tokens: int, context_tokens: int,
+                job_description: str, history: list[dict],
+                trim_context: bool = True) -> PromptPlan:
+    """Fit prompt components into a target input size.
+
+    Args:
+        target: Input token target for the visitor's tier.
+        fixed_tokens: Parts that are never trimmed (instructions, identity,
+            history summary, job-block framing).
+        context_tokens: Portfolio size that would be sent untrimmed.
+        job_description: Job description text.
+        history: Messages to send, oldest first; the last one is the new question.
+        trim_context: Whether the portfolio may be cut down; if not, only
+            history and job description are trimmed.
+    """
+    history = list(history)
+    job_tokens = estimate_tokens(job_description)
+    history_tokens = [estimate_tokens(m["content"]) for m in history]
+    trimmed = []
+
+    def total():
+        return fixed_tokens + context_tokens + job_tokens + sum(history_tokens)
+
+    # 1. History: drop the oldest question/answer pairs, never the new question
+    while total() > target and len(history) > 1:
+        drop = 2 if len(history) > 2 and history[1]["role"] == "assistant" else 1
+        del history[:drop]
+        del history_tokens[:drop]
+        trimmed.append("history")
+    # 2. Job description: truncate down to MIN_JOB_TOKENS
+    if total() > target and job_tokens > MIN_JOB_TOKENS:
+        job_tokens = max(MIN_JOB_TOKENS, job_tokens - (total() - target))
+        job_description = job_description[:job_tokens * CHARS_PER_TOKEN].rstrip() + " [...]"
+        trimmed.append("job")
+    # 3. Portfolio: lower the budget so retrieval keeps fewer sections
+    if trim_context and total() > target and context_tokens > MIN_CONTEXT_TOKENS:
+        context_tokens = max(MIN_CONTEXT_TOKENS, context_tokens - (total() - target))
+        trimmed.append("context")
+
+    return PromptPlan(context_tokens, job_description, history, total(),
+                      sorted(set(trimmed)))
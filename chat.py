@@ -0,0 +1,150 @@
+"""Chat request assembly for le comptoir.
+
+Everything that decides what is sent to the model for a turn: model and
+tier settings, portfolio loading and retrieval, token budgeting, and the
+system prompt. It is kept free of Streamlit so offline tools build exactly
+the requests the app sends.
+"""
+from functools import lru_cache
+
+from budget import file_tokens, plan_prompt
+from context_store import MAX_RESIDENT, store
+from preprocess import load_summaries, resolve
+from prompt import build_system_prompt, identity_block, job_block, system_prompt_text
+from retrieval import SectionIndex, estimate_tokens, load_index as load_section_index
+
+MODEL = "claude-haiku-4-5-20251001"
+MAX_TOKENS_FREE = 256
+MAX_TOKENS_UNLOCKED = 1024
+# "retrieval" sends the core profile plus the sections most relevant to the
+# question (see retrieval.py); "full" sends the whole portfolio every turn,
+# untrimmed and on top of the input budgets below.
+CONTEXT_MODE = "retrieval"
+CONTEXT_TOKEN_BUDGET = 8_000
+INPUT_BUDGET_FREE = 16_000     # target input tokens per request, by tier;
+INPUT_BUDGET_UNLOCKED = 48_000  # history, job text, then portfolio are trimmed to fit
+# Free-tier prompts replace long sections by their summaries (see summarize.py)
+# and get a smaller portfolio budget
+COMPACT_FREE_TIER = True
+COMPACT_TOKEN_BUDGET = 6_000
+
+
+def context_path(agent: dict) -> str:
+    """The agent's preprocessed context if built and current, else the raw file."""
+    return resolve(agent["context"])
+
+
+def load_context(path: str) -> str:
+    """Load a candidate's portfolio content from the context store."""
+    return store.read(path)
+
+
+@lru_cache(maxsize=MAX_RESIDENT)
+def load_index(path: str) -> SectionIndex:
+    """Load a candidate's section index (cached per path, least recently used
+    evicted)."""
+    return load_section_index(path)
+
+
+def get_system_prompt(agent: dict, identity_key: str, job_description: str = "",
+                      language: str = "en", concise: bool = False,
+                      question: str = "", history_summary: str = "",
+                      context_budget: int | None = None,
+                      compact: bool = False) -> list[dict]:
+    """Build system prompt blocks with identity framing and optional job context.
+
+    When the portfolio is larger than the context budget (by default
+    CONTEXT_TOKEN_BUDGET in retrieval mode, unlimited in full mode), it is cut
+    down to its core sections plus the sections most relevant to the question
+    and job description. In compact mode, long sections that have offline
+    summaries are sent as summaries, plus excerpts of them that are relevant,
+    within at most COMPACT_TOKEN_BUDGET.
+    """
+    if context_budget is None:
+        context_budget = context_tokens(agent)
+    excerpts = ""
+    path = context_path(agent)
+    summaries = load_summaries(agent["context"]) if compact else {}
+    if summaries:
+        context_budget = min(context_budget, COMPACT_TOKEN_BUDGET)
+    if summaries or context_budget < file_tokens(path):
+        index = load_index(path)
+        content, excerpts = index.select(f"{question}\n{job_description}",
+                                         budget=context_budget, summaries=summaries)
+    else:
+        content = load_context(path)
+    title, summary = agent["identities"][identity_key]
+    return build_system_prompt(
+        content,
+        identity=identity_block(agent["name"], title, summary),
+        job=job_block(job_description),
+        language=language,
+        concise=concise,
+        excerpts=excerpts,
+        history_summary=history_summary,
+    )
+
+
+def context_tokens(agent: dict) -> int:
+    """Portfolio tokens sent for an agent before any budget trimming."""
+    tokens = file_tokens(context_path(agent))
+    if CONTEXT_MODE == "retrieval":
+        return min(tokens, CONTEXT_TOKEN_BUDGET)
+    return tokens
+
+
+def prompt_overhead(agent: dict, identity_key: str, has_job: bool, language: str,
+                    concise: bool, history_summary: str) -> int:
+    """Tokens of the system prompt other than the portfolio and job text."""
+    title, summary = agent["identities"][identity_key]
+    blocks = build_system_prompt(
+        "",
+        identity=identity_block(agent["name"], title, summary),
+        job=job_block(" ") if has_job else "",
+        language=language,
+        concise=concise,
+        history_summary=history_summary,
+    )
+    return estimate_tokens(system_prompt_text(blocks))
+
+
+def build_request(agent: dict, identity_key: str, messages: list[dict],
+                  job_description: str = "", language: str = "en",
+                  unlocked: bool = False, history_summary: str = "") -> dict:
+    """Keyword arguments for client.messages.create / stream for one turn.
+
+    Args:
+        agent: Roster entry of the candidate.
+        identity_key: Active professional identity.
+        messages: Verbatim history to send, ending with the new question.
+        job_description: Job description under evaluation, if any.
+        language: Language code.
+        unlocked: Whether the visitor has the extended tier.
+        history_summary: Running summary of turns no longer sent verbatim.
+    """
+    concise = not unlocked
+    full = CONTEXT_MODE == "full"
+    portfolio = context_tokens(agent)
+    plan = plan_prompt(
+        (INPUT_BUDGET_UNLOCKED if unlocked else INPUT_BUDGET_FREE) + (portfolio if full else 0),
+        fixed_tokens=prompt_overhead(agent, identity_key, bool(job_description),
+                                     language, concise, history_summary),
+        context_tokens=portfolio,
+        job_description=job_description,
+        history=messages,
+        trim_context=not full,
+    )
+    # Retrieve against the recent questions so follow-ups keep their topic
+    recent_questions = [m["content"] for m in plan.history if m["role"] == "user"][-2:]
+    system = get_system_prompt(agent, identity_key, plan.job_description,
+                               language=language, concise=concise,
+                               question="\n".join(recent_questions),
+                               history_summary=history_summary,
+                               context_budget=plan.context_budget,
+                               compact=concise and COMPACT_FREE_TIER and not full)
+    return {
+        "model": MODEL,
+        "max_tokens": MAX_TOKENS_UNLOCKED if unlocked else MAX_TOKENS_FREE,
+        "system": system,
+        "messages": [{"role": m["role"], "content": m["content"]} for m in plan.history],
+    }
@@ -0,0 +1,106 @@
+"""Content-addressed context storage for le comptoir.
+
+Portfolio files are identified by the SHA-256 of their bytes, so identical
+files are held once, and they are memory-mapped instead of being read into
+Python strings: the pages live in the OS page cache, shared by every worker
+process, and only the sections a request uses are decoded. At most
+MAX_RESIDENT files stay mapped; the least recently used are unmapped when a
+new one is opened, so a process's footprint does not grow with every
+candidate visited.
+"""
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+MAX_RESIDENT = 32
+
+
+class ContextStore:
+    """Memory-mapped context files keyed by content hash, with LRU residency."""
+
+    def __init__(self, max_resident: int = MAX_RESIDENT):
+        self.max_resident = max_resident
+        self._digests: dict[str, tuple[int, int, str]] = {}  # path -> (mtime_ns, size, digest)
+        self._maps: OrderedDict[str, mmap.mmap] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def digest(self, path) -> str:
+        """SHA-256 of a file's bytes, recomputed only when the file changes."""
+        path = os.fspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            known = self._digests.get(path)
+            if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+                return known[2]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+        with self._lock:
+            self._digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def _map(self, path) -> mmap.mmap | None:
+        digest = self.digest(path)
+        with self._lock:
+            if digest in self._maps:
+                self._maps.move_to_end(digest)
+                return self._maps[digest]
+            if os.path.getsize(path) == 0:
+                return None  # empty files cannot be mapped
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[digest] = mapped
+            while len(self._maps) > self.max_resident:
+                _, evicted = self._maps.popitem(last=False)
+                evicted.close()
+            return mapped
+
+    def read_bytes(self, path, start: int = 0, end: int | None = None) -> bytes:
+        with self._lock:
+            mapped = self._map(path)
+            return mapped[start:end] if mapped is not None else b""
+
+    def read(self, path, start: int = 0, end: int | None = None) -> str:
+        """Decode a byte range of a file (the whole file by default)."""
+        return self.read_bytes(path, start, end).decode("utf-8", errors="replace")
+
+    def size(self, path) -> int:
+        return os.path.getsize(path)
+
+    def handle(self, path) -> "ContextFile":
+        return ContextFile(self, os.fspath(path))
+
+    @property
+    def resident(self) -> int:
+        """Number of files currently mapped."""
+        with self._lock:
+            return len(self._maps)
+
+
+@dataclass(frozen=True)
+class ContextFile:
+    """A context file as seen through a store."""
+    store: ContextStore
+    path: str
+
+    @property
+    def digest(self) -> str:
+        return self.store.digest(self.path)
+
+    @property
+    def size(self) -> int:
+        return self.store.size(self.path)
+
+    def read(self, start: int = 0, end: int | None = None) -> str:
+        return self.store.read(self.path, start, end)
+
+    def read_bytes(self, start: int = 0, end: int | None = None) -> bytes:
+        return self.store.read_bytes(self.path, start, end)
+
+
+store = ContextStore()
@@ -0,0 +1,214 @@
+"""Structured fit assessments for le comptoir.
+
+The job block asks for a prose analysis through four lenses, which reads
+well in a chat but cannot be ranked, cached or charted. A structured
+assessment asks for the same analysis as a fixed JSON schema, through a
+forced call of the record_fit tool: a score and a note per lens, an overall
+score, the job's requirements the portfolio matches (with evidence), gaps,
+and the portfolio sections cited. The tool input is validated, and
+citations of sections the portfolio does not have are dropped.
+
+Assessments are stored on disk under the job id (see jobs.py), candidate,
+identity, language and context version (the digest of the portfolio file
+sent), so a different posting or an edited portfolio misses, and anything
+else is rendered again without a model call.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from chat import build_request, context_path, load_index
+from context_store import store
+from i18n import STRINGS
+from jobs import job_id
+
+FIT_DIR = Path(__file__).parent / "build" / "fits"
+FIT_VERSION = 2          # bump when the schema or question changes
+FIT_MAX_TOKENS = 1024    # room for the whole tool input, whatever the tier
+
+LENSES = ("recruiter", "hiring_manager", "honest_broker", "domain_bridging")
+
+_SCORE = {"type": "integer", "minimum": 0, "maximum": 10}
+FIT_TOOL = {
+    "name": "record_fit",
+    "description": "Record the candidate's fit for the job description under evaluation.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "lenses": {
+                "type": "object",
+                "description": "Score and one-sentence note for each of the four lenses.",
+                "properties": {lens: {"type": "object",
+                                      "properties": {"score": _SCORE, "note": {"type": "string"}},
+                                      "required": ["score", "note"]}
+                               for lens in LENSES},
+                "required": list(LENSES),
+            },
+            "overall": {**_SCORE, "description": "Overall fit."},
+            "matched_requirements": {
+                "type": "array",
+                "description": "Requirements of the job the portfolio shows evidence for.",
+                "items": {"type": "object",
+                          "properties": {"requirement": {"type": "string"},
+                                         "evidence": {"type": "string"},
+                                         "section": {"type": "string",
+                                                     "description": "Portfolio section title."}},
+                          "required": ["requirement", "evidence", "section"]},
+            },
+            "gaps": {"type": "array", "items": {"type": "string"},
+                     "description": "Requirements the portfolio does not cover."},
+            "cited_sections": {"type": "array", "items": {"type": "string"},
+                               "description": "Titles of the portfolio sections relied on."},
+        },
+        "required": ["lenses", "overall", "matched_requirements", "gaps", "cited_sections"],
+    },
+}
+
+
+@dataclass
+class FitAssessment:
+    overall: int
+    lenses: dict[str, dict]
+    matched_requirements: list[dict]
+    gaps: list[str]
+    cited_sections: list[str]
+
+    def summary(self) -> str:
+        """One line for tables: the matched requirements, then the gaps."""
+        matched = "; ".join(m["requirement"] for m in self.matched_requirements)
+        gaps = "; ".join(self.gaps)
+        return " / ".join(part for part in (f"+ {matched}" if matched else "",
+                                            f"- {gaps}" if gaps else "") if part)
+
+
+def section_titles(agent: dict) -> set[str]:
+    """Titles of the sections of a candidate's portfolio."""
+    return {chunk.section for chunk in load_index(context_path(agent)).chunks}
+
+
+def validate(data, sections: set[str]) -> FitAssessment:
+    """Check a record_fit input against the schema.
+
+    Section titles are matched case-insensitively against sections; unknown
+    ones are dropped from cited_sections and blanked in matched requirements.
+
+    Raises:
+        ValueError: If a field is missing or has the wrong type or range.
+    """
+    def score(value, where):
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 10:
+            raise ValueError(f"{where}: expected a score from 0 to 10, got {value!r}")
+        return round(value)
+
+    def strings(value, where):
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ValueError(f"{where}: expected a list of strings")
+        return [v.strip() for v in value if v.strip()]
+
+    if not isinstance(data, dict):
+        raise ValueError("expected an object")
+    missing = set(FIT_TOOL["input_schema"]["required"]) - data.keys()
+    if missing:
+        raise ValueError(f"missing {', '.join(sorted(missing))}")
+    if not isinstance(data["lenses"], dict):
+        raise ValueError("lenses: expected an object")
+    lenses = {}
+    for lens in LENSES:
+        entry = data["lenses"].get(lens)
+        if not isinstance(entry, dict) or not isinstance(entry.get("note"), str):
+            raise ValueError(f"lenses.{lens}: expected score and note")
+        lenses[lens] = {"score": score(entry.get("score"), f"lenses.{lens}.score"),
+                        "note": entry["note"].strip()}
+
+    known = {title.lower(): title for title in sections}
+    matched = []
+    if not isinstance(data["matched_requirements"], list):
+        raise ValueError("matched_requirements: expected a list")
+    for item in data["matched_requirements"]:
+        if not isinstance(item, dict) or not all(
+                isinstance(item.get(field), str) for field in ("requirement", "evidence")):
+            raise ValueError("matched_requirements: expected requirement and evidence")
+        section = item.get("section")
+        matched.append({"requirement": item["requirement"].strip(),
+                        "evidence": item["evidence"].strip(),
+                        "section": known.get(section.strip().lower(), "")
+                                   if isinstance(section, str) else ""})
+    cited = [known[s.lower()] for s in strings(data["cited_sections"], "cited_sections")
+             if s.lower() in known]
+    return FitAssessment(score(data["overall"], "overall"), lenses, matched,
+                         strings(data["gaps"], "gaps"), list(dict.fromkeys(cited)))
+
+
+def structured_request(agent: dict, identity: str, job_description: str,
+                       language: str) -> dict:
+    """A fit-analysis request that must answer with a record_fit call."""
+    question = STRINGS[language]["fit_record"].format(name=agent["name"].split()[0])
+    # The unlocked prompt: no brevity instruction, no compacted portfolio
+    request = build_request(agent, identity, [{"role": "user", "content": question}],
+                            job_description=job_description, language=language,
+                            unlocked=True)
+    request.update(max_tokens=FIT_MAX_TOKENS, tools=[FIT_TOOL],
+                   tool_choice={"type": "tool", "name": FIT_TOOL["name"]})
+    return request
+
+
+def from_message(message, sections: set[str]) -> FitAssessment:
+    """The validated record_fit input of a response.
+
+    Raises:
+        ValueError: If the response has no record_fit call or it is invalid.
+    """
+    for block in message.content:
+        if block.type == "tool_use" and block.name == FIT_TOOL["name"]:
+            return validate(block.input, sections)
+    raise ValueError("response has no record_fit call")
+
+
+def fit_key(job_description: str, agent_key: str, agent: dict, identity: str,
+            language: str) -> str:
+    """Store key: job id, candidate, identity, language, context version.
+
+    job_description is expected canonical (JobRegistry.register), so
+    reformatted copies of a posting share assessments.
+    """
+    parts = [FIT_VERSION, job_id(job_description), agent_key, identity, language,
+             store.digest(context_path(agent))]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+class FitStore:
+    """Assessments stored as JSON files keyed by fit_key, memoized in process."""
+
+    def __init__(self, path=FIT_DIR):
+        self.path = Path(path)
+        self._memo: dict[str, FitAssessment] = {}
+        self._lock = threading.Lock()
+
+    def _file(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> FitAssessment | None:
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        file = self._file(key)
+        if not file.exists():
+            return None
+        assessment = FitAssessment(**json.loads(file.read_text(encoding="utf-8"))["fit"])
+        with self._lock:
+            self._memo[key] = assessment
+        return assessment
+
+    def put(self, key: str, assessment: FitAssessment):
+        file = self._file(key)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"created": time.time(), "fit": asdict(assessment)},
+                                  ensure_ascii=False), encoding="utf-8")
+        tmp.replace(file)
+        with self._lock:
+            self._memo[key] = assessment
@@ -0,0 +1,320 @@
+"""Shared model gateway for le comptoir.
+
+Every Streamlit session used to open its own synchronous stream, so a room
+of workshop participants clicking the same suggestion sent that many
+identical requests at once, with nothing capping how many were in flight.
+The gateway runs one AsyncAnthropic client on a background event loop for
+the whole process and:
+
+  - caps upstream streams with a semaphore (MAX_CONCURRENT); further
+    requests wait in a queue of at most MAX_QUEUED, beyond which new
+    requests are refused with GatewayBusy,
+  - coalesces identical requests: while a request is in flight, the same
+    request from another session subscribes to its stream instead of
+    starting a new one, replaying what was already received.
+
+Callers consume a Flight from their own thread with text_stream().
+
+Transient failures (429, 5xx including 529 overloaded, connection errors)
+are retried with jittered exponential backoff, waiting at least as long as
+the server's retry-after, as long as no text has been received yet. A
+token bucket keeps the process under the API tier's request and input
+token rates, so bursts queue locally instead of turning into 429s. With
+HEDGE_FIRST_TOKEN, a request whose first token is slower than the recent
+p95 gets a second identical request, and whichever starts first is kept.
+"""
+import asyncio
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import AsyncExitStack
+
+import anthropic
+
+from response_cache import request_key
+from retrieval import estimate_tokens
+
+MAX_CONCURRENT = 8     # upstream streams open at once
+MAX_QUEUED = 32        # requests waiting for a slot before new ones are refused
+
+# Retries (the SDK's own retries are disabled so this is the only policy)
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0     # seconds, doubled per attempt
+BACKOFF_MAX = 20.0
+
+# API tier rate limits for the chat model
+REQUESTS_PER_MINUTE = 50
+INPUT_TOKENS_PER_MINUTE = 50_000
+
+# Hedged first token: off by default, since a hedge pays for a second prompt
+HEDGE_FIRST_TOKEN = False
+HEDGE_MIN_DELAY = 2.0  # seconds; used until enough first-token times are seen
+HEDGE_MIN_SAMPLES = 20
+
+
+class GatewayBusy(Exception):
+    """Raised when the queue is full; the caller should ask the visitor to retry."""
+
+
+def retryable(error: Exception) -> bool:
+    """Whether an API error is transient: rate limited, overloaded, a server
+    error or a dropped connection."""
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    return isinstance(error, anthropic.APIStatusError) and (
+        error.status_code == 429 or error.status_code >= 500)
+
+
+def backoff(attempt: int, error: Exception | None = None) -> float:
+    """Seconds to wait before retry number attempt (0-based): exponential
+    with full jitter, but never less than the server's retry-after."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    response = getattr(error, "response", None)
+    try:
+        retry_after = float(response.headers.get("retry-after", 0)) if response is not None else 0
+    except ValueError:
+        retry_after = 0
+    return max(delay, min(retry_after, BACKOFF_MAX * 3))
+
+
+class TokenBucket:
+    """Async token bucket: capacity units, refilled continuously over a minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.level = per_minute
+        self.rate = per_minute / 60
+        self.updated = time.monotonic()
+
+    async def acquire(self, amount: float = 1):
+        amount = min(amount, self.capacity)
+        while True:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.level >= amount:
+                self.level -= amount
+                return
+            await asyncio.sleep((amount - self.level) / self.rate)
+
+
+def request_tokens(request: dict) -> int:
+    """Input token estimate of a request (the cached prefix included, to
+    stay on the safe side)."""
+    system = "".join(block["text"] for block in request["system"])
+    return estimate_tokens(system) + sum(estimate_tokens(m["content"])
+                                         for m in request["messages"])
+
+
+class Flight:
+    """One upstream stream and everything received from it so far."""
+
+    def __init__(self, request: dict, queued: bool = True):
+        self.request = request
+        self.chunks: list[str] = []
+        self.usage = None
+        self.message = None     # the final message, once done
+        self.error: Exception | None = None
+        self.queued = queued    # still waiting for a concurrency slot
+        self.done = False
+        self.subscribers = 1
+        self._changed = threading.Condition()
+
+    def _update(self, **fields):
+        with self._changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self._changed.notify_all()
+
+    def _append(self, text: str):
+        with self._changed:
+            self.chunks.append(text)
+            self._changed.notify_all()
+
+    def text_stream(self):
+        """Yield the response text as it arrives, from the beginning.
+
+        Raises the upstream error, if any, once the text received before it
+        has been yielded.
+        """
+        sent = 0
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: len(self.chunks) > sent or self.done)
+                new = self.chunks[sent:]
+                finished = self.done
+            yield from new
+            sent += len(new)
+            if finished and sent == len(self.chunks):
+                break
+        if self.error is not None:
+            raise self.error
+
+    def result(self):
+        """Wait for the stream to end and return the final message (for
+        responses whose content is not only text, such as tool calls)."""
+        for _ in self.text_stream():
+            pass
+        return self.message
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+
+class Gateway:
+    """Process-wide async client with a concurrency cap and request coalescing."""
+
+    def __init__(self, client_factory=lambda: anthropic.AsyncAnthropic(max_retries=0),
+                 max_concurrent: int = MAX_CONCURRENT, max_queued: int = MAX_QUEUED,
+                 hedge: bool = HEDGE_FIRST_TOKEN):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.hedge = hedge
+        self._flights: dict[str, Flight] = {}
+        self._lock = threading.Lock()
+        self.first_token_times = deque(maxlen=500)
+        self.coalesced = 0
+        self.refused = 0
+        self.retries = 0
+        self.hedged = 0
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._client = client_factory()
+            self._slots = asyncio.Semaphore(max_concurrent)
+            self._requests = TokenBucket(REQUESTS_PER_MINUTE)
+            self._input_tokens = TokenBucket(INPUT_TOKENS_PER_MINUTE)
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, name="gateway", daemon=True).start()
+        ready.wait()
+
+    def stream(self, request: dict) -> tuple[Flight, bool]:
+        """Start (or join) the stream for a request.
+
+        Returns (flight, shared): shared is True when the request joined one
+        already in flight, whose usage is accounted by the session that
+        started it.
+
+        Raises:
+            GatewayBusy: If MAX_CONCURRENT requests are streaming and
+                MAX_QUEUED more are waiting.
+        """
+        key = request_key(request)
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.subscribers += 1
+                self.coalesced += 1
+                return flight, True
+            if len(self._flights) >= self.max_concurrent + self.max_queued:
+                self.refused += 1
+                raise GatewayBusy(f"{len(self._flights)} requests in flight")
+            # Every flight holds or waits for a slot, so the count says which.
+            queued = len(self._flights) >= self.max_concurrent
+            flight = self._flights[key] = Flight(request, queued)
+        asyncio.run_coroutine_threadsafe(self._run(key, flight), self._loop)
+        return flight, False
+
+    async def _run(self, key: str, flight: Flight):
+        try:
+            async with self._slots:
+                flight._update(queued=False)
+                for attempt in range(MAX_ATTEMPTS):
+                    try:
+                        stack, stream, text_stream, first = await self._first_token(
+                            flight.request)
+                        break
+                    except Exception as e:
+                        if attempt == MAX_ATTEMPTS - 1 or not retryable(e):
+                            raise
+                        delay = backoff(attempt, e)
+                        print(f"GATEWAY_RETRY: {type(e).__name__}, attempt {attempt + 1}, "
+                              f"waiting {delay:.1f}s")
+                        self.retries += 1
+                        await asyncio.sleep(delay)
+                async with stack:
+                    if first is not None:
+                        flight._append(first)
+                    async for text in text_stream:
+                        flight._append(text)
+                    message = await stream.get_final_message()
+            flight._update(usage=message.usage, message=message, done=True)
+        except Exception as e:
+            flight._update(error=e, done=True)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+    async def _open(self, request: dict):
+        """Open a stream and wait for its first text. The caller closes the
+        returned exit stack.
+
+        A forced tool call streams no text, so its wait lasts the whole
+        response and is not recorded as a time to first token.
+        """
+        await self._requests.acquire()
+        await self._input_tokens.acquire(request_tokens(request))
+        started = time.monotonic()
+        stack = AsyncExitStack()
+        try:
+            stream = await stack.enter_async_context(self._client.messages.stream(**request))
+            text_stream = stream.text_stream.__aiter__()
+            first = await anext(text_stream, None)
+        except BaseException:
+            await stack.aclose()
+            raise
+        if "tool_choice" not in request:
+            self.first_token_times.append(time.monotonic() - started)
+        return stack, stream, text_stream, first
+
+    def hedge_delay(self) -> float:
+        """Recent p95 time to first token, or HEDGE_MIN_DELAY until known."""
+        if len(self.first_token_times) < HEDGE_MIN_SAMPLES:
+            return HEDGE_MIN_DELAY
+        return max(HEDGE_MIN_DELAY,
+                   statistics.quantiles(self.first_token_times, n=20)[-1])
+
+    async def _first_token(self, request: dict):
+        """_open, hedged with a second request when the first is slow.
+
+        Forced tool calls are not hedged: they have no first token to race for.
+        """
+        if not self.hedge or "tool_choice" in request:
+            return await self._open(request)
+        primary = asyncio.create_task(self._open(request))
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay())
+        if done:
+            return primary.result()
+        self.hedged += 1
+        pending = {primary, asyncio.create_task(self._open(request))}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winners = [task for task in done if task.exception() is None]
+            error = error or next((task.exception() for task in done if task.exception()), None)
+            if winners:
+                for task in pending:
+                    task.cancel()
+                for task in winners[1:]:
+                    await task.result()[0].aclose()
+                return winners[0].result()
+        raise error
+
+    def stats(self) -> dict:
+        with self._lock:
+            queued = sum(f.queued for f in self._flights.values())
+            return {
+                "in_flight": len(self._flights) - queued,
+                "queued": queued,
+                "coalesced": self.coalesced,
+                "refused": self.refused,
+                "retries": self.retries,
+                "hedged": self.hedged,
+            }
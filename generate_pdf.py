@@ -2,12 +2,35 @@
 
 Uses fpdf2 (pure Python, no system dependencies) to produce
 a professional A4 document from the marketing plan content.
+
+Plan content is static per language, so built PDFs are cached by a hash of
+the content and renderer version: in-process, and optionally as files in an
+artifact directory shared across restarts and workers.
+
+Usage:
+    python generate_pdf.py                 # prerender every language
+    python generate_pdf.py --lang en fr    # prerender selected languages
 """
-import re
+import argparse
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+from pathlib import Path
 from fpdf import FPDF
 
-from marketing_plan import get_plan
+from markup import parse_plan
+from marketing_plan import PLAN, get_plan
+
+# Bump when the layout code changes so cached PDFs are rebuilt.
+RENDERER_VERSION = 2
+ARTIFACT_DIR = Path(__file__).parent / "build" / "pdf"
+MANIFEST_NAME = "manifest.json"
+
+_pdf_cache: dict[str, bytes] = {}
+_pdf_lock = threading.Lock()
 
 
 def _sanitize(text: str) -> str:
@@ -51,61 +74,42 @@ class MarketingPlanPDF(FPDF):
         self.cell(0, 10, _sanitize(f"le comptoir -- Page {self.page_no()}/{{nb}}"), align="C")
 
 
-def _render_body(pdf: MarketingPlanPDF, body: str):
-    """Render markdown-like body text into PDF cells."""
-    lines = body.split("\n")
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        stripped = line.strip()
+def _write_spans(pdf: MarketingPlanPDF, spans, size: int = 10, height: float = 5):
+    """Write styled spans as flowing text, wrapping at the current left margin."""
+    for span in spans:
+        style = ("B" if span.bold else "") + ("I" if span.italic else "")
+        pdf.set_font("Helvetica", style, size)
+        pdf.write(height, _sanitize(span.text))
 
-        if not stripped:
+
+def _render_body(pdf: MarketingPlanPDF, blocks):
+    """Render parsed body blocks into the PDF."""
+    for block in blocks:
+        if block.kind == "blank":
             pdf.ln(3)
-            i += 1
-            continue
 
-        # Bold header: **text**
-        bold_match = re.match(r'^\*\*(.+?)\*\*\s*$', stripped)
-        if bold_match:
+        elif block.kind == "header":
             pdf.ln(3)
             pdf.set_font("Helvetica", "B", 11)
             pdf.set_text_color(50, 50, 50)
-            pdf.cell(0, 6, _sanitize(bold_match.group(1)), new_x="LMARGIN", new_y="NEXT")
+            pdf.cell(0, 6, _sanitize(block.text), new_x="LMARGIN", new_y="NEXT")
             pdf.ln(1)
-            i += 1
-            continue
-
-        # Bullet point: - text (may contain **bold** inline)
-        if stripped.startswith("- "):
-            bullet_text = stripped[2:]
-            # Strip inline bold markers for PDF
-            bullet_text = re.sub(r'\*\*(.+?)\*\*', r'\1', bullet_text)
-            bullet_text = re.sub(r'\*(.+?)\*', r'\1', bullet_text)
+
+        elif block.kind == "bullet":
             pdf.set_font("Helvetica", "", 10)
             pdf.set_text_color(30, 30, 30)
             pdf.cell(8, 5, "-", new_x="END")
-            pdf.multi_cell(0, 5, _sanitize(bullet_text), new_x="LMARGIN", new_y="NEXT")
-            i += 1
-            continue
-
-        # Regular paragraph — may span multiple lines until blank line
-        para_lines = []
-        while i < len(lines) and lines[i].strip() and not lines[i].strip().startswith("- ") and not re.match(r'^\*\*(.+?)\*\*\s*$', lines[i].strip()):
-            para_text = lines[i].strip()
-            # Strip markdown formatting
-            para_text = re.sub(r'\*\*(.+?)\*\*', r'\1', para_text)
-            para_text = re.sub(r'\*(.+?)\*', r'\1', para_text)
-            para_lines.append(para_text)
-            i += 1
-
-        if para_lines:
-            pdf.set_font("Helvetica", "", 10)
+            margin = pdf.l_margin
+            pdf.set_left_margin(pdf.get_x())  # hang wrapped lines under the text
+            _write_spans(pdf, block.spans)
+            pdf.set_left_margin(margin)
+            pdf.ln(5)
+
+        else:
             pdf.set_text_color(30, 30, 30)
-            pdf.multi_cell(0, 5, _sanitize(" ".join(para_lines)), new_x="LMARGIN", new_y="NEXT")
+            _write_spans(pdf, block.spans)
+            pdf.ln(5)
             pdf.ln(2)
-            continue
-
-        i += 1
 
 
 def generate_marketing_plan_pdf(lang: str = "en") -> bytes:
@@ -113,7 +117,7 @@ def generate_marketing_plan_pdf(lang: str = "en") -> bytes:
 
     Returns PDF content as bytes.
     """
-    plan = get_plan(lang)
+    plan = parse_plan(lang)
 
     pdf = MarketingPlanPDF(plan)
     pdf.alias_nb_pages()
@@ -145,10 +149,94 @@ def generate_marketing_plan_pdf(lang: str = "en") -> bytes:
         pdf.ln(2)
 
         # Section body
-        _render_body(pdf, section["body"])
+        _render_body(pdf, section["blocks"])
         pdf.ln(4)
 
     # Output
     buf = BytesIO()
     pdf.output(buf)
     return buf.getvalue()
+
+
+def plan_hash(lang: str = "en") -> str:
+    """Short hash identifying a language's plan content and renderer version."""
+    payload = json.dumps([RENDERER_VERSION, get_plan(lang)], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def get_marketing_plan_pdf(lang: str = "en", cache_dir=None) -> bytes:
+    """Return the marketing plan PDF, building it only once per content version.
+
+    Args:
+        lang: Language code.
+        cache_dir: Optional directory of PDF artifacts, read before building
+            and written after.
+    """
+    key = f"{lang}-{plan_hash(lang)}"
+    with _pdf_lock:
+        if key in _pdf_cache:
+            return _pdf_cache[key]
+
+        path = Path(cache_dir) / artifact_name(lang) if cache_dir else None
+        if path is not None and path.exists():
+            pdf_bytes = path.read_bytes()
+        else:
+            pdf_bytes = generate_marketing_plan_pdf(lang)
+            if path is not None:
+                _write_atomic(path, pdf_bytes)
+        _pdf_cache[key] = pdf_bytes
+        return pdf_bytes
+
+
+def artifact_name(lang: str = "en") -> str:
+    """File name of a prerendered PDF, versioned by content hash."""
+    return f"marketing-plan-{lang}-{plan_hash(lang)}.pdf"
+
+
+def _write_atomic(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+def _prerender_one(lang: str, out_dir: str) -> dict:
+    path = Path(out_dir) / artifact_name(lang)
+    if not path.exists():
+        _write_atomic(path, generate_marketing_plan_pdf(lang))
+    return {"lang": lang, "hash": plan_hash(lang), "file": path.name,
+            "bytes": path.stat().st_size}
+
+
+def prerender(out_dir=ARTIFACT_DIR, langs=None, workers=None) -> dict:
+    """Render plan PDFs in parallel into out_dir and write a manifest.
+
+    Artifacts whose content hash is already on disk are kept as they are, and
+    entries for languages not rendered this time stay in the manifest.
+    Returns the manifest.
+    """
+    langs = list(langs or PLAN)
+    out_dir = Path(out_dir)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        entries = list(pool.map(_prerender_one, langs, [str(out_dir)] * len(langs)))
+    manifest_path = out_dir / MANIFEST_NAME
+    manifest = {"renderer_version": RENDERER_VERSION, "plans": {}}
+    if manifest_path.exists():
+        previous = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if previous.get("renderer_version") == RENDERER_VERSION:
+            manifest["plans"] = previous.get("plans", {})
+    manifest["plans"].update({entry.pop("lang"): entry for entry in entries})
+    _write_atomic(manifest_path,
+                  json.dumps(manifest, indent=2).encode("utf-8"))
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prerender marketing plan PDFs.")
+    parser.add_argument("--out", default=str(ARTIFACT_DIR), help="artifact directory")
+    parser.add_argument("--lang", nargs="*", choices=sorted(PLAN), help="languages (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    args = parser.parse_args()
+    manifest = prerender(args.out, args.lang, args.workers)
+    for lang, entry in manifest["plans"].items():
+        print(f"{lang}: {entry['file']} ({entry['bytes']:,} bytes)")
@@ -0,0 +1,104 @@
+"""Conversation history compaction for le comptoir.
+
+Sending the whole transcript on every turn makes late questions in a long
+session far more expensive than early ones. The history manager keeps the
+most recent turns verbatim and folds older turns into a running summary that
+rides along in the system prompt. Summaries are written by a background
+thread after a turn completes, so the visitor never waits on them.
+"""
+import threading
+
+from retrieval import estimate_tokens
+
+KEEP_TURNS = 4               # most recent question/answer pairs sent verbatim
+TOKEN_BUDGET = 3_000         # verbatim history size that triggers a fold
+SUMMARY_MAX_TOKENS = 400
+
+SUMMARY_SYSTEM = """\
+You maintain a running summary of a conversation between a visitor and an \
+assistant who discusses a job candidate's portfolio. Merge the previous \
+summary and the new exchanges into one compact summary of at most 200 words. \
+Keep what the visitor asked about, what they seem to care about (role, \
+domain, concerns), and the specific projects, facts and gaps the assistant \
+mentioned. Write it in English, as plain prose, with no preamble."""
+
+
+class HistoryManager:
+    """Running summary of the older part of one session's transcript.
+
+    The transcript itself stays in the caller's message list; the manager
+    only tracks how many leading messages have been folded into the summary.
+    """
+
+    def __init__(self, keep_turns: int = KEEP_TURNS, token_budget: int = TOKEN_BUDGET):
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.summary = ""
+        self.summarized = 0
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+
+    def context(self, messages: list[dict]) -> tuple[str, list[dict]]:
+        """Summary and verbatim messages to send for the next request.
+
+        If folding has fallen behind, the oldest unsummarized turns beyond
+        the keep window are dropped so the request stays within budget.
+        """
+        with self._lock:
+            summary, start = self.summary, self.summarized
+        recent = messages[start:]
+        keep_from = self._cut(recent)
+        if keep_from and _tokens(recent) > 2 * self.token_budget:
+            recent = recent[keep_from:]
+        return summary, recent
+
+    def compact_async(self, client, model: str, messages: list[dict], on_usage=None):
+        """Fold older turns into the summary in the background, if needed.
+
+        on_usage, if given, is called with the summary call's API usage block.
+        """
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            start = self.summarized
+            recent = messages[start:]
+            cut = self._cut(recent)
+            if not cut or _tokens(recent) <= self.token_budget:
+                return
+            self._worker = threading.Thread(
+                target=self._fold, args=(client, model, recent[:cut], start + cut, on_usage),
+                daemon=True,
+            )
+            self._worker.start()
+
+    def _cut(self, recent: list[dict]) -> int:
+        """Index in recent where the verbatim window starts (0 if all kept)."""
+        user_turns = [i for i, m in enumerate(recent) if m["role"] == "user"]
+        if len(user_turns) <= self.keep_turns:
+            return 0
+        return user_turns[-self.keep_turns]
+
+    def _fold(self, client, model: str, older: list[dict], summarized: int, on_usage):
+        transcript = "\n\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in older)
+        prompt = (f"Previous summary:\n{self.summary or '(none)'}\n\n"
+                  f"New exchanges:\n{transcript}")
+        try:
+            response = client.messages.create(
+                model=model,
+                max_tokens=SUMMARY_MAX_TOKENS,
+                system=SUMMARY_SYSTEM,
+                messages=[{"role": "user", "content": prompt}],
+            )
+        except Exception as e:
+            print(f"HISTORY_SUMMARY_FAILED: {e}")
+            return
+        if on_usage is not None:
+            on_usage(response.usage)
+        summary = "".join(block.text for block in response.content if block.type == "text")
+        with self._lock:
+            self.summary = summary.strip()
+            self.summarized = summarized
+
+
+def _tokens(messages: list[dict]) -> int:
+    return sum(estimate_tokens(m["content"]) for m in messages)
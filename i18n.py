@@ -31,6 +31,28 @@ STRINGS = {
         "job_placeholder": "Paste the job description here...",
         "job_url_placeholder": "https://...",
         "job_fetching": "Fetching...",
+        "job_pick": "Posting",
+        "tab_match": "Roster match",
+        "match_intro": "Score this job description against every candidate on the roster.",
+        "match_button": "Match the roster",
+        "match_empty": "No candidate's portfolio overlaps enough with this job description.",
+        "match_columns": ["Candidate", "Identity", "Fit (/10)", "Overlap", "Assessment"],
+        "fit_question": (
+            "Rate {name}'s fit for this role. Start with 'Score: N/10', then give "
+            "the strongest match and the main gap in one sentence each."
+        ),
+        "fit_record": (
+            "Assess {name}'s fit for this role through the four lenses and record "
+            "it with the record_fit tool. Cite portfolio sections by their exact titles."
+        ),
+        "fit_narrative": "Walk me through {name}'s fit for this role, lens by lens.",
+        "match_detail": "Details",
+        "match_lenses": {"recruiter": "Recruiter scan", "hiring_manager": "Hiring manager",
+                         "honest_broker": "Honest broker", "domain_bridging": "Domain bridging"},
+        "match_matched": "Matched requirements",
+        "match_gaps": "Gaps",
+        "match_sections": "Cited sections",
+        "match_narrative_button": "Write the full analysis",
         "try_asking": "**Try asking:**",
         "chat_placeholder": "Ask about {name}'s work...",
         "remaining": "{n} free question{s} remaining",
@@ -43,7 +65,10 @@ STRINGS = {
             "*le comptoir* — AI agents who know these professionals' work. "
             "Answers are grounded in actual portfolios."
         ),
-        "cost_label": "Est. cost this session: ${cost:.2f}",
+        "cost_label": "Cost this session: ${cost:.3f}",
+        "usage_label": "{prompt:,} input tokens ({cached:.0%} cached), {output:,} output",
+        "busy": "Lots of visitors right now. Please ask again in a moment.",
+        "queued": "Waiting for a free slot...",
         "unlock_heading": "Want deeper answers?",
         "unlock_body": (
             "You've used your {n} free preview questions. "
@@ -97,6 +122,29 @@ STRINGS = {
         "job_placeholder": "Collez la description du poste ici...",
         "job_url_placeholder": "https://...",
         "job_fetching": "Chargement...",
+        "job_pick": "Offre",
+        "tab_match": "Comparer l'équipe",
+        "match_intro": "Évaluez cette offre d'emploi pour chaque candidat de l'agence.",
+        "match_button": "Comparer tous les candidats",
+        "match_empty": "Aucun portfolio ne recoupe suffisamment cette offre d'emploi.",
+        "match_columns": ["Candidat", "Identité", "Adéquation (/10)", "Recoupement", "Évaluation"],
+        "fit_question": (
+            "Évaluez l'adéquation de {name} à ce poste. Commencez par 'Score: N/10', "
+            "puis donnez le point fort principal et la principale lacune en une phrase chacun."
+        ),
+        "fit_record": (
+            "Évaluez l'adéquation de {name} à ce poste selon les quatre angles et "
+            "enregistrez-la avec l'outil record_fit. Citez les sections du portfolio "
+            "par leur titre exact."
+        ),
+        "fit_narrative": "Détaillez l'adéquation de {name} à ce poste, angle par angle.",
+        "match_detail": "Détails",
+        "match_lenses": {"recruiter": "Tri du recruteur", "hiring_manager": "Responsable du recrutement",
+                         "honest_broker": "Regard honnête", "domain_bridging": "Passerelles entre domaines"},
+        "match_matched": "Exigences satisfaites",
+        "match_gaps": "Lacunes",
+        "match_sections": "Sections citées",
+        "match_narrative_button": "Rédiger l'analyse complète",
         "try_asking": "**Essayez de demander :**",
         "chat_placeholder": "Posez une question sur le travail de {name}...",
         "remaining": "{n} question{s} gratuite{s} restante{s}",
@@ -109,7 +157,10 @@ STRINGS = {
             "*le comptoir* — des agents IA qui connaissent le travail de ces professionnels. "
             "Les réponses sont fondées sur leurs portfolios."
         ),
-        "cost_label": "Coût estimé de la session : ${cost:.2f}",
+        "cost_label": "Coût de la session : ${cost:.3f}",
+        "usage_label": "{prompt:,} jetons en entrée ({cached:.0%} en cache), {output:,} en sortie",
+        "busy": "Beaucoup de visiteurs en ce moment. Merci de reposer votre question dans un instant.",
+        "queued": "En attente d'une place libre...",
         "unlock_heading": "Envie de réponses plus détaillées ?",
         "unlock_body": (
             "Vous avez utilisé vos {n} questions d'aperçu gratuites. "
@@ -163,6 +214,30 @@ STRINGS = {
         "job_placeholder": "Stellenbeschreibung hier einfügen...",
         "job_url_placeholder": "https://...",
         "job_fetching": "Wird geladen...",
+        "job_pick": "Stelle",
+        "tab_match": "Alle vergleichen",
+        "match_intro": "Bewerten Sie diese Stellenbeschreibung für alle Kandidaten der Agentur.",
+        "match_button": "Alle Kandidaten vergleichen",
+        "match_empty": "Kein Portfolio überschneidet sich ausreichend mit dieser Stelle.",
+        "match_columns": ["Kandidat", "Identität", "Eignung (/10)", "Überschneidung", "Einschätzung"],
+        "fit_question": (
+            "Bewerten Sie, wie gut {name} zu dieser Stelle passt. Beginnen Sie mit "
+            "'Score: N/10' und nennen Sie dann die grösste Stärke und die wichtigste "
+            "Lücke in je einem Satz."
+        ),
+        "fit_record": (
+            "Bewerten Sie anhand der vier Perspektiven, wie gut {name} zu dieser Stelle "
+            "passt, und erfassen Sie es mit dem Werkzeug record_fit. Zitieren Sie "
+            "Portfolio-Abschnitte mit ihrem genauen Titel."
+        ),
+        "fit_narrative": "Erläutern Sie Perspektive für Perspektive, wie gut {name} zu dieser Stelle passt.",
+        "match_detail": "Details",
+        "match_lenses": {"recruiter": "Recruiter-Blick", "hiring_manager": "Fachvorgesetzte",
+                         "honest_broker": "Ehrliche Einschätzung", "domain_bridging": "Brücken zwischen Bereichen"},
+        "match_matched": "Erfüllte Anforderungen",
+        "match_gaps": "Lücken",
+        "match_sections": "Zitierte Abschnitte",
+        "match_narrative_button": "Vollständige Analyse verfassen",
         "try_asking": "**Probieren Sie zu fragen:**",
         "chat_placeholder": "Fragen Sie nach {name}s Arbeit...",
         "remaining": "{n} kostenlose Frage{n_de} übrig",
@@ -175,7 +250,10 @@ STRINGS = {
             "*le comptoir* — KI-Agenten, die die Arbeit dieser Fachleute kennen. "
             "Antworten basieren auf echten Portfolios."
         ),
-        "cost_label": "Geschätzte Kosten dieser Sitzung: ${cost:.2f}",
+        "cost_label": "Kosten dieser Sitzung: ${cost:.3f}",
+        "usage_label": "{prompt:,} Eingabe-Tokens ({cached:.0%} aus dem Cache), {output:,} Ausgabe",
+        "busy": "Gerade sind sehr viele Besucher hier. Bitte fragen Sie gleich noch einmal.",
+        "queued": "Warte auf einen freien Platz...",
         "unlock_heading": "Möchten Sie ausführlichere Antworten?",
         "unlock_body": (
             "Sie haben Ihre {n} kostenlosen Vorschau-Fragen aufgebraucht. "
@@ -0,0 +1,221 @@
+"""Job description ingestion for le comptoir.
+
+The same posting arrives pasted from LinkedIn, fetched from the company
+site or copied from a job board, each with its own whitespace, bullets and
+page chrome, so anything keyed on the raw text misses. Postings are first
+canonicalized: Unicode and punctuation normalized, the text split into one
+sentence or line per row, and cookie banners, equal-opportunity footers
+and job-board chrome ("Apply now", "123 applicants") dropped. Copies that
+differ only in formatting then have identical canonical text, hence the
+same id, and the response cache, request coalescing, prompt cache prefixes
+and stored fit assessments all hit.
+
+The canonical text is also fingerprinted with MinHash over word shingles,
+and a posting whose estimated Jaccard similarity to one already registered
+reaches THRESHOLD is reported as a near duplicate of it. It keeps its own
+text and id: a near duplicate can still differ in seniority, location or
+salary, so it is only used to skip repeats (batch_match.py).
+
+The ids and signatures of the last MAX_JOBS postings are kept in a JSONL
+file, so near duplicates are found across restarts and by batch_match.py;
+posting texts are not stored.
+"""
+import base64
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+REGISTRY_PATH = Path(__file__).parent / "build" / "jobs" / "registry.jsonl"
+NUM_PERM = 128         # MinHash signature length
+BANDS = 32             # locality-sensitive hashing bands of NUM_PERM // BANDS rows
+SHINGLE = 3            # words per shingle
+THRESHOLD = 0.8        # estimated Jaccard similarity for a near duplicate
+CHROME_CHARS = 80      # only rows this short can be page chrome
+MAX_JOBS = 10_000      # postings remembered; the file is compacted at twice that
+
+PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240611)
+_A = _rng.integers(1, PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, PRIME, NUM_PERM, dtype=np.uint64)
+
+PUNCTUATION = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"',
+                             "\u2010": "-", "–": "-", "—": "-", "−": "-", "…": "...",
+                             "\u200b": None, "\u200c": None, "\u200d": None, "\ufeff": None})
+# Rows: lines, sentences, inline bullets (pages flattened by url_fetch) and footers
+SEGMENT_RE = re.compile(r"\n+|(?<=[.!?])\s+(?=[A-ZÀ-Ý])|\s+[•▪●‣⁃]\s+|\s+(?=©)")
+BULLET_RE = re.compile(r"^(?:[-*•·▪●‣⁃>]+|\d+[.)])\s+")
+WORD_RE = re.compile(r"\w+")
+# Boilerplate statements, dropped when a row opens with one. Matching the
+# whole statement, not a phrase, keeps requirements that mention the topic
+# ("Experience with equal opportunity reporting", "Draft the privacy policy").
+BOILERPLATE_RE = re.compile("^(?:" + "|".join([
+    r"(we|this (web)?site|our (web)?site) uses? cookies\b",
+    r"by (continuing|clicking|using)\b.*\bcookies\b",
+    r"(we are|[\w&.,' -]+ is) (an? )?(proud )?equal (employment )?opportunity"
+    r"( and affirmative action)? employer\b",
+    r"all qualified applicants (will )?receive consideration\b",
+    r"(all )?(qualified )?applicants (are|will be) considered\b.*\bregardless of\b",
+    r"(if you (need|require)|applicants (who need|requiring)) (a )?reasonable accommodation\b",
+    r"([\w&.,' -]+ )?participates in e-verify\b",
+    r"(nous sommes|[\w&.' -]+ est) un employeur\b.*\bégalité des chances\b",
+    r"toutes les candidatures\b.*\bsans distinction\b",
+    r"wir (sind ein|freuen uns über)\b.*\b(chancengleichheit|unabhängig von)\b",
+]) + ")", re.IGNORECASE)
+# Job-board and site chrome, dropped when it is the whole row
+CHROME_RE = re.compile("^(?:" + "|".join([
+    r"(easy )?apply( now| for this job)?", r"(save|share|report)( this)? job",
+    r"show (more|less)", r"see (more|less|who applied)", r"(sign|log) in( to apply)?",
+    r"join now", r"(re)?posted \d+ (minutes?|hours?|days?|weeks?|months?) ago",
+    r"(over )?\d+ applicants?", r"promoted", r"actively (recruiting|hiring)",
+    r"about the (job|company)", r"skip to (main )?content",
+    r"privacy (policy|notice)", r"terms (of (use|service)|and conditions)",
+    r"cookie (policy|settings)", r"all rights reserved", r"©.*",
+    r"(jetzt )?bewerben", r"postuler( maintenant)?", r"candidature simplifiée",
+    r"datenschutz(erklärung|hinweise)?", r"politique de confidentialité",
+    r"mentions légales", r"impressum",
+]) + r")[.!:]?$", re.IGNORECASE)
+
+def canonicalize(text: str) -> str:
+    """Normalized posting text, one sentence or line per row, boilerplate removed."""
+    text = unicodedata.normalize("NFKC", text).translate(PUNCTUATION)
+    rows, seen = [], set()
+    for segment in SEGMENT_RE.split(text):
+        row = " ".join(BULLET_RE.sub("", segment.strip()).split())
+        key = row.lower()
+        if (not WORD_RE.search(row) or key in seen or BOILERPLATE_RE.match(row)
+                or (len(row) <= CHROME_CHARS and CHROME_RE.match(row))):
+            continue
+        seen.add(key)
+        rows.append(row)
+    return "\n".join(rows)
+
+
+def job_id(canonical: str) -> str:
+    """Id of a canonical posting text."""
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def signature(canonical: str) -> np.ndarray:
+    """MinHash signature of the text's word shingles."""
+    words = WORD_RE.findall(canonical.lower())
+    shingles = {" ".join(words[i:i + SHINGLE])
+                for i in range(max(len(words) - SHINGLE + 1, 1))}
+    hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles], dtype=np.uint64)
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % PRIME).min(axis=1)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+@dataclass(frozen=True)
+class Job:
+    id: str
+    text: str
+    known: bool                      # the same canonical posting was registered before
+    duplicate_of: str | None = None  # id of a registered near duplicate
+
+
+class JobRegistry:
+    """Registered postings' fingerprints, for finding near duplicates.
+
+    Only the last max_jobs postings are remembered, in memory and on disk.
+    """
+
+    def __init__(self, path=REGISTRY_PATH, threshold: float = THRESHOLD,
+                 max_jobs: int = MAX_JOBS):
+        self.path = Path(path) if path else None
+        self.threshold = threshold
+        self.max_jobs = max_jobs
+        self.signatures: dict[str, np.ndarray] = {}    # id -> signature, oldest first
+        self.duplicates: dict[str, str] = {}           # id -> near-duplicate id
+        self.bands: dict[tuple, list[str]] = {}
+        self._lines = 0
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            for line in self.path.read_text(encoding="utf-8").splitlines():
+                entry = json.loads(line)
+                sig = np.frombuffer(base64.b64decode(entry["sig"]), dtype=np.uint32)
+                self._add(entry["id"], sig.astype(np.uint64), entry.get("of"))
+                self._lines += 1
+
+    def _band_keys(self, sig: np.ndarray):
+        rows = NUM_PERM // BANDS
+        for band in range(BANDS):
+            yield band, sig[band * rows:(band + 1) * rows].tobytes()
+
+    def _add(self, jid: str, sig: np.ndarray, duplicate_of: str | None):
+        self._remove(jid)
+        self.signatures[jid] = sig
+        if duplicate_of is not None:
+            self.duplicates[jid] = duplicate_of
+        for key in self._band_keys(sig):
+            self.bands.setdefault(key, []).append(jid)
+        while len(self.signatures) > self.max_jobs:
+            self._remove(next(iter(self.signatures)))
+
+    def _remove(self, jid: str):
+        sig = self.signatures.pop(jid, None)
+        self.duplicates.pop(jid, None)
+        if sig is None:
+            return
+        for key in self._band_keys(sig):
+            self.bands[key].remove(jid)
+            if not self.bands[key]:
+                del self.bands[key]
+
+    def _entry(self, jid: str) -> str:
+        sig = base64.b64encode(self.signatures[jid].astype(np.uint32).tobytes()).decode("ascii")
+        entry = {"id": jid, "sig": sig}
+        if jid in self.duplicates:
+            entry["of"] = self.duplicates[jid]
+        return json.dumps(entry) + "\n"
+
+    def _save(self, jid: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self._lines + 1 > 2 * self.max_jobs:
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text("".join(self._entry(j) for j in self.signatures), encoding="utf-8")
+            tmp.replace(self.path)
+            self._lines = len(self.signatures)
+        else:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(self._entry(jid))
+            self._lines += 1
+
+    def register(self, text: str) -> Job:
+        """The canonical posting for a job description, registering it if new.
+
+        The returned text is always the description's own canonical text;
+        a near duplicate is only reported in duplicate_of.
+        """
+        canonical = canonicalize(text)
+        if not canonical:
+            return Job("", "", False)
+        jid = job_id(canonical)
+        with self._lock:
+            if jid in self.signatures:
+                return Job(jid, canonical, True, self.duplicates.get(jid))
+        sig = signature(canonical)
+        with self._lock:
+            if jid in self.signatures:
+                return Job(jid, canonical, True, self.duplicates.get(jid))
+            candidates = {other for key in self._band_keys(sig)
+                          for other in self.bands.get(key, ())}
+            scored = [(similarity(sig, self.signatures[other]), other) for other in candidates]
+            best = max(scored, default=(0.0, None))
+            duplicate_of = None
+            if best[0] >= self.threshold:
+                duplicate_of = self.duplicates.get(best[1], best[1])
+            self._add(jid, sig, duplicate_of)
+            if self.path is not None:
+                self._save(jid)
+        return Job(jid, canonical, False, duplicate_of)
@@ -0,0 +1,205 @@
+"""Load test for le comptoir against the local mock API.
+
+Simulates concurrent visitors running scripted sessions: pick a candidate,
+optionally fetch a job posting by URL, ask example questions, switch
+professional identity halfway and ask more. Sessions go either through the
+shared gateway (the app's request path without Streamlit: fast, for
+throughput and latency) or through Streamlit's AppTest (the whole app, for
+per-session memory and page time). The mock API (mock_api.py) is started
+in-process unless --base-url points elsewhere; no real API calls are made.
+In apptest mode the app's response cache, job registry, fit store, usage
+ledger and traces go to a temporary directory (COMPTOIR_STATE_DIR), so the
+mock's filler answers never reach the stores real visitors are served from.
+
+Reports turns per second, p50/p95/p99 time to first token and turn time,
+errors, and traced memory per session.
+
+Usage:
+    python loadtest.py --visitors 50 --turns 4
+    python loadtest.py --mode apptest --visitors 5 --ttft 0.2
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import anthropic
+
+import gateway
+import mock_api
+from chat import build_request
+from history import HistoryManager
+from i18n import STRINGS
+from roster import AGENTS
+from url_fetch import fetch_url_text
+
+APP_PATH = Path(__file__).parent / "app.py"
+JOB_URL_RATE = 0.3     # fraction of sessions that analyze a job URL
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    values = sorted(values)
+    pick = lambda q: round(values[min(len(values) - 1, int(q * len(values)))], 4)
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+def script(rng: random.Random, turns: int, base_url: str) -> dict:
+    """A visitor's session: candidate, language, identities, job URL, questions."""
+    key = rng.choice(list(AGENTS))
+    agent = AGENTS[key]
+    lang = rng.choice(list(STRINGS))
+    name = agent["name"].split()[0]
+    questions = [q.format(name=name) for q in STRINGS[lang]["example_questions"]]
+    identities = list(agent["identities"])
+    return {
+        "agent": key,
+        "language": lang,
+        "identities": [agent["default_identity"], rng.choice(identities)],
+        "job_url": f"{base_url}/job" if rng.random() < JOB_URL_RATE else "",
+        "questions": [rng.choice(questions) for _ in range(turns)],
+    }
+
+
+class Results:
+    def __init__(self):
+        self.ttft: list[float] = []
+        self.turns: list[float] = []
+        self.errors: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def turn(self, ttft: float | None, duration: float):
+        with self._lock:
+            if ttft is not None:
+                self.ttft.append(ttft)
+            self.turns.append(duration)
+
+    def error(self, e: Exception):
+        with self._lock:
+            self.errors[type(e).__name__] = self.errors.get(type(e).__name__, 0) + 1
+
+
+def gateway_session(gw: gateway.Gateway, plan: dict, results: Results) -> list:
+    """Run a session through the gateway; returns its state, kept for memory."""
+    agent = AGENTS[plan["agent"]]
+    job = fetch_url_text(plan["job_url"]) if plan["job_url"] else ""
+    messages, history = [], HistoryManager()
+    for i, question in enumerate(plan["questions"]):
+        identity = plan["identities"][i * 2 // len(plan["questions"])]
+        messages.append({"role": "user", "content": question})
+        summary, recent = history.context(messages)
+        start = time.perf_counter()
+        ttft = None
+        try:
+            request = build_request(agent, identity, recent, job_description=job,
+                                    language=plan["language"], history_summary=summary)
+            flight, _ = gw.stream(request)
+            for chunk in flight.text_stream():
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+        except Exception as e:
+            results.error(e)
+            messages.pop()
+            continue
+        results.turn(ttft, time.perf_counter() - start)
+        messages.append({"role": "assistant", "content": flight.text})
+    return [messages, history]
+
+
+def apptest_session(plan: dict, results: Results):
+    """Run a session through the whole Streamlit app; returns the AppTest."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP_PATH), default_timeout=120)
+    at.run()
+    at.selectbox(key="_agent_select").set_value(plan["agent"]).run()
+    at.sidebar.selectbox[0].set_value(plan["language"]).run()
+    if plan["job_url"]:
+        at.sidebar.radio[0].set_value(at.sidebar.radio[0].options[2]).run()
+        at.sidebar.text_input[0].set_value(plan["job_url"]).run()
+    for i, question in enumerate(plan["questions"]):
+        identity = plan["identities"][i * 2 // len(plan["questions"])]
+        at.sidebar.selectbox[2].set_value(identity)
+        start = time.perf_counter()
+        at.chat_input[0].set_value(question).run()
+        for e in list(at.exception) + list(at.error):
+            results.error(RuntimeError(str(e.value)[:80]))
+        results.turn(None, time.perf_counter() - start)
+    return at
+
+
+def run(args) -> dict:
+    base_url = args.base_url
+    state = None
+    if base_url is None:
+        state = mock_api.MockState(args.ttft, args.tokens_per_second, args.output_tokens,
+                                   args.error_rate)
+        server = mock_api.serve(state, port=0)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["ANTHROPIC_BASE_URL"] = base_url
+    os.environ.setdefault("ANTHROPIC_API_KEY", "mock")
+    if not args.tier_limits:
+        gateway.REQUESTS_PER_MINUTE = gateway.INPUT_TOKENS_PER_MINUTE = float("inf")
+    if args.mode == "apptest":
+        state_dir = tempfile.TemporaryDirectory(prefix="loadtest-")
+        os.environ["COMPTOIR_STATE_DIR"] = state_dir.name
+
+    rng = random.Random(args.seed)
+    plans = [script(rng, args.turns, base_url) for _ in range(args.visitors)]
+    results = Results()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.visitors) as pool:
+        if args.mode == "gateway":
+            gw = gateway.Gateway(lambda: anthropic.AsyncAnthropic(base_url=base_url,
+                                                                   max_retries=0))
+            sessions = list(pool.map(lambda p: gateway_session(gw, p, results), plans))
+        else:
+            sessions = list(pool.map(lambda p: apptest_session(p, results), plans))
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    if args.mode == "apptest":
+        state_dir.cleanup()
+
+    report = {
+        "mode": args.mode,
+        "visitors": args.visitors,
+        "turns": len(results.turns),
+        "seconds": round(elapsed, 2),
+        "turns_per_second": round(len(results.turns) / elapsed, 2),
+        "ttft": percentiles(results.ttft),
+        "turn": percentiles(results.turns),
+        "errors": results.errors,
+        "memory_per_session_kb": round(memory / max(len(sessions), 1) / 1024, 1),
+    }
+    if args.mode == "gateway":
+        report["gateway"] = gw.stats()
+    if state is not None:
+        report["upstream_requests"] = state.requests
+        report["injected_errors"] = state.errors
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test against the mock API.")
+    parser.add_argument("--mode", choices=["gateway", "apptest"], default="gateway")
+    parser.add_argument("--visitors", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-url", help="use a running API stand-in instead of starting one")
+    parser.add_argument("--ttft", type=float, default=mock_api.TTFT)
+    parser.add_argument("--tokens-per-second", type=float, default=mock_api.TOKENS_PER_SECOND)
+    parser.add_argument("--output-tokens", type=int, default=mock_api.OUTPUT_TOKENS)
+    parser.add_argument("--error-rate", type=float, default=mock_api.ERROR_RATE)
+    parser.add_argument("--tier-limits", action="store_true",
+                        help="keep the gateway's API tier rate limits")
+    print(json.dumps(run(parser.parse_args()), indent=2))
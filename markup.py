@@ -0,0 +1,111 @@
+"""Minimal markdown parsing for marketing plan bodies.
+
+Plan bodies use a small markdown subset: lines that are entirely **bold**
+act as sub-headers, "- " starts a bullet, consecutive plain lines form a
+paragraph, and **bold** / *italic* spans may appear inline. parse_body turns
+a body into blocks of styled spans in a single pass over its lines, and
+parse_plan caches the parsed plan per language so the PDF renderer and the
+plan tab share one parse.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from marketing_plan import get_plan
+
+HEADER_RE = re.compile(r"^\*\*(.+?)\*\*\s*$")
+INLINE_RE = re.compile(r"\*\*(.+?)\*\*|\*(.+?)\*")
+
+
+@dataclass(frozen=True)
+class Span:
+    text: str
+    bold: bool = False
+    italic: bool = False
+
+
+@dataclass(frozen=True)
+class Block:
+    kind: str  # "header", "bullet", "paragraph" or "blank"
+    spans: tuple[Span, ...] = ()
+
+    @property
+    def text(self) -> str:
+        return "".join(span.text for span in self.spans)
+
+
+def parse_inline(text: str) -> tuple[Span, ...]:
+    """Split a line into plain, bold and italic spans."""
+    spans, pos = [], 0
+    for match in INLINE_RE.finditer(text):
+        if match.start() > pos:
+            spans.append(Span(text[pos:match.start()]))
+        if match.group(1) is not None:
+            spans.append(Span(match.group(1), bold=True))
+        else:
+            spans.append(Span(match.group(2), italic=True))
+        pos = match.end()
+    if pos < len(text):
+        spans.append(Span(text[pos:]))
+    return tuple(spans)
+
+
+def parse_body(body: str) -> tuple[Block, ...]:
+    """Parse a section body into blocks."""
+    blocks = []
+    paragraph = []
+
+    def flush():
+        if paragraph:
+            blocks.append(Block("paragraph", parse_inline(" ".join(paragraph))))
+            paragraph.clear()
+
+    for line in body.split("\n"):
+        stripped = line.strip()
+        header = HEADER_RE.match(stripped)
+        if not stripped:
+            flush()
+            blocks.append(Block("blank"))
+        elif header:
+            flush()
+            blocks.append(Block("header", (Span(header.group(1), bold=True),)))
+        elif stripped.startswith("- "):
+            flush()
+            blocks.append(Block("bullet", parse_inline(stripped[2:])))
+        else:
+            paragraph.append(stripped)
+    flush()
+    return tuple(blocks)
+
+
+@lru_cache(maxsize=None)
+def parse_plan(lang: str = "en") -> dict:
+    """Marketing plan for a language with each section body parsed into blocks."""
+    plan = get_plan(lang)
+    return {
+        **plan,
+        "sections": [{"heading": section["heading"], "blocks": parse_body(section["body"])}
+                     for section in plan["sections"]],
+    }
+
+
+def _span_markdown(span: Span) -> str:
+    if span.bold:
+        return f"**{span.text}**"
+    if span.italic:
+        return f"*{span.text}*"
+    return span.text
+
+
+def to_markdown(blocks: tuple[Block, ...]) -> str:
+    """Render blocks back to markdown for Streamlit."""
+    lines = []
+    for block in blocks:
+        text = "".join(_span_markdown(span) for span in block.spans)
+        if block.kind == "bullet":
+            lines.append(f"- {text}")
+        elif block.kind == "blank":
+            lines.append("")
+        else:
+            lines.extend([text, ""])
+    return "\n".join(lines)
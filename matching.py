@@ -0,0 +1,158 @@
+"""Roster-wide job matching for le comptoir.
+
+Scores one job description against every candidate in two stages. A local
+pre-filter measures the lexical overlap between the job text and each
+candidate's indexed portfolio, weighting terms by how few candidates use
+them, and shortlists the best. Fit analyses for the shortlist then run in
+parallel through the gateway, each framed by the job block and the
+candidate identity closest to the job, and are yielded as they finish so
+the caller can show a ranked table that fills in. With STRUCTURED, the
+analyses are validated record_fit calls (see fit.py), stored and reused
+across visitors, and the prose analysis is left for the visitor to ask for.
+"""
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from chat import build_request, context_path, load_index
+from fit import FitStore, fit_key, from_message, section_titles, structured_request
+from i18n import STRINGS
+from retrieval import tokenize
+from roster import AGENTS
+
+SHORTLIST = 5          # candidates sent to the model
+MIN_OVERLAP = 0.05     # pre-filter score below which a candidate is skipped
+SCORE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*/\s*10")
+STRUCTURED = True      # record_fit assessments instead of a scored paragraph
+
+
+def prefilter(job_description: str, agents: dict = AGENTS) -> list[tuple[str, float]]:
+    """(agent key, overlap) for every candidate, best first.
+
+    Overlap is the share of the job's terms found in the candidate's
+    portfolio, each term weighted by its inverse frequency across the roster.
+    """
+    terms = set(tokenize(job_description))
+    vocab = {key: set(load_index(context_path(agent)).idf) for key, agent in agents.items()}
+    weights = {term: math.log(1 + len(agents) / (1 + sum(term in v for v in vocab.values())))
+               for term in terms}
+    total = sum(weights.values()) or 1.0
+    scores = [(key, sum(weights[term] for term in terms & v) / total)
+              for key, v in vocab.items()]
+    return sorted(scores, key=lambda item: item[1], reverse=True)
+
+
+def best_identity(agent: dict, job_description: str) -> str:
+    """The identity sharing most job terms with its name, title and summary.
+
+    Terms common to all of the candidate's identities count least, terms in
+    the name or title count double; ties go to the default identity.
+    """
+    terms = set(tokenize(job_description))
+    names = {key: set(tokenize(f"{key} {title}"))
+             for key, (title, _) in agent["identities"].items()}
+    words = {key: names[key] | set(tokenize(summary))
+             for key, (_, summary) in agent["identities"].items()}
+    weights = {term: math.log(1 + len(words) / sum(term in w for w in words.values()))
+               for term in terms if any(term in w for w in words.values())}
+
+    def overlap(key):
+        return sum(weights[term] * (2 if term in names[key] else 1)
+                   for term in terms & words[key])
+
+    return max(agent["identities"], key=lambda key: (overlap(key), key == agent["default_identity"]))
+
+
+def fit_request(agent: dict, job_description: str, language: str,
+                identity: str | None = None) -> tuple[str, dict]:
+    """(identity, request) for a candidate's fit analysis, framed by the
+    given identity or else the one closest to the job."""
+    identity = identity or best_identity(agent, job_description)
+    question = STRINGS[language]["fit_question"].format(name=agent["name"].split()[0])
+    return identity, build_request(agent, identity, [{"role": "user", "content": question}],
+                                   job_description=job_description, language=language)
+
+
+def narrative_request(agent: dict, identity: str, job_description: str,
+                      language: str) -> dict:
+    """Request for the full prose fit analysis, through the four lenses."""
+    question = STRINGS[language]["fit_narrative"].format(name=agent["name"].split()[0])
+    return build_request(agent, identity, [{"role": "user", "content": question}],
+                         job_description=job_description, language=language)
+
+
+def parse_score(text: str) -> float | None:
+    """The "N/10" score the fit question asks for, if present."""
+    match = SCORE_RE.search(text)
+    return min(float(match.group(1)), 10.0) if match else None
+
+
+def match_roster(gateway, job_description: str, language: str = "en",
+                 shortlist: int = SHORTLIST, cache=None, agents: dict = AGENTS,
+                 structured: bool = STRUCTURED, fits: FitStore | None = None):
+    """Yield one result per shortlisted candidate, in order of completion.
+
+    Args:
+        gateway: Gateway the fit analyses are streamed through.
+        job_description: Job description text.
+        language: Language code of the analyses.
+        shortlist: Number of candidates analyzed after pre-filtering.
+        cache: Optional ResponseCache; hits are not sent again.
+        agents: Roster to match against.
+        structured: Ask for record_fit assessments rather than prose.
+        fits: Optional FitStore for structured assessments.
+
+    Each result has key, name, identity, overlap, score (None if the answer
+    gave none), text, fit (the FitAssessment, structured mode only), usage
+    (None for cache hits and coalesced requests) and error (None on success).
+    """
+    ranked = [(key, overlap) for key, overlap in prefilter(job_description, agents)
+              if overlap >= MIN_OVERLAP][:shortlist]
+
+    def assess(key, overlap):
+        agent = agents[key]
+        identity = best_identity(agent, job_description)
+        result = {"key": key, "name": agent["name"], "identity": identity,
+                  "overlap": round(overlap, 3), "score": None, "text": "", "fit": None,
+                  "usage": None, "error": None}
+        store_key = fit_key(job_description, key, agent, identity, language)
+        assessment = fits.get(store_key) if fits is not None else None
+        try:
+            if assessment is None:
+                flight, shared = gateway.stream(
+                    structured_request(agent, identity, job_description, language))
+                assessment = from_message(flight.result(), section_titles(agent))
+                result["usage"] = None if shared else flight.usage
+                if fits is not None:
+                    fits.put(store_key, assessment)
+        except Exception as e:
+            result["error"] = e
+            return result
+        result.update(fit=assessment, score=assessment.overall, text=assessment.summary())
+        return result
+
+    def analyze(key, overlap):
+        agent = agents[key]
+        identity, request = fit_request(agent, job_description, language)
+        result = {"key": key, "name": agent["name"], "identity": identity,
+                  "overlap": round(overlap, 3), "score": None, "text": "", "fit": None,
+                  "usage": None, "error": None}
+        text = cache.get(request) if cache is not None else None
+        try:
+            if text is None:
+                flight, shared = gateway.stream(request)
+                text = "".join(flight.text_stream())
+                result["usage"] = None if shared else flight.usage
+                if cache is not None and text:
+                    cache.put(request, text)
+        except Exception as e:
+            result["error"] = e
+            return result
+        result.update(text=text, score=parse_score(text))
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(len(ranked), 1)) as pool:
+        futures = [pool.submit(assess if structured else analyze, key, overlap)
+                   for key, overlap in ranked]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,328 @@
+"""Local stand-in for the Anthropic Messages API, for load tests.
+
+Implements POST /v1/messages, streaming (server-sent events, as the SDK
+expects) and non-streaming, with a configurable time to first token, token
+rate and injected 429/529 errors. Usage is reported like the real API,
+including prompt caching: the first request with a given cached system
+prefix is billed as a cache write, later ones as cache reads. Requests
+forcing a tool call get one, with an input made up from the tool's schema.
+It also serves a job posting at GET /job, for sessions that analyze a job
+URL, and the Message Batches endpoints (create, retrieve, results), with
+batches ending BATCH_SECONDS after submission.
+
+Point the app or the gateway at it with ANTHROPIC_BASE_URL:
+
+Usage:
+    python mock_api.py --port 8765 --ttft 0.6 --tokens-per-second 80
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from retrieval import estimate_tokens
+
+PORT = 8765
+TTFT = 0.6                 # seconds before the first token
+TOKENS_PER_SECOND = 80.0
+OUTPUT_TOKENS = 120        # answer length, capped by the request's max_tokens
+ERROR_RATE = 0.0           # fraction of requests answered with 429 or 529
+BATCH_SECONDS = 2.0        # time for a batch to end
+
+WORDS = ("the candidate built reproducible pipelines for large simulations and "
+         "validated models against experimental data with a focus on clear "
+         "interfaces scientific rigor and maintainable Python code").split()
+
+JOB_PAGE = """<!doctype html><html><head><title>Research Software Engineer</title>
+<script type="application/ld+json">{"@context": "https://schema.org", "@type": "JobPosting",
+"title": "Research Software Engineer", "hiringOrganization": {"name": "Example Lab"},
+"description": "<p>Build and maintain scientific Python pipelines for large-scale simulations. \
+Work with researchers on data validation, HPC workflows and reproducible analyses. \
+Experience with NumPy, pandas, SLURM and testing.</p>"}</script>
+</head><body><main><h1>Research Software Engineer</h1><p>Example Lab</p></main></body></html>
+"""
+
+
+class MockState:
+    """Settings and the set of cached prefixes seen so far."""
+
+    def __init__(self, ttft=TTFT, tokens_per_second=TOKENS_PER_SECOND,
+                 output_tokens=OUTPUT_TOKENS, error_rate=ERROR_RATE,
+                 batch_seconds=BATCH_SECONDS):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.batch_seconds = batch_seconds
+        self.cached: set[str] = set()
+        self.batches: dict[str, dict] = {}
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def usage(self, request: dict) -> dict:
+        """Input usage of a request, split into uncached, cache write and cache read."""
+        system = request.get("system") or []
+        if isinstance(system, str):
+            system = [{"type": "text", "text": system}]
+        prefix, tail = "", ""
+        for block in system:
+            if "cache_control" in block:
+                prefix += tail + block["text"]
+                tail = ""
+            else:
+                tail += block["text"]
+        for message in request["messages"]:
+            content = message["content"]
+            tail += content if isinstance(content, str) else json.dumps(content)
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        with self._lock:
+            hit = key in self.cached
+            self.cached.add(key)
+        prefix_tokens = estimate_tokens(prefix)
+        return {
+            "input_tokens": estimate_tokens(tail),
+            "cache_creation_input_tokens": 0 if hit else prefix_tokens,
+            "cache_read_input_tokens": prefix_tokens if hit else 0,
+        }
+
+    def answer(self, request: dict) -> list[str]:
+        """Words of a made-up answer; fit questions get a "Score: N/10" first."""
+        words = [random.choice(WORDS)
+                 for _ in range(min(self.output_tokens, request["max_tokens"]))]
+        if "N/10" in str(request["messages"][-1]["content"]):
+            words[:2] = ["Score:", f"{random.randint(1, 10)}/10."]
+        return words
+
+    def count(self) -> int:
+        """Count an upstream request, failed or not; returns its number."""
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+    def message(self, request: dict, number: int, words: list[str] | None = None) -> dict:
+        """A complete (non-streaming) message for a request."""
+        words = self.answer(request) if words is None else words
+        tool = forced_tool(request)
+        if tool is not None:
+            tool_input = fake_input(tool["input_schema"])
+            content = [{"type": "tool_use", "id": f"toolu_mock_{number}",
+                        "name": tool["name"], "input": tool_input}]
+            output_tokens = estimate_tokens(json.dumps(tool_input))
+        else:
+            content = [{"type": "text", "text": " ".join(words)}]
+            output_tokens = len(words)
+        return {"id": f"msg_mock_{number}", "type": "message", "role": "assistant",
+                "model": request["model"], "content": content,
+                "stop_reason": "tool_use" if tool is not None else "end_turn",
+                "stop_sequence": None,
+                "usage": {**self.usage(request), "output_tokens": output_tokens}}
+
+    def create_batch(self, requests: list[dict]) -> dict:
+        batch_id = f"msgbatch_mock_{len(self.batches) + 1:04d}"
+        batch = {"id": batch_id, "type": "message_batch", "processing_status": "in_progress",
+                 "request_counts": {"processing": len(requests), "succeeded": 0,
+                                    "errored": 0, "canceled": 0, "expired": 0},
+                 "created_at": _iso(time.time()),
+                 "expires_at": _iso(time.time() + 86_400),
+                 "ended_at": None, "archived_at": None, "cancel_initiated_at": None,
+                 "results_url": None}
+        with self._lock:
+            self.batches[batch_id] = {"batch": batch, "requests": requests, "results": []}
+        threading.Timer(self.batch_seconds, self._end_batch, args=(batch_id,)).start()
+        return batch
+
+    def _end_batch(self, batch_id: str):
+        entry = self.batches[batch_id]
+        counts = entry["batch"]["request_counts"]
+        for item in entry["requests"]:
+            number = self.count()
+            if random.random() < self.error_rate:
+                result = {"type": "errored", "error": {"type": "error", "error": {
+                    "type": "overloaded_error", "message": "Overloaded (mock)"}}}
+            else:
+                result = {"type": "succeeded",
+                          "message": self.message(item["params"], number)}
+            entry["results"].append({"custom_id": item["custom_id"], "result": result})
+            counts[result["type"]] += 1
+            counts["processing"] -= 1
+        entry["batch"].update(processing_status="ended", ended_at=_iso(time.time()))
+
+
+def forced_tool(request: dict) -> dict | None:
+    """The tool a request's tool_choice forces, if any."""
+    choice = request.get("tool_choice") or {}
+    if choice.get("type") != "tool":
+        return None
+    return next(tool for tool in request["tools"] if tool["name"] == choice["name"])
+
+
+def fake_input(schema: dict):
+    """A random value satisfying a (simple) JSON schema."""
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: fake_input(sub) for name, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [fake_input(schema["items"]) for _ in range(random.randint(1, 3))]
+    if kind in ("integer", "number"):
+        return random.randint(schema.get("minimum", 0), schema.get("maximum", 10))
+    if kind == "boolean":
+        return random.random() < 0.5
+    return " ".join(random.choices(WORDS, k=random.randint(2, 8)))
+
+
+def _iso(ts: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
+
+
+class Handler(BaseHTTPRequestHandler):
+    state: MockState
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path.startswith("/v1/messages/batches/"):
+            self._batch(path.removeprefix("/v1/messages/batches/"))
+            return
+        if path != "/job":
+            self.send_error(404)
+            return
+        body = JOB_PAGE.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        if path not in ("/v1/messages", "/v1/messages/batches"):
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        state = self.state
+        if path == "/v1/messages/batches":
+            self._json(200, state.create_batch(request["requests"]))
+            return
+        number = state.count()
+        with state._lock:
+            failing = random.random() < state.error_rate
+            state.errors += failing
+        if failing:
+            self._error()
+            return
+        words = state.answer(request)
+        message = state.message(request, number, words)
+        time.sleep(state.ttft)
+        if not request.get("stream"):
+            self._json(200, message)
+            return
+        block = message["content"][0]
+        stop_reason = message["stop_reason"]
+        output_tokens = message["usage"]["output_tokens"]
+        message = {**message, "content": [], "stop_reason": None,
+                   "usage": {**message["usage"], "output_tokens": 0}}
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self._event("message_start", {"type": "message_start", "message": message})
+        if block["type"] == "tool_use":
+            payload = json.dumps(block["input"])
+            pieces = [{"type": "input_json_delta", "partial_json": payload[i:i + 16]}
+                      for i in range(0, len(payload), 16)]
+            block = {**block, "input": {}}
+        else:
+            pieces = [{"type": "text_delta", "text": word if i == 0 else " " + word}
+                      for i, word in enumerate(words)]
+            block = {"type": "text", "text": ""}
+        self._event("content_block_start", {"type": "content_block_start", "index": 0,
+                                            "content_block": block})
+        for i, delta in enumerate(pieces):
+            if i:
+                time.sleep(1 / state.tokens_per_second)
+            self._event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                "delta": delta})
+        self._event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._event("message_delta", {"type": "message_delta",
+                                      "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+                                      "usage": {"output_tokens": output_tokens}})
+        self._event("message_stop", {"type": "message_stop"})
+
+    def _batch(self, rest: str):
+        batch_id, _, results = rest.partition("/")
+        entry = self.state.batches.get(batch_id)
+        if entry is None or results not in ("", "results"):
+            self.send_error(404)
+            return
+        batch = entry["batch"]
+        if not results:
+            if batch["processing_status"] == "ended":
+                host = self.headers.get("Host", "127.0.0.1")
+                batch["results_url"] = f"http://{host}/v1/messages/batches/{batch_id}/results"
+            self._json(200, batch)
+            return
+        body = "".join(json.dumps(line) + "\n" for line in entry["results"]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/binary")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _event(self, name: str, data: dict):
+        self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _json(self, status: int, body: dict, headers: dict | None = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self):
+        if random.random() < 0.5:
+            self._json(429, {"type": "error", "error": {"type": "rate_limit_error",
+                                                        "message": "Rate limited (mock)"}},
+                       {"retry-after": "1"})
+        else:
+            self._json(529, {"type": "error", "error": {"type": "overloaded_error",
+                                                        "message": "Overloaded (mock)"}})
+
+
+def serve(state: MockState, port: int = PORT) -> ThreadingHTTPServer:
+    """Start the mock server on a background thread; returns the server."""
+    handler = type("BoundHandler", (Handler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-api", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Messages API.")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--ttft", type=float, default=TTFT)
+    parser.add_argument("--tokens-per-second", type=float, default=TOKENS_PER_SECOND)
+    parser.add_argument("--output-tokens", type=int, default=OUTPUT_TOKENS)
+    parser.add_argument("--error-rate", type=float, default=ERROR_RATE)
+    parser.add_argument("--batch-seconds", type=float, default=BATCH_SECONDS)
+    args = parser.parse_args()
+
+    server = serve(MockState(args.ttft, args.tokens_per_second, args.output_tokens,
+                             args.error_rate, args.batch_seconds), args.port)
+    print(f"mock Messages API on http://127.0.0.1:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
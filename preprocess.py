@@ -0,0 +1,218 @@
+"""Offline preprocessing of agent context files.
+
+The context.txt files are written by hand and carry editing leftovers: a
+`--- Section ---` marker immediately repeated as `= Title =` or `# Title`,
+horizontal rules, org-mode `=verbatim=` markers and bullets, trailing
+whitespace and runs of blank lines. All of it was sent to the model every
+turn. This step writes a compact copy of each file with that noise removed,
+plus a table of its sections (id, title, type, size), under build/context/.
+Tables and code blocks are copied as written, since their spacing carries
+meaning. The app reads the compact copy when it is up to date with its
+source and falls back to the raw file otherwise.
+
+Usage:
+    python preprocess.py            # preprocess and index every agent
+    python preprocess.py vishal     # one agent
+"""
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+from context_store import store
+from retrieval import AGENTS_DIR, HEADING_RE, SECTION_RE, build_index, estimate_tokens
+
+ARTIFACT_DIR = Path(__file__).parent / "build" / "context"
+CONTEXT_NAME = "context.txt"
+SECTIONS_NAME = "sections.json"
+SUMMARIES_NAME = "summaries.json"   # written by summarize.py
+PREPROCESS_VERSION = 2
+
+RULE_RE = re.compile(r"^(?:-{3,}|\*{3,})$")
+# Indented only: a `*` in column 0 starts an org-mode heading
+BULLET_RE = re.compile(r"^(\s+)[*+]\s+(?=\S)")
+VERBATIM_RE = re.compile(r"(?<![\w=])=([^\s=]+)=(?![\w=])")
+SPACES_RE = re.compile(r"(?<=\S) {2,}")
+# Lines kept as written: code block fences and what they enclose, and tables,
+# whose alignment depends on the spacing
+FENCE_RE = re.compile(r"^\s*(?:```|#\+(?:begin|end)_(?:src|example)\b)", re.IGNORECASE)
+TABLE_RE = re.compile(r"^\s*(?:\||\+-)")
+
+# Section type by title prefix, first match wins
+SECTION_TYPES = (
+    ("Professional Identity", "Identity"),
+    ("Experience", "Experience"),
+    ("Career History", "Experience"),
+    ("Publications", "Publication"),
+    ("Project Deep-Dive", "Deep-Dive"),
+    ("Framework Review", "Review"),
+    ("Portal Review", "Review"),
+    ("Education", "Education"),
+)
+
+
+def section_type(title: str) -> str:
+    for prefix, kind in SECTION_TYPES:
+        if title.startswith(prefix):
+            return kind
+    return "Profile"
+
+
+def slug(title: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")
+
+
+def _heading_key(title: str) -> str:
+    """Comparable form of a heading: without its type prefix, case or
+    punctuation, so "Project Deep-Dive: Bravli" matches "BRAVli"."""
+    return re.sub(r"\W+", "", title.split(": ", 1)[-1]).lower()
+
+
+def compact(text: str) -> str:
+    """Normalize a context file's whitespace and markup and drop headings
+    that only repeat the one above them."""
+    lines = []
+    last_heading = None  # key of the previous heading, while only blanks follow it
+    in_code = False
+    for line in text.splitlines():
+        line = line.rstrip()
+        if FENCE_RE.match(line):
+            in_code = not in_code
+        if in_code or FENCE_RE.match(line) or TABLE_RE.match(line):
+            last_heading = None
+            lines.append(line)
+            continue
+        if RULE_RE.match(line):
+            continue
+        marker = SECTION_RE.match(line) or HEADING_RE.match(line)
+        if marker:
+            key = _heading_key(next(g for g in marker.groups() if g))
+            if key == last_heading and not SECTION_RE.match(line):
+                continue
+            last_heading = key
+        elif line:
+            last_heading = None
+            line = BULLET_RE.sub(r"\1- ", line)
+            line = VERBATIM_RE.sub(r"\1", line)
+            line = SPACES_RE.sub(" ", line)
+        if not line and (not lines or not lines[-1]):
+            continue  # collapse blank runs, no leading blank
+        lines.append(line)
+    return "\n".join(lines).strip() + "\n"
+
+
+def split_sections(text: str) -> list[tuple[str, str]]:
+    """(title, text) of each `--- Section ---` of a context file, in order."""
+    sections = []
+    title, body = "Preamble", []
+
+    def close():
+        chunk = "\n".join(body).strip()
+        if chunk:
+            sections.append((title, chunk))
+
+    for line in text.splitlines():
+        match = SECTION_RE.match(line)
+        if match:
+            close()
+            title, body = match.group(1), []
+        body.append(line)
+    close()
+    return sections
+
+
+def section_table(text: str) -> list[dict]:
+    """Sections of a (compacted) context file with their sizes."""
+    return [{
+        "id": slug(title),
+        "title": title,
+        "type": section_type(title),
+        "chars": len(chunk),
+        "tokens": estimate_tokens(chunk),
+    } for title, chunk in split_sections(text)]
+
+
+def artifact_dir(context_path) -> Path:
+    return ARTIFACT_DIR / Path(context_path).parent.name
+
+
+def build_artifact(context_path) -> dict:
+    """Write the compact context and its section table for one agent."""
+    text = store.read(context_path)
+    compacted = compact(text)
+    out = artifact_dir(context_path)
+    out.mkdir(parents=True, exist_ok=True)
+    (out / CONTEXT_NAME).write_text(compacted, encoding="utf-8")
+    meta = {
+        "version": PREPROCESS_VERSION,
+        "source": str(context_path),
+        "source_sha256": store.digest(context_path),
+        "source_chars": len(text),
+        "chars": len(compacted),
+        "sections": section_table(compacted),
+    }
+    (out / SECTIONS_NAME).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return meta
+
+
+@lru_cache(maxsize=256)
+def _resolve(path: str, source_mtime_ns: int, meta_mtime_ns: int) -> str:
+    meta = json.loads((artifact_dir(path) / SECTIONS_NAME).read_text(encoding="utf-8"))
+    if (meta.get("version") == PREPROCESS_VERSION
+            and meta.get("source_sha256") == store.digest(path)):
+        return str(artifact_dir(path) / CONTEXT_NAME)
+    return path
+
+
+def resolve(context_path) -> str:
+    """Path of the compact context for a raw context file, or the raw file
+    itself when no up-to-date artifact exists."""
+    path = str(context_path)
+    try:
+        meta_mtime = os.stat(artifact_dir(path) / SECTIONS_NAME).st_mtime_ns
+    except FileNotFoundError:
+        return path
+    return _resolve(path, os.stat(path).st_mtime_ns, meta_mtime)
+
+
+@lru_cache(maxsize=256)
+def _load_summaries(path: str, meta_mtime_ns: int, summaries_mtime_ns: int) -> dict:
+    out = artifact_dir(path)
+    meta = json.loads((out / SECTIONS_NAME).read_text(encoding="utf-8"))
+    summaries = json.loads((out / SUMMARIES_NAME).read_text(encoding="utf-8"))
+    if summaries.get("source_sha256") != meta.get("source_sha256"):
+        return {}
+    return {title: {"short": entry["short"], "medium": entry["medium"]}
+            for title, entry in summaries["sections"].items()}
+
+
+def load_summaries(context_path) -> dict[str, dict]:
+    """Section summaries for a raw context file, by section title.
+
+    Empty unless the compact artifact is current and the summaries were made
+    from it.
+    """
+    path = str(context_path)
+    if resolve(path) == path:
+        return {}
+    out = artifact_dir(path)
+    try:
+        mtimes = (os.stat(out / SECTIONS_NAME).st_mtime_ns,
+                  os.stat(out / SUMMARIES_NAME).st_mtime_ns)
+    except FileNotFoundError:
+        return {}
+    return _load_summaries(path, *mtimes)
+
+
+if __name__ == "__main__":
+    keys = sys.argv[1:] or sorted(p.name for p in AGENTS_DIR.iterdir() if p.is_dir())
+    for key in keys:
+        context = AGENTS_DIR / key / CONTEXT_NAME
+        meta = build_artifact(context)
+        index = build_index(artifact_dir(context) / CONTEXT_NAME)
+        saved = 1 - meta["chars"] / meta["source_chars"] if meta["source_chars"] else 0
+        print(f"{key}: {len(meta['sections'])} sections, {meta['source_chars']:,} -> "
+              f"{meta['chars']:,} chars ({saved:.1%} smaller), "
+              f"{len(index.chunks)} chunks -> {artifact_dir(context)}")
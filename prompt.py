@@ -1,7 +1,8 @@
 """System prompt for le comptoir.
 
 The prompt establishes the stance, injects assembled content as grounding context,
-and defines behavioral rules for the conversational CV interface.
+and defines behavioral rules for the conversational CV interface. It is emitted
+as a list of system blocks ordered for prompt caching.
 Supports multilingual responses (EN/FR/DE) while keeping source content in English.
 """
 
@@ -80,19 +81,122 @@ but formulate all your answers in {language_name}. Use natural, professional \
 tool names, programming languages) may remain in English where that is standard practice."""
 
 
-def build_system_prompt(content: str, language: str = "en",
-                        concise: bool = False) -> str:
-    """Build the full system prompt by injecting assembled content.
+IDENTITY_TEMPLATE = """\
+--- Active Professional Identity ---
+
+Title: {title}
+Summary: {summary}
+
+When discussing {name}'s work, lead with this framing. \
+Emphasize the aspects of their experience most relevant to a \
+"{title}" positioning.
+"""
+
+
+JOB_TEMPLATE = """\
+--- Job Description Under Evaluation ---
+
+{job_description}
+
+A recruiter or hiring manager has provided this job description. \
+When the visitor asks about fit or match, analyze it using these lenses:
+1. The recruiter's filter: Does this candidate survive a 6-second scan \
+for this role? What jumps out immediately?
+2. The hiring manager's filter: Does the candidate's experience map onto \
+problems this role actually faces? Be specific.
+3. The honest broker: Where is the alignment strong? Where are gaps? \
+Name gaps directly — the candidate can decide how to address them.
+4. Domain bridging: Where the candidate's experience is in a different \
+domain but structurally similar, make the translation explicit.
+"""
+
+
+EXCERPTS_TEMPLATE = """\
+--- Additional Portfolio Excerpts ---
+
+The portfolio content above is the candidate's core profile. The sections \
+below were selected from the rest of the portfolio as most relevant to the \
+visitor's question; they are part of the portfolio and may be cited. Other \
+sections exist that are not shown here.
+
+{excerpts}
+"""
+
+
+SUMMARY_TEMPLATE = """\
+--- Earlier in This Conversation ---
+
+Summary of the visitor's earlier questions and your answers, which are no \
+longer shown verbatim:
+
+{summary}
+"""
+
+
+# Marks a block as the end of a cacheable prefix. Blocks are ordered from
+# most to least stable, so every breakpoint covers everything before it.
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def identity_block(name: str, title: str, summary: str) -> str:
+    """Framing instructions for the active professional identity."""
+    return IDENTITY_TEMPLATE.format(name=name, title=title, summary=summary)
+
+
+def job_block(job_description: str) -> str:
+    """Fit-analysis instructions for a job description, or '' if there is none."""
+    if not job_description:
+        return ""
+    return JOB_TEMPLATE.format(job_description=job_description)
+
+
+def build_system_prompt(content: str, identity: str = "", job: str = "",
+                        language: str = "en", concise: bool = False,
+                        excerpts: str = "", history_summary: str = "") -> list[dict]:
+    """Build the system prompt as a list of text blocks for the Messages API.
+
+    Blocks run from most to least stable so that the provider's prompt cache
+    can reuse the longest possible prefix: stance, rules and portfolio first
+    (identical for every visitor of a candidate), then the identity framing,
+    then the job description, and finally the per-session tier and language
+    instructions, which are small and left uncached. Retrieved excerpts and
+    the conversation summary change from turn to turn, so they follow the
+    cached blocks.
 
     Args:
-        content: The assembled portfolio text with identity/job blocks.
+        content: The candidate's portfolio text.
+        identity: Identity framing block (see identity_block).
+        job: Job description block (see job_block).
         language: Language code ('en', 'fr', 'de').
         concise: If True, enforce strict brevity (free tier).
+        excerpts: Question-specific portfolio sections from retrieval.
+        history_summary: Running summary of older conversation turns.
     """
-    prompt = SYSTEM_PROMPT_TEMPLATE.format(content=content)
+    blocks = [{"type": "text", "text": SYSTEM_PROMPT_TEMPLATE.format(content=content),
+               "cache_control": CACHE_CONTROL}]
+    for text in (identity, job):
+        if text:
+            blocks.append({"type": "text", "text": text, "cache_control": CACHE_CONTROL})
+
+    if excerpts:
+        blocks.append({"type": "text",
+                       "text": EXCERPTS_TEMPLATE.format(excerpts=excerpts)})
+
+    if history_summary:
+        blocks.append({"type": "text",
+                       "text": SUMMARY_TEMPLATE.format(summary=history_summary)})
+
+    tail = ""
     if concise:
-        prompt += BREVITY_INSTRUCTION
+        tail += BREVITY_INSTRUCTION
     if language != "en":
         language_name = LANGUAGES.get(language, "English")
-        prompt += LANGUAGE_INSTRUCTION.format(language_name=language_name)
-    return prompt
+        tail += LANGUAGE_INSTRUCTION.format(language_name=language_name)
+    if tail:
+        blocks.append({"type": "text", "text": tail.strip()})
+    return blocks
+
+
+def system_prompt_text(blocks: list[dict]) -> str:
+    """Flatten system blocks into a single string (for hashing and sizing)."""
+    return "\n\n".join(block["text"] for block in blocks)
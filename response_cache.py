@@ -0,0 +1,132 @@
+"""Response cache for le comptoir.
+
+A first question with no job description is fully determined by the agent,
+identity, language, tier and question, and the built-in example questions
+make up most first clicks. Answers are cached on disk under a hash of the
+complete request (model, max_tokens, system prompt and messages), so any
+change to the portfolio, prompt or settings simply misses. An offline
+warm-up pre-generates answers for every agent, identity, language and
+example question; the app replays hits with simulated streaming.
+
+Usage:
+    python response_cache.py --dry-run      # count requests to warm
+    python response_cache.py --agent vishal --lang en
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import anthropic
+
+from chat import build_request
+from i18n import STRINGS
+from roster import AGENTS
+
+CACHE_DIR = Path(__file__).parent / "build" / "responses"
+STREAM_DELAY = 0.01   # seconds between replayed words
+
+
+def request_key(request: dict) -> str:
+    """Hash of everything that determines the model's answer: every field
+    (tools and tool_choice included) except stream."""
+    payload = {k: v for k, v in request.items() if k != "stream"}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Answers stored as JSON files keyed by request hash, memoized in process."""
+
+    def __init__(self, path=CACHE_DIR):
+        self.path = Path(path)
+        self._memo: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _file(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    def get(self, request: dict) -> str | None:
+        key = request_key(request)
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        file = self._file(key)
+        if not file.exists():
+            return None
+        text = json.loads(file.read_text(encoding="utf-8"))["text"]
+        with self._lock:
+            self._memo[key] = text
+        return text
+
+    def put(self, request: dict, text: str):
+        key = request_key(request)
+        file = self._file(key)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"created": time.time(), "model": request["model"],
+                                   "text": text}), encoding="utf-8")
+        tmp.replace(file)
+        with self._lock:
+            self._memo[key] = text
+
+
+def replay(text: str, delay: float = STREAM_DELAY):
+    """Yield a cached answer word by word, like a live stream."""
+    for word in text.split(" "):
+        yield word + " "
+        time.sleep(delay)
+
+
+def warm_requests(agent_keys=None, languages=None, tiers=("free",)):
+    """Yield (label, request) for every first-turn example question."""
+    for key in agent_keys or AGENTS:
+        agent = AGENTS[key]
+        first_name = agent["name"].split()[0]
+        for identity_key in agent["identities"]:
+            for lang in languages or STRINGS:
+                for question in STRINGS[lang]["example_questions"]:
+                    question = question.format(name=first_name)
+                    for tier in tiers:
+                        request = build_request(
+                            agent, identity_key, [{"role": "user", "content": question}],
+                            language=lang, unlocked=(tier == "unlocked"))
+                        yield f"{key}/{identity_key}/{lang}/{tier}: {question}", request
+
+
+def warm(cache: ResponseCache, client, requests, workers: int = 4) -> int:
+    """Generate and store answers for requests not yet cached. Returns the count."""
+    missing = [(label, r) for label, r in requests if cache.get(r) is None]
+
+    def generate(item):
+        label, request = item
+        response = client.messages.create(**request)
+        text = "".join(block.text for block in response.content if block.type == "text")
+        cache.put(request, text)
+        print(f"cached {label}")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(generate, missing))
+    return len(missing)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate answers to example questions.")
+    parser.add_argument("--agent", nargs="*", help="agent keys (default: all)")
+    parser.add_argument("--lang", nargs="*", help="language codes (default: all)")
+    parser.add_argument("--tier", nargs="*", choices=["free", "unlocked"], default=["free"])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--dry-run", action="store_true", help="only count uncached requests")
+    args = parser.parse_args()
+
+    cache = ResponseCache()
+    requests = list(warm_requests(args.agent, args.lang, args.tier))
+    if args.dry_run:
+        missing = sum(cache.get(r) is None for _, r in requests)
+        print(f"{missing} of {len(requests)} requests not cached")
+    else:
+        count = warm(cache, anthropic.Anthropic(), requests, args.workers)
+        print(f"{count} answers generated, {len(requests) - count} already cached")
@@ -0,0 +1,296 @@
+"""Section-indexed retrieval over agent context files.
+
+Context files are segmented by `--- Section ---` markers and, within a section,
+by `= Title =` and markdown headings. Each file is cut into chunks along those
+markers and scored against the visitor's question with BM25, so the prompt
+carries a fixed core (identity and experience) plus only the most relevant
+sections instead of the whole portfolio.
+
+Indexes are built offline and stored next to each context file; a missing or
+stale index is rebuilt in memory on load. Chunks are located by byte offsets
+into the file, which is read through the memory-mapped context store, so only
+the chunks a prompt uses are ever decoded.
+
+Usage:
+    python retrieval.py            # build indexes for every agent
+    python retrieval.py vishal     # build one agent's index
+"""
+import json
+import math
+import re
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from context_store import ContextFile, store
+
+AGENTS_DIR = Path(__file__).parent / "agents"
+INDEX_NAME = "index.json"
+INDEX_VERSION = 2
+
+SECTION_RE = re.compile(r"^--- (.+) ---$")
+HEADING_RE = re.compile(r"^(?:= (.+) =|#{1,2} (.+))$")
+TOKEN_RE = re.compile(r"\w+")
+
+CHUNK_CHARS = 4000       # close a chunk at the next blank line past this size
+MIN_CHUNK_CHARS = 800    # headings only start a new chunk past this size
+CHARS_PER_TOKEN = 4      # rough estimate, good enough for budgeting
+
+IDENTITY, EXPERIENCE = "Professional Identity", "Experience"
+CORE_SECTIONS = (IDENTITY, EXPERIENCE)
+TOKEN_BUDGET = 8_000
+CORE_BUDGET = 4_000
+EXPERIENCE_SHARE = 0.5   # of the core budget kept for Experience sections
+TOP_K = 8
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can could did do does for from had has have he her
+his how i if in into is it its me my no not of on or our she so than that the
+their them then there these they this to was we were what when where which who
+why will with would you your about tell more does much many
+""".split())
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate from character count."""
+    return len(text) // CHARS_PER_TOKEN
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens with stopwords and single characters removed."""
+    return [w for w in TOKEN_RE.findall(text.lower())
+            if len(w) > 1 and w not in STOPWORDS]
+
+
+@dataclass
+class Chunk:
+    """A contiguous span of a context file, located by byte offsets."""
+    section: str
+    heading: str
+    start: int
+    end: int
+
+    @property
+    def is_core(self) -> bool:
+        return self.section.startswith(CORE_SECTIONS)
+
+
+def chunk_context(data: bytes) -> list[Chunk]:
+    """Split a context file into chunks along section and heading markers."""
+    chunks = []
+    section, heading = "Preamble", ""
+    start = pos = 0
+
+    def close(end):
+        if data[start:end].strip():
+            chunks.append(Chunk(section, heading, start, end))
+
+    for line in data.splitlines(keepends=True):
+        stripped = line.decode("utf-8", errors="replace").strip()
+        size = pos - start
+        section_match = SECTION_RE.match(stripped)
+        if section_match:
+            close(pos)
+            section, heading = section_match.group(1), ""
+            start = pos + len(line)
+        elif HEADING_RE.match(stripped):
+            if size >= MIN_CHUNK_CHARS:
+                close(pos)
+                start = pos
+            match = HEADING_RE.match(stripped)
+            heading = match.group(1) or match.group(2)
+        elif (not stripped or stripped == "---") and size >= CHUNK_CHARS:
+            close(pos)
+            start = pos
+        elif size >= 2 * CHUNK_CHARS:
+            close(pos)
+            start = pos
+        pos += len(line)
+    close(pos)
+    return chunks
+
+
+class SectionIndex:
+    """BM25 index over the chunks of one context file."""
+
+    def __init__(self, source: ContextFile, chunks: list[Chunk], tf: list[dict],
+                 df: dict):
+        self.source = source
+        self.chunks = chunks
+        self.tf = tf
+        self.lengths = [sum(counts.values()) for counts in tf]
+        self.avg_length = sum(self.lengths) / max(len(self.lengths), 1)
+        n = len(chunks)
+        self.idf = {term: math.log(1 + (n - freq + 0.5) / (freq + 0.5))
+                    for term, freq in df.items()}
+
+    @classmethod
+    def build(cls, source: ContextFile) -> "SectionIndex":
+        data = source.read_bytes()
+        chunks = chunk_context(data)
+        tf = [dict(Counter(tokenize(data[c.start:c.end].decode("utf-8", errors="replace"))))
+              for c in chunks]
+        df = Counter(term for counts in tf for term in counts)
+        return cls(source, chunks, tf, dict(df))
+
+    def chunk_text(self, chunk: Chunk) -> str:
+        return self.source.read(chunk.start, chunk.end).strip()
+
+    def chunk_tokens(self, chunk: Chunk) -> int:
+        return (chunk.end - chunk.start) // CHARS_PER_TOKEN
+
+    def score(self, query: str) -> list[float]:
+        """BM25 score of every chunk against the query."""
+        terms = tokenize(query)
+        scores = []
+        for counts, length in zip(self.tf, self.lengths):
+            norm = K1 * (1 - B + B * length / self.avg_length)
+            total = 0.0
+            for term in terms:
+                freq = counts.get(term)
+                if freq:
+                    total += self.idf[term] * freq * (K1 + 1) / (freq + norm)
+            scores.append(total)
+        return scores
+
+    def render(self, ids) -> str:
+        """Render chunks in document order under their section headers."""
+        parts, section = [], None
+        for i in sorted(ids):
+            chunk = self.chunks[i]
+            if chunk.section != section:
+                section = chunk.section
+                parts.append(f"--- {section} ---")
+            parts.append(self.chunk_text(chunk))
+        return "\n\n".join(parts)
+
+    def select(self, query: str, budget: int = TOKEN_BUDGET,
+               core_budget: int = CORE_BUDGET, top_k: int = TOP_K,
+               summaries: dict | None = None) -> tuple[str, str]:
+        """Pick the core sections and the top-k relevant chunks within a budget.
+
+        The core takes at most half of the budget, leaving room for excerpts,
+        and EXPERIENCE_SHARE of it is kept for the Experience sections, so it
+        always holds both identity and experience. An Experience section too
+        large for its share of that room is sent as its summary, or else its
+        opening lines; its full text then only appears through relevant
+        excerpts. With summaries (section title -> {"short", "medium"}),
+        summarized sections outside the core are added as their medium
+        summaries, or short ones if the mediums would take more than a
+        quarter of the budget, and likewise only appear in full as excerpts.
+
+        Returns (core, excerpts). Without summaries, when the whole file fits
+        in the budget it is returned unchanged as the core, with no excerpts.
+        """
+        summaries = summaries or {}
+        if not summaries and self.source.size // CHARS_PER_TOKEN <= budget:
+            return self.source.read(), ""
+
+        core_budget = min(core_budget, budget // 2)
+        identity = [i for i, c in enumerate(self.chunks) if c.section.startswith(IDENTITY)]
+        experience: dict[str, list[int]] = {}
+        for i, chunk in enumerate(self.chunks):
+            if chunk.section.startswith(EXPERIENCE):
+                experience.setdefault(chunk.section, []).append(i)
+
+        core, used = [], 0
+        reserve = int(core_budget * EXPERIENCE_SHARE) if experience else 0
+        for i in identity:
+            if used + self.chunk_tokens(self.chunks[i]) <= core_budget - reserve:
+                core.append(i)
+                used += self.chunk_tokens(self.chunks[i])
+
+        def tokens(ids):
+            return sum(self.chunk_tokens(self.chunks[i]) for i in ids)
+
+        parts, sent, everything = [], [], tokens(i for ids in experience.values() for i in ids)
+        for n, (title, ids) in enumerate(experience.items()):
+            share = (core_budget - used) // (len(experience) - n)
+            if everything <= core_budget - used or tokens(ids) <= share:
+                parts.append(self.render(ids))
+                sent.extend(ids)
+            else:
+                text = next((f"--- {title} (summary) ---\n{summaries[title][level]}"
+                             for level in ("medium", "short") if title in summaries
+                             and estimate_tokens(summaries[title][level]) <= share), None)
+                if text is None:
+                    lead, limit = self.render(ids), share * CHARS_PER_TOKEN
+                    lead = lead[:max(lead.rfind("\n", 0, limit), 0) or limit]
+                    text = lead.replace(" ---", " (abridged) ---", 1)
+                parts.append(text)
+            everything -= tokens(ids)
+            used += estimate_tokens(parts[-1])
+        for i in identity:  # room the experience did not need
+            if i not in core and used + self.chunk_tokens(self.chunks[i]) <= core_budget:
+                core.append(i)
+                used += self.chunk_tokens(self.chunks[i])
+
+        digest = ""
+        if summaries:
+            titles = [s for s in dict.fromkeys(c.section for c in self.chunks)
+                      if s in summaries and not s.startswith(CORE_SECTIONS)]
+            mediums = sum(estimate_tokens(summaries[t]["medium"]) for t in titles)
+            level = "medium" if mediums <= budget // 4 else "short"
+            digest = "\n\n".join(f"--- {t} (summary) ---\n{summaries[t][level]}"
+                                  for t in titles)
+            used += estimate_tokens(digest)
+
+        scores = self.score(query)
+        ranked = sorted((i for i in range(len(self.chunks))
+                         if i not in core and i not in sent and scores[i] > 0),
+                        key=lambda i: scores[i], reverse=True)
+        picked = []
+        for i in ranked:
+            if len(picked) >= top_k:
+                break
+            if used + self.chunk_tokens(self.chunks[i]) <= budget:
+                picked.append(i)
+                used += self.chunk_tokens(self.chunks[i])
+        return ("\n\n".join(filter(None, [self.render(core), *parts, digest])),
+                self.render(picked))
+
+    def to_dict(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "sha256": self.source.digest,
+            "chunks": [[c.section, c.heading, c.start, c.end] for c in self.chunks],
+            "tf": self.tf,
+            "df": Counter(term for counts in self.tf for term in counts),
+        }
+
+
+def index_path(context_path) -> Path:
+    return Path(context_path).with_name(INDEX_NAME)
+
+
+def build_index(context_path) -> SectionIndex:
+    """Build the index for a context file and write it next to the file."""
+    index = SectionIndex.build(store.handle(context_path))
+    index_path(context_path).write_text(json.dumps(index.to_dict()), encoding="utf-8")
+    return index
+
+
+def load_index(context_path) -> SectionIndex:
+    """Load the on-disk index for a context file, rebuilding it if stale."""
+    source = store.handle(context_path)
+    path = index_path(context_path)
+    if path.exists():
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") == INDEX_VERSION and data.get("sha256") == source.digest:
+            chunks = [Chunk(*fields) for fields in data["chunks"]]
+            return SectionIndex(source, chunks, data["tf"], data["df"])
+    return SectionIndex.build(source)
+
+
+if __name__ == "__main__":
+    keys = sys.argv[1:] or sorted(p.name for p in AGENTS_DIR.iterdir() if p.is_dir())
+    for key in keys:
+        context = AGENTS_DIR / key / "context.txt"
+        index = build_index(context)
+        print(f"{key}: {len(index.chunks)} chunks, "
+              f"~{index.source.size // CHARS_PER_TOKEN:,} tokens -> {index_path(context)}")
@@ -0,0 +1,64 @@
+"""Candidate roster for le comptoir.
+
+Each agent is a directory under agents/ holding a manifest.json (display
+metadata and the identities their experience can be framed under) and the
+portfolio context.txt their agent is grounded in. The roster is discovered at
+startup from manifests alone; context files are only read when a candidate
+is first selected (see chat.load_context).
+
+manifest.json:
+    {
+      "name": "Vishal Sood",
+      "tagline": "Senior Research Engineer | ...",
+      "order": 0,                      # position in the roster (optional)
+      "has_plan": true,                # marketing plan tab (optional)
+      "default_identity": "Research Engineer",
+      "identities": {
+        "Research Engineer": {"title": "...", "summary": "..."}
+      }
+    }
+"""
+import json
+from pathlib import Path
+
+AGENTS_DIR = Path(__file__).parent / "agents"
+MANIFEST_NAME = "manifest.json"
+CONTEXT_NAME = "context.txt"
+
+
+def load_manifest(agent_dir: Path) -> dict:
+    """Read an agent's manifest into a roster entry.
+
+    Raises:
+        ValueError: If the manifest is incomplete or inconsistent.
+    """
+    path = agent_dir / MANIFEST_NAME
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    missing = {"name", "tagline", "identities", "default_identity"} - manifest.keys()
+    if missing:
+        raise ValueError(f"{path}: missing {', '.join(sorted(missing))}")
+    if manifest["default_identity"] not in manifest["identities"]:
+        raise ValueError(f"{path}: default_identity {manifest['default_identity']!r} "
+                         f"is not one of its identities")
+    return {
+        "name": manifest["name"],
+        "tagline": manifest["tagline"],
+        "context": agent_dir / CONTEXT_NAME,
+        "has_plan": manifest.get("has_plan", False),
+        "identities": {key: (identity["title"], identity["summary"])
+                       for key, identity in manifest["identities"].items()},
+        "default_identity": manifest["default_identity"],
+        "order": manifest.get("order", 0),
+    }
+
+
+def discover(agents_dir: Path = AGENTS_DIR) -> dict[str, dict]:
+    """Roster entries for every agent directory with a manifest, in roster order."""
+    agents = {path.parent.name: load_manifest(path.parent)
+              for path in agents_dir.glob(f"*/{MANIFEST_NAME}")}
+    return dict(sorted(agents.items(), key=lambda item: (item[1]["order"], item[0])))
+
+
+# --- Agent roster ---
+# Each agent: key -> {name, tagline, context, has_plan, identities, default_identity, order}
+AGENTS = discover()
@@ -0,0 +1,164 @@
+"""Near-duplicate answer cache for first questions.
+
+Visitors ask the same few things in different words ("what are his main
+skills", "strongest technical skills?"). First-turn questions are embedded
+locally as hashed character n-gram and word vectors, and an incoming
+question asking the same thing as one already answered under the same
+prompt configuration reuses the answer of the closest. Everything lives in one NumPy matrix with
+least-recently-used eviction; there is no external service.
+
+Character n-grams alone rate "experience with C++" close to "experience
+with Go" and "senior role" close to "junior role", so a cached answer is
+only considered for a question with the same content terms: the words left
+once function words, the candidate's name and generic modifiers ("main",
+"strongest", "technical", "ever") are dropped, lightly stemmed and with a
+few synonyms merged. A language, tool, employer or seniority word that one
+question has and the other lacks always means a miss. No similarity
+threshold can stand in for that test: one word changes what is asked
+whatever the question's length, and on the pairs in
+tests/test_semantic_cache.py near misses score up to 0.82 ("Python" vs
+"Python testing") while paraphrases score as low as 0.35 ("main skills" vs
+"strongest technical skills"). Nor is a threshold needed past it: questions
+with the same terms differ only in function words and generic modifiers,
+so the most similar one is reused whatever its score. Questions without
+content terms ("Tell me about Vishal", "Summarize") are never matched.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+DIM = 4096
+CAPACITY = 2048
+NGRAM = 3
+
+# Words, keeping "c++", "c#" and "node.js" whole
+WORD_RE = re.compile(r"\w(?:[\w.]*\w)?[+#]*")
+# Function words and pronouns carry no meaning for matching; the candidate's
+# name is dropped too, so "his skills" and "Vishal's skills" coincide.
+STOPWORDS = frozenset("""
+a an the of to in on at for and or is are was were be been has have had do does did
+he she they him her them his their its s what which how me about can could
+would you tell please kind sort with as this that there any some by from into
+le la les un une des du de d l et ou est sont a il elle ses son sa qu que quel
+quels quelle quelles qui en dans sur pour avec comment moi
+der die das ein eine einen des dem den und oder ist sind hat haben er sie sein
+seine seiner was welche welcher wie mir mit von vom zu im in bei für
+""".split())
+# Modifiers a rewording adds or drops without changing what is asked
+GENERIC = frozenset("""
+main key top strongest strong biggest core primary most important best greatest
+major notable technical really actually exactly overall general give describe
+explain list summarize share walk through like just ever able
+""".split())
+SYNONYMS = {"abilities": "skill", "capabilities": "skill", "competencies": "skill",
+            "skillset": "skill", "position": "role", "job": "role",
+            "background": "experience", "experienced": "experience"}
+
+
+def _words(text: str, name: str) -> list[str]:
+    name = name.lower()
+    return [w for w in WORD_RE.findall(text.lower())
+            if w not in STOPWORDS and w not in (name, f"{name}s")]
+
+
+def _normalize(word: str) -> str:
+    word = SYNONYMS.get(word, word)
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    return SYNONYMS.get(word, word)
+
+
+def content_terms(text: str, name: str = "") -> frozenset[str]:
+    """Terms two questions must share for one's answer to serve the other."""
+    return frozenset(_normalize(w) for w in _words(text, name) if w not in GENERIC)
+
+
+def embed(text: str, name: str = "") -> np.ndarray:
+    """L2-normalized hashed bag of character n-grams and content words."""
+    words = [_normalize(w) for w in _words(text, name)]
+    vec = np.zeros(DIM, dtype=np.float32)
+    padded = f" {' '.join(words)} "
+    for i in range(len(padded) - NGRAM + 1):
+        vec[zlib.crc32(padded[i:i + NGRAM].encode("utf-8")) % DIM] += 1.0
+    for word in words:
+        vec[zlib.crc32(word.encode("utf-8")) % DIM] += 2.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def config_key(request: dict, *labels) -> str:
+    """Identify a prompt configuration: the labels given (agent, identity,
+    language, ...) plus model, max_tokens and the cached system prefix.
+
+    Question-specific blocks (retrieval excerpts, conversation summary) have
+    no cache breakpoint and are left out.
+    """
+    prefix = [b["text"] for b in request["system"] if "cache_control" in b]
+    payload = [list(map(str, labels)), request["model"], request["max_tokens"], prefix]
+    return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+
+class SemanticCache:
+    """Fixed-capacity similarity cache of (configuration, question) -> answer."""
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.vectors = np.zeros((capacity, DIM), dtype=np.float32)
+        self.configs: list[str | None] = [None] * capacity
+        self.terms: list[frozenset | None] = [None] * capacity
+        self.answers: list[str | None] = [None] * capacity
+        self.last_used = np.zeros(capacity)
+        self.lookups = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def get(self, config: str, question: str, name: str = "") -> str | None:
+        """Answer to the most similar cached question with the same content
+        terms, if there is one and the question has any.
+
+        name is the candidate's first name, ignored when comparing.
+        """
+        query = embed(question, name)
+        terms = content_terms(question, name)
+        with self._lock:
+            self.lookups += 1
+            rows = [i for i, c in enumerate(self.configs)
+                    if c == config and self.terms[i] == terms] if terms else []
+            if not rows:
+                return None
+            row = rows[int(np.argmax(self.vectors[rows] @ query))]
+            self.last_used[row] = time.monotonic()
+            self.hits += 1
+            return self.answers[row]
+
+    def put(self, config: str, question: str, answer: str, name: str = ""):
+        """Store an answer, evicting the least recently used entry when full.
+
+        A question identical to one already stored replaces its answer.
+        """
+        vector = embed(question, name)
+        terms = content_terms(question, name)
+        with self._lock:
+            row = int(np.argmin(self.last_used))
+            for i, c in enumerate(self.configs):
+                if c == config and self.vectors[i] @ vector > 0.999:
+                    row = i
+                    break
+            self.vectors[row] = vector
+            self.configs[row] = config
+            self.terms[row] = terms
+            self.answers[row] = answer
+            self.last_used[row] = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "size": sum(c is not None for c in self.configs),
+            }
@@ -0,0 +1,105 @@
+"""Offline section summaries for the compact portfolio mode.
+
+Long sections of a preprocessed context file (deep-dives, framework reviews,
+publication lists) are summarized twice, short (two sentences) and medium
+(one paragraph), into build/context/<agent>/summaries.json. Free-tier
+prompts carry these summaries in place of the full sections, and only the
+passages retrieval finds relevant to the question in full (see
+SectionIndex.select). Sections whose text has not changed keep their
+summaries, so rerunning after an edit only pays for what changed.
+
+Run `python preprocess.py` first.
+
+Usage:
+    python summarize.py                 # every agent
+    python summarize.py --agent vishal
+"""
+import argparse
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import anthropic
+
+from chat import MODEL
+from context_store import store
+from preprocess import CONTEXT_NAME, SECTIONS_NAME, SUMMARIES_NAME, artifact_dir, split_sections
+from retrieval import AGENTS_DIR, CORE_SECTIONS, EXPERIENCE, estimate_tokens
+
+MIN_SECTION_TOKENS = 1_500   # shorter sections get no summary; outside the core
+                             # they are only sent when retrieval ranks them
+SUMMARY_SYSTEM = """\
+You condense one section of a job candidate's portfolio for an assistant that \
+answers recruiters' questions about the candidate. Keep only what the section \
+states: named projects, technologies, responsibilities, outcomes and numbers. \
+Write plain prose in English about "the candidate", with no preamble."""
+LEVELS = {
+    # level: (instruction, max_tokens)
+    "short": ("Summarize this section in at most two sentences.", 120),
+    "medium": ("Summarize this section in one paragraph of at most 120 words.", 300),
+}
+
+
+def summarizable(sections: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    """Sections long enough to be worth summarizing, and every Experience
+    section, which the core falls back to when it does not fit in full."""
+    return [(title, text) for title, text in sections
+            if title.startswith(EXPERIENCE)
+            or (not title.startswith(CORE_SECTIONS)
+                and estimate_tokens(text) >= MIN_SECTION_TOKENS)]
+
+
+def summarize_section(client, title: str, text: str, level: str) -> str:
+    instruction, max_tokens = LEVELS[level]
+    response = client.messages.create(
+        model=MODEL,
+        max_tokens=max_tokens,
+        system=SUMMARY_SYSTEM,
+        messages=[{"role": "user",
+                   "content": f"--- {title} ---\n\n{text}\n\n{instruction}"}],
+    )
+    return "".join(block.text for block in response.content if block.type == "text").strip()
+
+
+def summarize_agent(client, key: str, workers: int = 4) -> int:
+    """Write summaries.json for one agent. Returns the number of sections
+    summarized (sections already summarized from the same text are kept)."""
+    context = AGENTS_DIR / key / CONTEXT_NAME
+    out = artifact_dir(context)
+    meta = json.loads((out / SECTIONS_NAME).read_text(encoding="utf-8"))
+    path = out / SUMMARIES_NAME
+    previous = (json.loads(path.read_text(encoding="utf-8"))["sections"]
+                if path.exists() else {})
+
+    sections, todo = {}, []
+    for title, text in summarizable(split_sections(store.read(out / CONTEXT_NAME))):
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if previous.get(title, {}).get("sha256") == digest:
+            sections[title] = previous[title]
+        else:
+            todo.append((title, text, digest))
+
+    def generate(item):
+        title, text, digest = item
+        entry = {level: summarize_section(client, title, text, level) for level in LEVELS}
+        print(f"summarized {key}: {title}")
+        return title, {"sha256": digest, **entry}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        sections.update(pool.map(generate, todo))
+    path.write_text(json.dumps({"source_sha256": meta["source_sha256"],
+                                "sections": sections}, indent=2), encoding="utf-8")
+    return len(todo)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize long portfolio sections.")
+    parser.add_argument("--agent", nargs="*", help="agent keys (default: all)")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    client = anthropic.Anthropic()
+    keys = args.agent or sorted(p.name for p in AGENTS_DIR.iterdir() if p.is_dir())
+    for key in keys:
+        count = summarize_agent(client, key, args.workers)
+        print(f"{key}: {count} sections summarized")
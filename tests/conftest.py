@@ -0,0 +1,5 @@
+"""Put the repository root on sys.path so tests import its modules."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
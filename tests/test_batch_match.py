@@ -0,0 +1,72 @@
+"""Bulk matching runs through the batch API, checkpoints, and resumes without resubmitting."""
+import json
+
+import anthropic
+import pytest
+
+import mock_api
+from batch_match import Checkpoint, load_jobs, plan, run, summary
+from fit import FitStore
+from jobs import JobRegistry
+
+GENOMICS = ("Senior bioinformatics engineer. Build genomics pipelines on HPC clusters. "
+            "Write C++ and Python.")
+RISK = "Risk manager. Own the credit risk models. Report to the board on capital adequacy."
+
+
+@pytest.fixture
+def state():
+    return mock_api.MockState(batch_seconds=0.05)
+
+
+@pytest.fixture
+def client(state):
+    server = mock_api.serve(state, port=0)
+    yield anthropic.Anthropic(base_url=f"http://127.0.0.1:{server.server_address[1]}",
+                              api_key="mock")
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    path = tmp_path / "jobs.jsonl"
+    path.write_text("\n".join(json.dumps(job) for job in [
+        {"id": "a", "text": GENOMICS},
+        {"id": "b", "text": "  " + GENOMICS.replace(". ", ".\n• ")},   # reformatted copy
+        {"id": "c", "text": RISK},
+    ]), encoding="utf-8")
+    return load_jobs(path, JobRegistry(None))
+
+
+def test_duplicates_are_skipped(jobs):
+    assert [job["id"] for job in jobs] == ["a", "c"]
+
+
+def test_plan_covers_every_identity_or_the_best(jobs):
+    every = list(plan(jobs, "en", ["vishal"]))
+    assert len(every) == 2 * 5
+    assert len({cid for cid, _, _ in every}) == len(every)
+    best = list(plan(jobs, "en", ["vishal"], identities="best"))
+    assert {meta["identity"] for _, meta, _ in best if meta["job_id"] == "a"} == {
+        "Genomics / Comp Bio"}
+
+
+def test_structured_run_stores_fits_and_resumes(state, client, jobs, tmp_path):
+    fits = FitStore(tmp_path / "fits")
+    items = list(plan(jobs, "en", ["vishal", "marc"], identities="best", structured=True))
+    checkpoint = Checkpoint(tmp_path / "out", fits)
+    run(client, checkpoint, items, batch_size=3, poll=0.02)
+
+    rows = [json.loads(line) for line in checkpoint.results_file.read_text().splitlines()]
+    assert sorted(row["custom_id"] for row in rows) == sorted(cid for cid, _, _ in items)
+    assert all(fits.get(meta["fit_key"]) is not None for _, meta, _ in items)
+    assert summary(checkpoint)["results"] == 4
+    assert checkpoint.batches == {}
+    assert len(state.batches) == 2
+
+    resumed = Checkpoint(tmp_path / "out", fits)
+    assert resumed.done == {cid for cid, _, _ in items}
+    run(client, resumed, items, poll=0.02)
+    assert len(state.batches) == 2
+    assert len(resumed.results_file.read_text().splitlines()) == 4
@@ -0,0 +1,36 @@
+"""Requests stay within the tier's budget, except the whole portfolio in full mode."""
+import pytest
+
+import chat
+from chat import build_request, context_path, load_context
+from prompt import system_prompt_text
+from retrieval import estimate_tokens
+from roster import AGENTS
+
+AGENT = AGENTS["vishal"]   # the largest portfolio, well over every input budget
+QUESTION = [{"role": "user", "content": "What are his main skills?"}]
+
+
+def request_tokens(request):
+    return estimate_tokens(system_prompt_text(request["system"])) + sum(
+        estimate_tokens(m["content"]) for m in request["messages"])
+
+
+@pytest.mark.parametrize("unlocked", [False, True])
+def test_full_mode_sends_the_whole_portfolio(monkeypatch, unlocked):
+    monkeypatch.setattr(chat, "CONTEXT_MODE", "full")
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i}"}
+               for i in range(6)] + QUESTION
+    request = build_request(AGENT, AGENT["default_identity"], history,
+                            job_description="Research Software Engineer. " * 200,
+                            unlocked=unlocked)
+    assert load_context(context_path(AGENT)).strip() in system_prompt_text(request["system"])
+    assert request["messages"] == history
+
+
+@pytest.mark.parametrize("unlocked, budget", [(False, chat.INPUT_BUDGET_FREE),
+                                              (True, chat.INPUT_BUDGET_UNLOCKED)])
+def test_retrieval_mode_fits_the_tier_budget(unlocked, budget):
+    request = build_request(AGENT, AGENT["default_identity"], QUESTION, unlocked=unlocked)
+    assert request_tokens(request) <= budget
+    assert request["messages"] == QUESTION
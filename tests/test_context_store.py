@@ -0,0 +1,50 @@
+"""Context files are mapped once per content hash, with bounded residency."""
+import os
+
+from context_store import ContextStore
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_identical_files_share_one_map(tmp_path):
+    store = ContextStore()
+    a = write(tmp_path / "a.txt", "Same portfolio.")
+    b = write(tmp_path / "b.txt", "Same portfolio.")
+    assert store.digest(a) == store.digest(b)
+    assert store.read(a) == store.read(b) == "Same portfolio."
+    assert store.resident == 1
+
+
+def test_byte_ranges(tmp_path):
+    store = ContextStore()
+    path = write(tmp_path / "ctx.txt", "## Café\nBody")
+    handle = store.handle(path)
+    assert handle.read_bytes(0, 2) == b"##"
+    assert handle.read(3, 8) == "Café"
+    assert handle.read(9) == "Body"
+    assert handle.size == len("## Café\nBody".encode("utf-8"))
+    assert store.read(write(tmp_path / "empty.txt", "")) == ""
+
+
+def test_least_recently_used_file_is_unmapped(tmp_path):
+    store = ContextStore(max_resident=2)
+    a, b, c = (write(tmp_path / f"{n}.txt", n) for n in "abc")
+    store.read(a)
+    store.read(b)
+    store.read(a)      # a is now the most recent
+    store.read(c)
+    assert store.resident == 2
+    assert list(store._maps) == [store.digest(a), store.digest(c)]
+
+
+def test_changed_file_is_rehashed(tmp_path):
+    store = ContextStore()
+    path = write(tmp_path / "ctx.txt", "old")
+    before = store.digest(path)
+    write(path, "newer")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert store.digest(path) != before
+    assert store.read(path) == "newer"
@@ -0,0 +1,67 @@
+"""record_fit inputs are validated; unknown section citations are dropped."""
+import copy
+
+import pytest
+
+from fit import FIT_TOOL, LENSES, structured_request, validate
+from prompt import BREVITY_INSTRUCTION, system_prompt_text
+from roster import AGENTS
+
+SECTIONS = {"Experience", "Projects"}
+INPUT = {
+    "lenses": {lens: {"score": 7, "note": f" {lens} note "} for lens in LENSES},
+    "overall": 7.6,
+    "matched_requirements": [
+        {"requirement": "Python", "evidence": "Ten years", "section": "projects"},
+        {"requirement": "HPC", "evidence": "SLURM clusters", "section": "Publications"},
+    ],
+    "gaps": ["Kubernetes", "  "],
+    "cited_sections": ["Experience", "Publications", "experience"],
+}
+
+
+def test_valid_input():
+    fit = validate(INPUT, SECTIONS)
+    assert fit.overall == 8
+    assert fit.lenses["recruiter"] == {"score": 7, "note": "recruiter note"}
+    assert [m["section"] for m in fit.matched_requirements] == ["Projects", ""]
+    assert fit.gaps == ["Kubernetes"]
+    assert fit.cited_sections == ["Experience"]
+    assert fit.summary() == "+ Python; HPC / - Kubernetes"
+
+
+def broken(path, value):
+    data = copy.deepcopy(INPUT)
+    *parents, last = path
+    target = data
+    for key in parents:
+        target = target[key]
+    if value is None:
+        del target[last]
+    else:
+        target[last] = value
+    return data
+
+
+@pytest.mark.parametrize("data", [
+    broken(["overall"], None),
+    broken(["overall"], 11),
+    broken(["overall"], True),
+    broken(["lenses", "honest_broker"], None),
+    broken(["lenses", "recruiter", "score"], "high"),
+    broken(["matched_requirements"], "Python"),
+    broken(["matched_requirements", 0, "evidence"], None),
+    broken(["gaps"], [1]),
+    [],
+])
+def test_invalid_input_is_rejected(data):
+    with pytest.raises(ValueError):
+        validate(data, SECTIONS)
+
+
+def test_structured_request_uses_the_unlocked_prompt():
+    agent = AGENTS["vishal"]
+    request = structured_request(agent, agent["default_identity"], "Data engineer.", "en")
+    assert BREVITY_INSTRUCTION.strip() not in system_prompt_text(request["system"])
+    assert "(summary) ---" not in system_prompt_text(request["system"])
+    assert request["tool_choice"] == {"type": "tool", "name": FIT_TOOL["name"]}
@@ -0,0 +1,133 @@
+"""Identical requests share one stream; transient errors are retried, others not."""
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import anthropic
+import httpx
+import pytest
+
+import gateway
+from gateway import Gateway, GatewayBusy, backoff, retryable
+
+REQUEST = {
+    "model": "claude-test",
+    "max_tokens": 64,
+    "system": [{"type": "text", "text": "portfolio"}],
+    "messages": [{"role": "user", "content": "What are his main skills?"}],
+}
+HTTP_REQUEST = httpx.Request("POST", "https://api.example/v1/messages")
+
+
+def status_error(status: int, headers: dict | None = None) -> anthropic.APIStatusError:
+    response = httpx.Response(status, headers=headers, request=HTTP_REQUEST)
+    return anthropic.APIStatusError("mock", response=response, body=None)
+
+
+class FakeStream:
+    def __init__(self, client):
+        self.client = client
+
+    async def __aenter__(self):
+        if self.client.failures:
+            raise self.client.failures.pop(0)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        while not self.client.release.is_set():
+            await asyncio.sleep(0.01)
+        for word in ("built ", "pipelines"):
+            yield word
+
+    async def get_final_message(self):
+        return SimpleNamespace(usage={"output_tokens": 2})
+
+
+class FakeClient:
+    """Stands in for AsyncAnthropic: counts streams, fails the first ones."""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.streams = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.messages = self
+
+    def stream(self, **request):
+        self.streams += 1
+        return FakeStream(self)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(gateway, "BACKOFF_BASE", 0.0)
+
+
+def test_identical_requests_share_one_stream():
+    client = FakeClient()
+    client.release.clear()
+    gw = Gateway(lambda: client)
+    first, shared_first = gw.stream(REQUEST)
+    second, shared_second = gw.stream(dict(REQUEST))
+    client.release.set()
+    assert (shared_first, shared_second) == (False, True)
+    assert second is first
+    assert "".join(second.text_stream()) == "built pipelines"
+    assert client.streams == 1
+    assert gw.stats()["coalesced"] == 1
+
+
+def test_a_free_slot_is_not_reported_as_queued():
+    client = FakeClient()
+    client.release.clear()
+    gw = Gateway(lambda: client, max_concurrent=1)
+    first, _ = gw.stream(REQUEST)
+    second, _ = gw.stream({**REQUEST, "max_tokens": 32})
+    assert not first.queued
+    assert second.queued
+    client.release.set()
+    first.result()
+    second.result()
+
+
+def test_full_queue_is_refused():
+    client = FakeClient()
+    client.release.clear()
+    gw = Gateway(lambda: client, max_concurrent=1, max_queued=0)
+    flight, _ = gw.stream(REQUEST)
+    with pytest.raises(GatewayBusy):
+        gw.stream({**REQUEST, "max_tokens": 32})
+    client.release.set()
+    flight.result()
+
+
+def test_transient_errors_are_retried():
+    client = FakeClient([status_error(529), anthropic.APIConnectionError(request=HTTP_REQUEST)])
+    gw = Gateway(lambda: client)
+    flight, _ = gw.stream(REQUEST)
+    assert "".join(flight.text_stream()) == "built pipelines"
+    assert client.streams == 3
+    assert gw.stats()["retries"] == 2
+
+
+def test_client_errors_are_not_retried():
+    client = FakeClient([status_error(400)])
+    gw = Gateway(lambda: client)
+    flight, _ = gw.stream(REQUEST)
+    with pytest.raises(anthropic.APIStatusError):
+        flight.result()
+    assert client.streams == 1
+
+
+@pytest.mark.parametrize("status, expected", [(429, True), (500, True), (529, True),
+                                              (400, False), (401, False)])
+def test_retryable(status, expected):
+    assert retryable(status_error(status)) is expected
+
+
+def test_backoff_honors_retry_after():
+    assert backoff(0, status_error(429, {"retry-after": "3"})) == 3.0
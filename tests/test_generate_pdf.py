@@ -0,0 +1,58 @@
+"""Plan PDFs are built once per content version, in process, on disk or ahead of time."""
+import json
+
+import pytest
+
+import generate_pdf
+from generate_pdf import (MANIFEST_NAME, artifact_name, get_marketing_plan_pdf, plan_hash,
+                          prerender)
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Count real builds, starting from an empty in-process cache."""
+    monkeypatch.setattr(generate_pdf, "_pdf_cache", {})
+    calls = []
+    build = generate_pdf.generate_marketing_plan_pdf
+
+    def counting(lang="en"):
+        calls.append(lang)
+        return build(lang)
+
+    monkeypatch.setattr(generate_pdf, "generate_marketing_plan_pdf", counting)
+    return calls
+
+
+def test_built_once_per_process(builds):
+    pdf = get_marketing_plan_pdf("en")
+    assert pdf.startswith(b"%PDF")
+    assert get_marketing_plan_pdf("en") is pdf
+    assert builds == ["en"]
+
+
+def test_artifact_is_reused_across_processes(builds, tmp_path, monkeypatch):
+    pdf = get_marketing_plan_pdf("fr", cache_dir=tmp_path)
+    assert (tmp_path / artifact_name("fr")).read_bytes() == pdf
+    monkeypatch.setattr(generate_pdf, "_pdf_cache", {})   # a fresh worker
+    assert get_marketing_plan_pdf("fr", cache_dir=tmp_path) == pdf
+    assert builds == ["fr"]
+
+
+def test_renderer_version_changes_the_hash(monkeypatch):
+    before = plan_hash("en")
+    monkeypatch.setattr(generate_pdf, "RENDERER_VERSION", generate_pdf.RENDERER_VERSION + 1)
+    assert plan_hash("en") != before
+    assert plan_hash("en") != plan_hash("fr")
+
+
+def test_prerender_writes_artifacts_and_keeps_the_manifest(tmp_path):
+    manifest = prerender(tmp_path, ["en"], workers=1)
+    artifact = tmp_path / artifact_name("en")
+    assert manifest["plans"]["en"] == {"hash": plan_hash("en"), "file": artifact.name,
+                                       "bytes": artifact.stat().st_size}
+    built = artifact.stat().st_mtime_ns
+
+    manifest = prerender(tmp_path, ["de"], workers=1)
+    assert sorted(manifest["plans"]) == ["de", "en"]
+    assert artifact.stat().st_mtime_ns == built   # up to date, not rebuilt
+    assert json.loads((tmp_path / MANIFEST_NAME).read_text()) == manifest
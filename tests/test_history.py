@@ -0,0 +1,58 @@
+"""Older turns fold into a background summary; recent ones stay verbatim."""
+import threading
+from types import SimpleNamespace
+
+from history import HistoryManager
+
+
+def transcript(turns: int, size: int = 400) -> list[dict]:
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i} " + "q" * size})
+        messages.append({"role": "assistant", "content": f"answer {i} " + "a" * size})
+    return messages
+
+
+class FakeClient:
+    def __init__(self):
+        self.prompts = []
+        self.messages = self
+        self.release = threading.Event()
+
+    def create(self, **request):
+        self.release.wait(5)
+        self.prompts.append(request["messages"][0]["content"])
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=" the summary ")],
+                               usage={"output_tokens": 3})
+
+
+def test_short_history_is_sent_verbatim():
+    history = HistoryManager(keep_turns=2, token_budget=10_000)
+    messages = transcript(5)
+    client = FakeClient()
+    history.compact_async(client, "model", messages)
+    assert history.context(messages) == ("", messages)
+    assert history._worker is None
+
+
+def test_older_turns_fold_into_the_summary():
+    history = HistoryManager(keep_turns=2, token_budget=300)
+    messages = transcript(5)
+    client = FakeClient()
+    usage = []
+    history.compact_async(client, "model", messages, on_usage=usage.append)
+    history.compact_async(client, "model", messages)   # already folding: no second call
+    client.release.set()
+    history._worker.join()
+    assert len(client.prompts) == 1
+    assert "question 2" in client.prompts[0] and "question 3" not in client.prompts[0]
+    assert usage == [{"output_tokens": 3}]
+    assert history.context(messages) == ("the summary", messages[6:])
+
+
+def test_lagging_fold_drops_old_turns_over_twice_the_budget():
+    history = HistoryManager(keep_turns=2, token_budget=300)
+    messages = transcript(5)
+    summary, recent = history.context(messages)
+    assert summary == ""
+    assert recent == messages[6:]
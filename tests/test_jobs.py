@@ -0,0 +1,82 @@
+"""Formatting variants of a posting share an id; near duplicates keep their own."""
+import pytest
+
+from jobs import JobRegistry, canonicalize, job_id
+
+POSTING = """Research Software Engineer
+
+We build scientific Python pipelines for large-scale simulations. You will work with \
+researchers on data validation, HPC workflows and reproducible analyses across three \
+institutes. Experience with NumPy, pandas, SLURM and automated testing is required.
+"""
+LINKEDIN = """Skip to main content
+Research   Software Engineer
+Posted 3 days ago
+• We build scientific Python pipelines for large‑scale simulations.  • You will work with \
+researchers on data validation, HPC workflows and reproducible analyses across three \
+institutes.
+* Experience with NumPy, pandas, SLURM and automated testing is required.
+Easy Apply
+We are an equal opportunity employer and value diversity.
+We use cookies to improve your experience.
+"""
+
+
+def test_formatting_and_chrome_do_not_change_the_id():
+    assert canonicalize(LINKEDIN) == canonicalize(POSTING)
+    assert job_id(canonicalize(LINKEDIN)) == job_id(canonicalize(POSTING))
+
+
+def test_one_row_per_sentence():
+    assert canonicalize("First point. Second point.\n\n- Third") == (
+        "First point.\nSecond point.\nThird")
+
+
+def test_near_duplicate_keeps_its_own_text(tmp_path):
+    registry = JobRegistry(tmp_path / "registry.jsonl")
+    original = registry.register(POSTING)
+    senior = registry.register(POSTING.replace("Research Software Engineer",
+                                               "Senior Research Software Engineer"))
+    assert not original.known and original.duplicate_of is None
+    assert senior.id != original.id
+    assert senior.duplicate_of == original.id
+    assert "Senior" in senior.text
+    assert registry.register(LINKEDIN).known
+
+
+def test_registry_survives_restarts_and_stays_bounded(tmp_path):
+    path = tmp_path / "registry.jsonl"
+    first = JobRegistry(path, max_jobs=2)
+    ids = [first.register(f"Posting number {n} for a data engineer.").id for n in range(3)]
+    second = JobRegistry(path, max_jobs=2)
+    assert list(second.signatures) == ids[1:]
+    assert second.register("Posting number 2 for a data engineer.").known
+
+
+@pytest.mark.parametrize("requirement", [
+    "Ensure GDPR and Datenschutz compliance across all subsidiaries.",
+    "Draft the group privacy policy and data processing agreements.",
+    "Review terms of service and vendor contracts.",
+    "Beratung zu Datenschutz und Informationssicherheit.",
+    "Experience with equal opportunity reporting and affirmative action plans.",
+    "Handle reasonable accommodation requests from employees.",
+    "Manage E-Verify and I-9 compliance.",
+])
+def test_compliance_legal_and_hr_requirements_survive(requirement):
+    posting = f"Data Protection Officer\n{requirement}\nApply for this job.\n"
+    assert canonicalize(posting) == f"Data Protection Officer\n{requirement}"
+
+
+@pytest.mark.parametrize("footer", [
+    "We are an equal opportunity employer.",
+    "Acme Corp. is a proud equal opportunity employer.",
+    "All qualified applicants will receive consideration for employment without regard "
+    "to race, color, religion or sex.",
+    "By continuing to browse, you accept our use of cookies.",
+    "Privacy Policy",
+    "Terms of Use",
+    "Impressum",
+    "© 2024 Acme Corp.",
+])
+def test_footers_and_chrome_are_dropped(footer):
+    assert canonicalize(f"Data Protection Officer\n{footer}\n") == "Data Protection Officer"
@@ -0,0 +1,20 @@
+"""A short gateway-mode load run completes every scripted turn against the mock API."""
+from argparse import Namespace
+
+import gateway
+import loadtest
+
+
+def test_gateway_run(monkeypatch):
+    for name in ("ANTHROPIC_BASE_URL", "ANTHROPIC_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(gateway, "REQUESTS_PER_MINUTE", gateway.REQUESTS_PER_MINUTE)
+    monkeypatch.setattr(gateway, "INPUT_TOKENS_PER_MINUTE", gateway.INPUT_TOKENS_PER_MINUTE)
+    args = Namespace(mode="gateway", visitors=3, turns=2, seed=1, base_url=None, ttft=0.01,
+                     tokens_per_second=10_000.0, output_tokens=20, error_rate=0.0,
+                     tier_limits=False)
+    report = loadtest.run(args)
+    assert report["errors"] == {}
+    assert report["turns"] == 3 * 2
+    assert report["ttft"]["p50"] is not None
+    assert report["upstream_requests"] >= 1
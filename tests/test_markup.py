@@ -0,0 +1,46 @@
+"""Plan bodies parse into styled blocks and render back to the same markdown."""
+import pytest
+
+from markup import Block, Span, parse_body, parse_inline, parse_plan, to_markdown
+from marketing_plan import get_plan
+
+BODY = """**Positioning**
+Portfolio sites are *static*.
+This one **talks back**.
+
+- First **bold** point
+- Second point"""
+
+
+def test_inline_spans():
+    assert parse_inline("a **b** c *d*") == (
+        Span("a "), Span("b", bold=True), Span(" c "), Span("d", italic=True))
+
+
+def test_blocks():
+    assert parse_body(BODY) == (
+        Block("header", (Span("Positioning", bold=True),)),
+        Block("paragraph", (Span("Portfolio sites are "), Span("static", italic=True),
+                            Span(". This one "), Span("talks back", bold=True), Span("."))),
+        Block("blank"),
+        Block("bullet", (Span("First "), Span("bold", bold=True), Span(" point"))),
+        Block("bullet", (Span("Second point"),)),
+    )
+
+
+def test_round_trip():
+    assert to_markdown(parse_body(BODY)) == (
+        "**Positioning**\n\n"
+        "Portfolio sites are *static*. This one **talks back**.\n\n"
+        "\n"
+        "- First **bold** point\n"
+        "- Second point")
+
+
+@pytest.mark.parametrize("lang", ["en", "fr", "de"])
+def test_plan_is_parsed_once(lang):
+    plan = parse_plan(lang)
+    assert parse_plan(lang) is plan
+    assert [s["heading"] for s in plan["sections"]] == [
+        s["heading"] for s in get_plan(lang)["sections"]]
+    assert all(s["blocks"] for s in plan["sections"])
@@ -0,0 +1,83 @@
+"""Roster matching shortlists lexically, frames each candidate, and reuses stored fits."""
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from fit import FIT_TOOL, LENSES, FitStore
+from matching import best_identity, match_roster, parse_score, prefilter
+from roster import AGENTS
+
+GENOMICS = "Senior bioinformatics engineer: genomics pipelines on HPC clusters, C++ and Python"
+RECORD = {"lenses": {lens: {"score": 8, "note": "ok"} for lens in LENSES}, "overall": 8,
+          "matched_requirements": [{"requirement": "Genomics", "evidence": "Pipelines"}],
+          "gaps": ["Wet lab"], "cited_sections": []}
+
+
+class FakeGateway:
+    """Answers every request with the same record_fit call."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def stream(self, request):
+        with self._lock:
+            self.requests.append(request)
+        name = next((a["name"] for a in AGENTS.values() if a["name"] in str(request["system"])),
+                    None)
+        if name in self.fail:
+            raise RuntimeError("overloaded")
+        block = SimpleNamespace(type="tool_use", name=FIT_TOOL["name"], input=RECORD)
+        flight = SimpleNamespace(result=lambda: SimpleNamespace(content=[block]),
+                                 usage=SimpleNamespace(output_tokens=50))
+        return flight, False
+
+
+def test_prefilter_ranks_the_closest_portfolio_first():
+    ranked = prefilter(GENOMICS)
+    assert ranked[0][0] == "vishal"
+    assert [overlap for _, overlap in ranked] == sorted(
+        (overlap for _, overlap in ranked), reverse=True)
+
+
+@pytest.mark.parametrize("job, identity", [
+    (GENOMICS, "Genomics / Comp Bio"),
+    ("Quantitative research engineer for trading strategies", "Quant Engineer"),
+    ("Cook for a restaurant kitchen", "Research Engineer"),   # no overlap: default
+])
+def test_best_identity(job, identity):
+    assert best_identity(AGENTS["vishal"], job) == identity
+
+
+@pytest.mark.parametrize("text, score", [
+    ("Overall fit: 7/10.", 7.0), ("Score 8.5 / 10", 8.5), ("12/10!", 10.0), ("Strong fit", None),
+])
+def test_parse_score(text, score):
+    assert parse_score(text) == score
+
+
+def test_shortlist_is_analyzed_then_reused(tmp_path):
+    fits = FitStore(tmp_path)
+    gateway = FakeGateway()
+    results = list(match_roster(gateway, GENOMICS, shortlist=2, fits=fits))
+    assert sorted(r["key"] for r in results) == sorted(key for key, _ in prefilter(GENOMICS)[:2])
+    vishal = next(r for r in results if r["key"] == "vishal")
+    assert (vishal["identity"], vishal["score"], vishal["error"]) == (
+        "Genomics / Comp Bio", 8, None)
+    assert vishal["text"] == "+ Genomics / - Wet lab"
+    assert len(gateway.requests) == 2
+
+    again = list(match_roster(gateway, GENOMICS, shortlist=2, fits=fits))
+    assert len(gateway.requests) == 2
+    assert all(r["usage"] is None and r["score"] == 8 for r in again)
+
+
+def test_failures_are_reported_per_candidate(tmp_path):
+    gateway = FakeGateway(fail={AGENTS["vishal"]["name"]})
+    results = {r["key"]: r for r in match_roster(gateway, GENOMICS, shortlist=2,
+                                                  fits=FitStore(tmp_path))}
+    assert isinstance(results["vishal"]["error"], RuntimeError)
+    assert results["vishal"]["score"] is None
+    assert all(r["error"] is None for key, r in results.items() if key != "vishal")
@@ -0,0 +1,18 @@
+"""compact() cleans prose but leaves headings, tables and code as written."""
+from preprocess import compact
+
+
+def test_prose_is_compacted():
+    text = "--- Skills ---\n= Skills =\n\nUses  =numpy=   daily.\n  * nested  item\n\n\n---\nEnd.\n"
+    assert compact(text) == "--- Skills ---\n\nUses numpy daily.\n  - nested item\n\nEnd.\n"
+
+
+def test_org_headings_stay_headings():
+    assert compact("* Heading\n** Sub heading\n") == "* Heading\n** Sub heading\n"
+
+
+def test_tables_and_code_keep_their_spacing():
+    text = ("| Field   | Papers |\n|---------+--------|\n"
+            "```\nx  =  1\n# not a heading\n```\n"
+            "#+BEGIN_SRC python\nreturn  =x=\n#+END_SRC\n")
+    assert compact(text) == text
@@ -0,0 +1,37 @@
+"""Request keys cover every field but stream; answers round-trip through disk."""
+import pytest
+
+from response_cache import ResponseCache, request_key
+
+REQUEST = {
+    "model": "claude-test",
+    "max_tokens": 1024,
+    "system": [{"type": "text", "text": "portfolio", "cache_control": {"type": "ephemeral"}}],
+    "messages": [{"role": "user", "content": "What are his main skills?"}],
+}
+
+
+def test_key_ignores_stream_and_field_order():
+    reordered = dict(reversed(list(REQUEST.items())))
+    assert request_key({**REQUEST, "stream": True}) == request_key(REQUEST)
+    assert request_key(reordered) == request_key(REQUEST)
+
+
+@pytest.mark.parametrize("field, value", [
+    ("model", "claude-other"),
+    ("max_tokens", 2048),
+    ("system", [{"type": "text", "text": "another portfolio"}]),
+    ("messages", [{"role": "user", "content": "What are his soft skills?"}]),
+    ("tools", [{"name": "record_fit"}]),
+    ("tool_choice", {"type": "tool", "name": "record_fit"}),
+])
+def test_key_changes_with_any_other_field(field, value):
+    assert request_key({**REQUEST, field: value}) != request_key(REQUEST)
+
+
+def test_put_then_get_from_a_fresh_cache(tmp_path):
+    ResponseCache(tmp_path).put(REQUEST, "answer")
+    cache = ResponseCache(tmp_path)
+    assert cache.get(REQUEST) == "answer"
+    assert cache.get({**REQUEST, "max_tokens": 2048}) is None
+    assert not list(tmp_path.rglob("*.tmp"))
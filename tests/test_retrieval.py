@@ -0,0 +1,51 @@
+"""Context files chunk along section markers; select keeps the core and ranks the rest."""
+import pytest
+
+from context_store import store
+from retrieval import SectionIndex, chunk_context
+
+FILLER = "Kept notes, met deadlines and wrote reports for the team. " * 20
+
+
+@pytest.fixture
+def context(tmp_path):
+    path = tmp_path / "context.txt"
+    path.write_text("\n".join([
+        "--- Professional Identity ---",
+        "Physicist turned research software engineer.",
+        "--- Experience ---",
+        "Ten years of simulation pipelines in Python.",
+        "--- Projects ---",
+        "Deployed the genome pipeline on Kubernetes clusters. " + FILLER,
+        "--- Teaching ---",
+        "Taught statistics to graduate students. " + FILLER,
+        "--- Hobbies ---",
+        "Plays the cello in an amateur orchestra. " + FILLER,
+    ]) + "\n", encoding="utf-8")
+    return SectionIndex.build(store.handle(path))
+
+
+def test_chunks_follow_section_markers():
+    data = b"--- One ---\nfirst\n--- Two ---\n= Part =\nsecond\n"
+    chunks = chunk_context(data)
+    assert [c.section for c in chunks] == ["One", "Two"]
+    assert data[chunks[1].start:chunks[1].end] == b"= Part =\nsecond\n"
+    assert chunks[1].heading == "Part"
+
+
+def test_small_file_is_sent_whole(context):
+    core, excerpts = context.select("Kubernetes", budget=10_000)
+    assert core == context.source.read()
+    assert excerpts == ""
+
+
+def test_core_is_kept_and_relevant_sections_excerpted(context):
+    core, excerpts = context.select("Has he used Kubernetes?", budget=500)
+    assert "Physicist" in core and "simulation pipelines" in core
+    assert "--- Projects ---" in excerpts
+    assert "Teaching" not in excerpts and "cello" not in excerpts
+
+
+def test_unrelated_query_adds_no_excerpts(context):
+    assert context.select("quantum chromodynamics", budget=500)[1] == ""
+    assert max(context.score("quantum chromodynamics")) == 0
@@ -0,0 +1,54 @@
+"""The roster is discovered from agent manifests and validated on load."""
+import json
+
+import pytest
+
+from roster import AGENTS, CONTEXT_NAME, MANIFEST_NAME, discover, load_manifest
+
+IDENTITIES = {"Engineer": {"title": "Software Engineer", "summary": "Builds things."},
+              "Lead": {"title": "Tech Lead", "summary": "Leads people who build things."}}
+
+
+def write(agents_dir, key, **manifest):
+    directory = agents_dir / key
+    directory.mkdir(parents=True)
+    (directory / MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf-8")
+    return directory
+
+
+def test_manifest_becomes_a_roster_entry(tmp_path):
+    directory = write(tmp_path, "ada", name="Ada L", tagline="Engineer", order=2,
+                      identities=IDENTITIES, default_identity="Lead")
+    assert load_manifest(directory) == {
+        "name": "Ada L", "tagline": "Engineer", "context": directory / CONTEXT_NAME,
+        "has_plan": False, "default_identity": "Lead", "order": 2,
+        "identities": {"Engineer": ("Software Engineer", "Builds things."),
+                       "Lead": ("Tech Lead", "Leads people who build things.")},
+    }
+
+
+@pytest.mark.parametrize("manifest, error", [
+    ({"name": "Ada", "tagline": "x", "identities": IDENTITIES}, "missing default_identity"),
+    ({"name": "Ada", "tagline": "x", "identities": IDENTITIES, "default_identity": "CTO"},
+     "'CTO' is not one of its identities"),
+])
+def test_invalid_manifest(tmp_path, manifest, error):
+    with pytest.raises(ValueError, match=error):
+        load_manifest(write(tmp_path, "ada", **manifest))
+
+
+def test_discovery_order(tmp_path):
+    for key, order in (("zoe", 0), ("bob", 1), ("amy", 1)):
+        write(tmp_path, key, name=key, tagline="x", order=order,
+              identities=IDENTITIES, default_identity="Engineer")
+    (tmp_path / "no-manifest").mkdir()
+    assert list(discover(tmp_path)) == ["zoe", "amy", "bob"]
+
+
+@pytest.mark.parametrize("key", list(AGENTS))
+def test_shipped_agents(key):
+    agent = AGENTS[key]
+    assert agent["default_identity"] in agent["identities"]
+    assert all(isinstance(title, str) and summary
+               for title, summary in agent["identities"].values())
+    assert agent["context"].exists()
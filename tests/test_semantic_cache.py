@@ -0,0 +1,61 @@
+"""Paraphrases reuse an answer; questions differing in a content word do not."""
+import pytest
+
+from semantic_cache import SemanticCache, embed
+
+NAME = "Vishal"
+PARAPHRASES = [
+    ("What are his main skills?", "What are Vishal's strongest technical skills?"),
+    ("What are Vishal's key skills?", "What are his top skills?"),
+    ("Tell me about his experience with Python",
+     "What experience does Vishal have with Python?"),
+    ("Is he a good fit for a senior role?", "Would he be a good fit for a senior position?"),
+    ("Walk me through Vishal's career trajectory.", "Describe his career trajectory"),
+    ("Has he managed a team?", "Has Vishal ever managed a team?"),
+    ("Can he work remotely?", "Is he able to work remotely?"),
+    ("What are his weaknesses?", "What are his biggest weaknesses?"),
+]
+DIFFERENT = [
+    ("What is his experience with C++?", "What is his experience with Go?"),
+    ("What is his experience with C++?", "What is his experience with Rust?"),
+    ("Is he a good fit for a senior role?", "Is he a good fit for a junior role?"),
+    ("What are his main skills?", "What are his soft skills?"),
+    ("What did he do at Saphetor?", "What did he do at Citiviz?"),
+    ("What is his biggest project?", "What is his biggest failure?"),
+    ("Tell me about his experience with Python",
+     "Tell me about his experience with Python testing"),
+]
+
+
+@pytest.mark.parametrize("cached, asked", PARAPHRASES)
+def test_paraphrase_hits(cached, asked):
+    cache = SemanticCache()
+    cache.put("config", cached, "answer", NAME)
+    assert cache.get("config", asked, NAME) == "answer"
+
+
+@pytest.mark.parametrize("cached, asked", DIFFERENT)
+def test_different_question_misses(cached, asked):
+    cache = SemanticCache()
+    cache.put("config", cached, "answer", NAME)
+    assert cache.get("config", asked, NAME) is None
+    assert cache.get("config", cached, NAME) == "answer"
+
+
+def test_other_config_misses():
+    cache = SemanticCache()
+    cache.put("config", "What are his main skills?", "answer", NAME)
+    assert cache.get("other", "What are his main skills?", NAME) is None
+
+
+def test_questions_without_content_terms_miss():
+    cache = SemanticCache()
+    cache.put("config", "Tell me about Vishal", "answer", NAME)
+    assert cache.get("config", "Summarize", NAME) is None
+
+
+def test_similarity_alone_cannot_separate_near_misses():
+    """Why the content-term test exists: no threshold would do."""
+    similarity = lambda a, b: float(embed(a, NAME) @ embed(b, NAME))
+    assert max(similarity(*pair) for pair in DIFFERENT) > min(
+        similarity(*pair) for pair in PARAPHRASES)
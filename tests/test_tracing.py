@@ -0,0 +1,30 @@
+"""Span measurements land in histograms bucketed by their own unit."""
+import pytest
+
+from tracing import BUCKETS, Tracer
+
+
+def test_measurements_are_bucketed_by_unit():
+    tracer = Tracer(path=None, prometheus_path=None)
+    with tracer.span("roster_match") as span:
+        span.set(candidates=5, agent="vishal")
+    with tracer.span("model_stream") as span:
+        span.set(ttft=0.4, prompt_tokens=3_000, tokens_per_second=80.0, cache_hit_rate=0.9)
+    units = {metric: hist.bounds for metric, hist in tracer.histograms.items()}
+    assert units == {
+        "roster_match_seconds": BUCKETS["seconds"],
+        "roster_match_candidates": BUCKETS["count"],
+        "model_stream_seconds": BUCKETS["seconds"],
+        "model_stream_ttft": BUCKETS["seconds"],
+        "model_stream_prompt_tokens": BUCKETS["tokens"],
+        "model_stream_tokens_per_second": BUCKETS["tokens_per_second"],
+        "model_stream_cache_hit_rate": BUCKETS["rate"],
+    }
+    assert tracer.histograms["roster_match_candidates"].quantile(0.5) == 5
+
+
+def test_unknown_measurement_is_an_error():
+    tracer = Tracer(path=None, prometheus_path=None)
+    with pytest.raises(ValueError, match="retries"):
+        with tracer.span("model_stream") as span:
+            span.set(retries=2)
@@ -0,0 +1,103 @@
+"""A trickling page is cut off at the deadline; pasted URLs lose trailing punctuation."""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import url_fetch
+from url_fetch import (PageCache, PooledSession, TextExtractor, extract_text, fetch_url_text,
+                       find_urls)
+
+
+class Trickle(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        if self.path == "/sized":
+            self.send_header("Content-Length", "100000")
+        self.end_headers()
+        try:
+            for _ in range(50):
+                self.wfile.write(b"<p>slow</p>")
+                self.wfile.flush()
+                time.sleep(0.1)
+        except OSError:
+            pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Trickle)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.mark.parametrize("path, protocol", [("/sized", "HTTP/1.1"), ("/sized", "HTTP/1.0"),
+                                            ("/unsized", "HTTP/1.0")])
+def test_deadline_cuts_off_a_trickling_page(server, monkeypatch, path, protocol):
+    monkeypatch.setattr(url_fetch, "DEADLINE", 0.5)
+    monkeypatch.setattr(Trickle, "protocol_version", protocol)
+    start = time.monotonic()
+    text = fetch_url_text(server + path, PageCache(), PooledSession())
+    assert time.monotonic() - start < 2
+    assert text == "[Could not fetch URL: page not read within 0.5s]"
+
+
+@pytest.mark.parametrize("text, urls", [
+    ("See https://jobs.example.com/job/123).", ["https://jobs.example.com/job/123"]),
+    ("https://a.example/job/1, https://b.example/job/2; and https://a.example/job/1!",
+     ["https://a.example/job/1", "https://b.example/job/2"]),
+    ('"https://jobs.example.com/?id=7"', ["https://jobs.example.com/?id=7"]),
+    ("(https://en.wikipedia.org/wiki/Python_(language))",
+     ["https://en.wikipedia.org/wiki/Python_(language)"]),
+    ("no link here", []),
+])
+def test_find_urls_leaves_sentence_punctuation_out(text, urls):
+    assert find_urls(text) == urls
+
+
+DESCRIPTION = "Build and maintain scientific Python pipelines for large simulations. " * 4
+PAGE = f"""<html><head><title>Careers</title><style>p {{ color: red }}</style>
+<script>track("page")</script></head><body>
+<header>Acme careers home</header><nav><a>Jobs</a><a>Teams</a></nav>
+<main><h1>Research Software Engineer</h1><p>{DESCRIPTION}</p></main>
+<footer>Privacy policy</footer></body></html>"""
+
+
+def test_main_content_without_chrome_or_scripts():
+    assert extract_text(PAGE) == f"Research Software Engineer {DESCRIPTION.strip()}"
+
+
+def test_json_ld_posting_is_preferred():
+    posting = ('{"@context": "https://schema.org", "@graph": [{"@type": "JobPosting", '
+               '"title": "Data Engineer", "hiringOrganization": {"name": "Example Lab"}, '
+               f'"description": "<p>{DESCRIPTION}</p>"}}]}}')
+    page = PAGE.replace("</head>", f'<script type="application/ld+json">{posting}</script></head>')
+    assert extract_text(page) == f"Data Engineer Example Lab {DESCRIPTION.strip()}"
+
+
+def test_body_text_when_there_is_no_main():
+    page = "<html><body><header>Menu</header><div>Short posting.</div></body></html>"
+    assert extract_text(page) == "Short posting."
+
+
+def test_page_fed_in_pieces_reads_the_same():
+    extractor = TextExtractor()
+    for i in range(0, len(PAGE), 7):
+        extractor.feed(PAGE[i:i + 7])
+    extractor.close()
+    assert extractor.result() == extract_text(PAGE)
+
+
+def test_reading_stops_once_there_is_enough():
+    extractor = TextExtractor(max_chars=250)
+    for i in range(0, len(PAGE), 7):
+        extractor.feed(PAGE[i:i + 7])
+        if extractor.done:
+            break
+    assert extractor.done and extractor.content_chars < len(DESCRIPTION)
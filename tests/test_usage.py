@@ -0,0 +1,56 @@
+"""Usage blocks are aggregated per agent and language and logged for offline totals."""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from usage import Usage, UsageLedger, summarize
+
+MODEL = "claude-haiku-4-5-20251001"
+
+
+def test_from_api_tolerates_missing_cache_fields():
+    assert Usage.from_api(SimpleNamespace(input_tokens=10, output_tokens=5)) == Usage(
+        10, 5, 0, 0, 1)
+    block = SimpleNamespace(input_tokens=10, output_tokens=5, cache_read_input_tokens=None,
+                            cache_creation_input_tokens=300)
+    assert Usage.from_api(block) == Usage(10, 5, 0, 300, 1)
+
+
+def test_prompt_tokens_hit_rate_and_cost():
+    usage = Usage(input_tokens=100, output_tokens=200, cache_read_tokens=900,
+                  cache_write_tokens=0, requests=1)
+    assert usage.prompt_tokens == 1000
+    assert usage.cache_hit_rate == 0.9
+    assert usage.cost(MODEL) == pytest.approx((100 * 1.00 + 200 * 5.00 + 900 * 0.10) / 1e6)
+    assert Usage().cache_hit_rate == 0.0
+
+
+def test_ledger_totals_and_log(tmp_path):
+    path = tmp_path / "usage.jsonl"
+    ledger = UsageLedger(path)
+    ledger.record(Usage(10, 1, 0, 100, 1), MODEL, "s1", "alice", "en")
+    ledger.record(Usage(10, 2, 100, 0, 1), MODEL, "s2", "alice", "en", kind="fit")
+    ledger.record(Usage(5, 3, 0, 0, 1), MODEL, "s1", "bob", "fr")
+
+    assert ledger.snapshot() == {
+        "alice/en": {"input_tokens": 20, "output_tokens": 3, "cache_read_tokens": 100,
+                     "cache_write_tokens": 100, "requests": 2},
+        "bob/fr": {"input_tokens": 5, "output_tokens": 3, "cache_read_tokens": 0,
+                   "cache_write_tokens": 0, "requests": 1},
+    }
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(r["session"], r["kind"]) for r in records] == [
+        ("s1", "chat"), ("s2", "fit"), ("s1", "chat")]
+
+    totals = summarize(path)
+    assert totals["total"]["all"]["requests"] == 3
+    assert totals["language"]["fr"]["output_tokens"] == 3
+    assert totals["agent"]["alice"]["cache_hit_rate"] == round(100 / 220, 3)
+    assert totals["cost_usd"][MODEL] > 0
+
+
+def test_ledger_without_path_keeps_totals_only():
+    ledger = UsageLedger(None)
+    ledger.record(Usage(1, 1, 0, 0, 1), MODEL, "s", "alice", "en")
+    assert ledger.snapshot()["alice/en"]["requests"] == 1
@@ -0,0 +1,208 @@
+"""Latency tracing for le comptoir.
+
+Each stage of a page run (URL fetch, prompt assembly, cache lookups, the
+model stream, PDF rendering) is wrapped in a span. A span's duration goes
+into a per-stage histogram, and any measurements attached to it (time to
+first token, output tokens per second, prompt size, cache hit) go into
+histograms of their own. Spans are appended to a JSONL file, and the
+histograms are written out in Prometheus text format at most every
+EXPORT_INTERVAL seconds, so they can be scraped or read as-is.
+
+Usage:
+    python tracing.py                           # per-stage latency from the default log
+    python tracing.py build/metrics/trace.jsonl
+"""
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+TRACE_PATH = Path(__file__).parent / "build" / "metrics" / "trace.jsonl"
+PROMETHEUS_PATH = Path(__file__).parent / "build" / "metrics" / "metrics.prom"
+EXPORT_INTERVAL = 10.0   # seconds between Prometheus file rewrites
+
+# Histogram bucket upper bounds, by unit
+BUCKETS = {
+    "seconds": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    "tokens_per_second": (10, 25, 50, 75, 100, 150, 200, 300),
+    "tokens": (500, 1_000, 2_000, 4_000, 8_000, 16_000, 32_000, 64_000),
+    "rate": (0.1, 0.25, 0.5, 0.75, 0.9, 1.0),
+    "count": (1, 2, 5, 10, 20, 50, 100, 200),
+}
+# Unit of each numeric span attribute; span durations are in seconds
+MEASUREMENTS = {
+    "ttft": "seconds",
+    "prompt_tokens": "tokens",
+    "output_tokens": "tokens",
+    "tokens_per_second": "tokens_per_second",
+    "cache_hit_rate": "rate",
+    "candidates": "count",
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as in Prometheus."""
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # the last bucket is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the largest
+        finite bound for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.bounds[-1]
+
+
+class Span:
+    """A timed stage; set() attaches measurements and labels to it."""
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+
+def unit(attr: str) -> str:
+    """Unit of a numeric span attribute.
+
+    Raises:
+        ValueError: If the attribute is not in MEASUREMENTS.
+    """
+    if attr not in MEASUREMENTS:
+        raise ValueError(f"no unit for span attribute {attr!r}; add it to MEASUREMENTS")
+    return MEASUREMENTS[attr]
+
+
+class Tracer:
+    """Process-wide span log and latency histograms."""
+
+    def __init__(self, path=TRACE_PATH, prometheus_path=PROMETHEUS_PATH):
+        self.path = Path(path) if path else None
+        self.prometheus_path = Path(prometheus_path) if prometheus_path else None
+        self.histograms: dict[str, Histogram] = {}
+        self._exported = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Time the enclosed block as a stage named name."""
+        span = Span(name, attrs)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            self.record(span.name, span.elapsed(), span.attrs)
+
+    def observe(self, metric: str, value: float, unit: str = "seconds"):
+        with self._lock:
+            if metric not in self.histograms:
+                self.histograms[metric] = Histogram(BUCKETS[unit])
+            self.histograms[metric].observe(value)
+
+    def record(self, name: str, duration: float, attrs: dict):
+        """Log a finished span and feed its numbers to the histograms.
+
+        Numeric attributes are measurements (histogram name_attr, bucketed
+        by their unit in MEASUREMENTS); others, such as cache_hit or agent,
+        are labels kept in the log only.
+        """
+        self.observe(f"{name}_seconds", duration)
+        for key, value in attrs.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.observe(f"{name}_{key}", value, unit(key))
+        with self._lock:
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps({"ts": time.time(), "span": name,
+                                        "duration": round(duration, 6), **attrs}) + "\n")
+            due = time.monotonic() - self._exported >= EXPORT_INTERVAL
+        if due and self.prometheus_path is not None:
+            self.export()
+
+    def export(self):
+        """Write all histograms to the Prometheus text file."""
+        text = self.prometheus_text()
+        self.prometheus_path.parent.mkdir(parents=True, exist_ok=True)
+        # Spans end on many threads; each export writes its own file
+        tmp = self.prometheus_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(self.prometheus_path)
+        with self._lock:
+            self._exported = time.monotonic()
+
+    def prometheus_text(self) -> str:
+        lines = []
+        with self._lock:
+            for metric, hist in sorted(self.histograms.items()):
+                name = f"comptoir_{metric}"
+                lines.append(f"# TYPE {name} histogram")
+                cumulative = 0
+                for bound, count in zip(hist.bounds + ("+Inf",), hist.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum {hist.total}")
+                lines.append(f"{name}_count {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> list[dict]:
+        """Count, mean and bucketed p50/p95/p99 of every histogram."""
+        with self._lock:
+            return [{"metric": metric, "count": h.count,
+                     "mean": round(h.total / h.count, 4) if h.count else 0.0,
+                     "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99)}
+                    for metric, h in sorted(self.histograms.items())]
+
+
+def timed_stream(chunks, span: Span):
+    """Pass a text stream through, recording time to first token on span."""
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            span.set(ttft=span.elapsed())
+        yield chunk
+
+
+def summarize(path=TRACE_PATH) -> dict:
+    """Exact latency percentiles per span name from a trace log."""
+    durations: dict[str, list[float]] = {}
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        record = json.loads(line)
+        durations.setdefault(record["span"], []).append(record["duration"])
+
+    def pct(values, q):
+        return round(values[min(len(values) - 1, int(q * len(values)))], 4)
+
+    return {name: {"count": len(values), "p50": pct(sorted(values), 0.5),
+                   "p95": pct(sorted(values), 0.95), "max": round(max(values), 4)}
+            for name, values in sorted(durations.items())}
+
+
+if __name__ == "__main__":
+    print(json.dumps(summarize(sys.argv[1] if len(sys.argv) > 1 else TRACE_PATH),
+                     indent=2))
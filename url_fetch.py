@@ -0,0 +1,424 @@
+"""Job description fetching for le comptoir.
+
+Fetches a job posting URL and extracts readable text, streaming the response
+through an incremental parser that stops reading once it has enough.
+Streamlit reruns the whole script on every interaction, so results are
+cached per normalized URL with a TTL and size-bounded LRU eviction. Once an
+entry's TTL lapses it is revalidated with a conditional request (ETag /
+Last-Modified): an unchanged page costs a 304 round-trip instead of a
+download and re-extraction. A failed fetch is cached too, for FAILURE_TTL,
+so the reruns that follow it report the error instead of hitting the host
+again.
+
+All fetches share one pooled session, so connections to a careers site are
+kept alive and reused, with at most PER_HOST_CONNECTIONS open to a host at a
+time. A fetch has a total DEADLINE, connection to last byte, on top of the
+MAX_BYTES cap: socket timeouts only bound each read, so a timer shuts the
+connection down when the deadline passes, however slowly the page
+trickles. fetch_async runs fetches on a worker pool, joining one already in
+flight for the same URL, so the app's script thread never waits on a slow
+page and a list of URLs is fetched in parallel (fetch_many).
+"""
+import codecs
+import json
+import re
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "Mozilla/5.0 (compatible; LeComptoir/1.0)"
+CONNECT_TIMEOUT = 5     # seconds to establish a connection
+DEADLINE = 15           # seconds for a whole fetch, connection to last byte
+MAX_CHARS = 10_000
+MAX_BYTES = 2_000_000   # stop reading a page after this much HTML
+CHUNK_BYTES = 16_384
+PER_HOST_CONNECTIONS = 4
+POOL_HOSTS = 32         # hosts whose connection pools are kept
+FETCH_WORKERS = 8       # fetches running at once, across hosts
+CACHE_TTL = 15 * 60     # seconds before an entry is revalidated
+FAILURE_TTL = 60        # seconds a failed fetch is remembered
+CACHE_SIZE = 128        # entries kept, least recently used evicted first
+
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|trk|trackingId|refId)$")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+URL_RE = re.compile(r"https?://\S+")
+TRAILING_PUNCTUATION = ".,;:!?)]}>'\""
+
+
+def normalize_url(url: str) -> str:
+    """Canonical cache key: lowercase scheme/host, no default port,
+    fragment or tracking parameters, query parameters sorted."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not TRACKING_PARAMS.match(k))
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def find_urls(text: str) -> list[str]:
+    """URLs in pasted text, in order and without repeats.
+
+    Punctuation ending the surrounding sentence ("see .../job/123).") is not
+    part of the URL; a closing parenthesis opened inside the URL is.
+    """
+    urls = []
+    for url in URL_RE.findall(text):
+        while url[-1] in TRAILING_PUNCTUATION:
+            if url[-1] == ")" and url.count("(") >= url.count(")"):
+                break
+            url = url[:-1]
+        urls.append(url)
+    return list(dict.fromkeys(urls))
+
+
+class TextExtractor(HTMLParser):
+    """Incremental HTML-to-text extractor for job postings.
+
+    Text is collected as the document is fed, with script, style and
+    navigation subtrees dropped on the fly. Three sources are tracked, in
+    order of preference: a JSON-LD JobPosting, the text inside <main> or
+    <article>, and all remaining body text. `done` turns true as soon as
+    enough preferred text has been seen, so the caller can stop reading.
+    """
+
+    SKIP_TAGS = {"script", "style", "nav", "noscript", "svg", "template", "iframe"}
+    CHROME_TAGS = {"header", "footer", "aside"}  # skipped outside main/article
+    CONTENT_TAGS = {"main", "article"}
+    MIN_CONTENT_CHARS = 200
+
+    def __init__(self, max_chars: int = MAX_CHARS):
+        super().__init__()
+        self.max_chars = max_chars
+        self.skip_tag = None    # root tag of the subtree being dropped
+        self.skip_depth = 0     # nesting of skip_tag, so other tags can stay unclosed
+        self.content_depth = 0
+        self.in_json_ld = False
+        self.json_ld: list[str] = []
+        self.posting = ""
+        self.content: list[str] = []
+        self.body: list[str] = []
+        self.content_chars = 0
+        self.body_chars = 0
+
+    def _separate(self):
+        """Keep the text of adjacent elements apart. Text within an element
+        can arrive in several pieces, which are joined as they are."""
+        if self.body and self.body[-1] != " ":
+            self.body.append(" ")
+        if self.content_depth and self.content and self.content[-1] != " ":
+            self.content.append(" ")
+
+    def handle_starttag(self, tag, attrs):
+        if not self.skip_tag and not self.in_json_ld:
+            self._separate()
+        if tag == "script" and dict(attrs).get("type") == "application/ld+json":
+            self.in_json_ld = True
+            self.json_ld = []
+        elif self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth += 1
+        elif tag in self.SKIP_TAGS or (tag in self.CHROME_TAGS and not self.content_depth):
+            self.skip_tag = tag
+            self.skip_depth = 1
+        elif tag in self.CONTENT_TAGS:
+            self.content_depth += 1
+
+    def handle_endtag(self, tag):
+        if not self.skip_tag and not self.in_json_ld:
+            self._separate()
+        if self.in_json_ld and tag == "script":
+            self.in_json_ld = False
+            if not self.posting:
+                self.posting = _job_posting_text("".join(self.json_ld))
+        elif self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+                if not self.skip_depth:
+                    self.skip_tag = None
+        elif tag in self.CONTENT_TAGS and self.content_depth:
+            self.content_depth -= 1
+
+    def handle_data(self, data):
+        if self.in_json_ld:
+            self.json_ld.append(data)
+            return
+        if self.skip_tag:
+            return
+        self.body.append(data)
+        self.body_chars += len(data)
+        if self.content_depth:
+            self.content.append(data)
+            self.content_chars += len(data)
+
+    @property
+    def done(self) -> bool:
+        return (len(self.posting) >= self.MIN_CONTENT_CHARS
+                or self.content_chars >= self.max_chars
+                or self.body_chars >= 4 * self.max_chars)
+
+    def result(self) -> str:
+        if len(self.posting) >= self.MIN_CONTENT_CHARS:
+            text = self.posting
+        elif self.content_chars >= self.MIN_CONTENT_CHARS:
+            text = "".join(self.content)
+        else:
+            text = "".join(self.body)
+        return re.sub(r"\s+", " ", text).strip()[:self.max_chars]
+
+
+def _job_posting_text(raw: str) -> str:
+    """Readable text of the first JobPosting in a JSON-LD payload, or ''."""
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return ""
+    stack = [data]
+    while stack:
+        item = stack.pop(0)
+        if isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            kind = item.get("@type")
+            if kind == "JobPosting" or (isinstance(kind, list) and "JobPosting" in kind):
+                org = item.get("hiringOrganization")
+                parts = [item.get("title"),
+                         org.get("name") if isinstance(org, dict) else org,
+                         extract_text(str(item.get("description", "")))]
+                return "\n".join(str(p) for p in parts if p)
+            stack.extend(item.get("@graph", []))
+    return ""
+
+
+def extract_text(html: str) -> str:
+    """Extract readable text from a complete HTML document."""
+    extractor = TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.result()
+
+
+def _read_text(resp: requests.Response, deadline: float = float("inf")) -> str:
+    """Stream a response through the extractor, stopping once it has enough.
+
+    Raises:
+        TimeoutError: If the deadline (a time.monotonic() value) passes first.
+    """
+    content_type = resp.headers.get("Content-Type", "").lower()
+    encoding = resp.encoding if "charset" in content_type else "utf-8"
+    decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    extractor = TextExtractor()
+    received = 0
+    try:
+        for chunk in resp.iter_content(chunk_size=CHUNK_BYTES):
+            received += len(chunk)
+            extractor.feed(decoder.decode(chunk))
+            if extractor.done or received >= MAX_BYTES:
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"page not read within {DEADLINE}s")
+        else:
+            extractor.feed(decoder.decode(b"", final=True))
+    except (requests.RequestException, OSError):
+        if getattr(resp, "aborted", False):
+            raise TimeoutError(f"page not read within {DEADLINE}s") from None
+        raise
+    if getattr(resp, "aborted", False):
+        # The shutdown can also end the body early without an error
+        raise TimeoutError(f"page not read within {DEADLINE}s")
+    extractor.close()
+    return extractor.result()
+
+
+def _abort(resp: requests.Response):
+    """Shut a response's connection down, waking a read blocked on it, and
+    mark the response aborted so _read_text reports a timeout."""
+    resp.aborted = True
+    sock = getattr(getattr(resp.raw, "connection", None), "sock", None)
+    if sock is None:
+        # http.client lets go of the connection's socket when the server
+        # closes after the response; the body is still read from it
+        reader = getattr(getattr(resp.raw, "_fp", None), "fp", None)
+        sock = getattr(getattr(reader, "raw", None), "_sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+@dataclass
+class CachedPage:
+    text: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+    failed: bool = False
+
+
+class PageCache:
+    """Thread-safe LRU cache of extracted page text with a TTL."""
+
+    def __init__(self, ttl: float = CACHE_TTL, maxsize: int = CACHE_SIZE,
+                 failure_ttl: float = FAILURE_TTL):
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, CachedPage] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CachedPage | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedPage):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def is_fresh(self, entry: CachedPage) -> bool:
+        ttl = self.failure_ttl if entry.failed else self.ttl
+        return time.time() - entry.fetched_at < ttl
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class PooledSession:
+    """One keep-alive session for all fetches, with per-host connection slots."""
+
+    def __init__(self, per_host: int = PER_HOST_CONNECTIONS):
+        self.per_host = per_host
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=per_host)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def get(self, url: str, headers: dict, deadline: float):
+        """Streamed GET, once one of the host's slots is free.
+
+        The connection is shut down when the deadline passes, so reading the
+        body cannot outlast it.
+
+        Raises:
+            TimeoutError: If no slot frees up before the deadline.
+        """
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            slot = self._slots.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        if not slot.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            raise TimeoutError(f"no connection to {host} free within {DEADLINE}s")
+        try:
+            remaining = max(deadline - time.monotonic(), 0.1)
+            with self.session.get(url, headers=headers, stream=True,
+                                  timeout=(min(CONNECT_TIMEOUT, remaining), remaining)) as resp:
+                timer = threading.Timer(max(deadline - time.monotonic(), 0), _abort, (resp,))
+                timer.daemon = True
+                timer.start()
+                try:
+                    yield resp
+                finally:
+                    timer.cancel()
+        finally:
+            slot.release()
+
+
+_cache = PageCache()
+_session = PooledSession()
+_workers = ThreadPoolExecutor(FETCH_WORKERS, thread_name_prefix="url-fetch")
+_in_flight: dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+
+
+def fetch_url_text(url: str, cache: PageCache = _cache,
+                   session: PooledSession = _session) -> str:
+    """Fetch a URL and extract readable text, using the page cache."""
+    key = normalize_url(url)
+    entry = cache.get(key)
+    if entry is not None and cache.is_fresh(entry):
+        return entry.text
+
+    if entry is not None and entry.failed:
+        entry = None
+    headers = {"User-Agent": USER_AGENT}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    deadline = time.monotonic() + DEADLINE
+    try:
+        with session.get(url, headers, deadline) as resp:
+            if resp.status_code == 304 and entry is not None:
+                cache.put(key, CachedPage(entry.text, entry.etag, entry.last_modified,
+                                          time.time()))
+                return entry.text
+            resp.raise_for_status()
+            text = _read_text(resp, deadline)
+    except Exception as e:
+        if entry is not None:
+            # Stale beats nothing when revalidation fails; retried after FAILURE_TTL
+            cache.put(key, CachedPage(entry.text, entry.etag, entry.last_modified,
+                                      time.time() - cache.ttl + cache.failure_ttl))
+            return entry.text
+        message = f"[Could not fetch URL: {e}]"
+        cache.put(key, CachedPage(message, None, None, time.time(), failed=True))
+        return message
+
+    cache.put(key, CachedPage(text, resp.headers.get("ETag"),
+                              resp.headers.get("Last-Modified"), time.time()))
+    return text
+
+
+def fetch_async(url: str) -> tuple[Future, bool]:
+    """Start (or join) the fetch of a URL on the worker pool.
+
+    Returns (future, started): the future resolves to fetch_url_text's
+    result, and started is True only for the call that started the fetch.
+    A fresh cached page, or a recent failure, gives an already resolved
+    future.
+    """
+    key = normalize_url(url)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is not None:
+            return future, False
+        entry = _cache.get(key)
+        if entry is not None and _cache.is_fresh(entry):
+            future = Future()
+            future.set_result(entry.text)
+            return future, False
+        future = _in_flight[key] = _workers.submit(fetch_url_text, url)
+
+    def done(_):
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+
+    future.add_done_callback(done)
+    return future, True
+
+
+def fetch_many(urls: list[str]) -> list[str]:
+    """Fetch several URLs in parallel; texts in the order given."""
+    futures = [fetch_async(url)[0] for url in urls]
+    return [future.result() for future in futures]
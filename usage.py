@@ -0,0 +1,121 @@
+"""Token usage accounting for le comptoir.
+
+Captures the usage block (input, output, cache-read and cache-write tokens)
+of every model call and aggregates it per session, per agent and per
+language. Each call is also appended to a JSONL file so budgets and caching
+savings can be checked offline.
+
+Usage:
+    python usage.py                          # totals from the default log
+    python usage.py build/metrics/usage.jsonl
+"""
+import json
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+METRICS_PATH = Path(__file__).parent / "build" / "metrics" / "usage.jsonl"
+
+# USD per million tokens
+PRICES = {
+    "claude-haiku-4-5-20251001": {
+        "input": 1.00, "output": 5.00, "cache_write": 1.25, "cache_read": 0.10,
+    },
+}
+
+
+@dataclass
+class Usage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    requests: int = 0
+
+    @classmethod
+    def from_api(cls, usage) -> "Usage":
+        """Convert an API usage block (cache fields may be missing or None)."""
+        return cls(
+            input_tokens=usage.input_tokens or 0,
+            output_tokens=usage.output_tokens or 0,
+            cache_read_tokens=getattr(usage, "cache_read_input_tokens", 0) or 0,
+            cache_write_tokens=getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            requests=1,
+        )
+
+    def add(self, other: "Usage"):
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cache_read_tokens += other.cache_read_tokens
+        self.cache_write_tokens += other.cache_write_tokens
+        self.requests += other.requests
+
+    @property
+    def prompt_tokens(self) -> int:
+        """All input tokens, cached or not."""
+        return self.input_tokens + self.cache_read_tokens + self.cache_write_tokens
+
+    @property
+    def cache_hit_rate(self) -> float:
+        return self.cache_read_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def cost(self, model: str) -> float:
+        """Cost in USD at the model's list prices."""
+        price = PRICES[model]
+        return (self.input_tokens * price["input"]
+                + self.output_tokens * price["output"]
+                + self.cache_write_tokens * price["cache_write"]
+                + self.cache_read_tokens * price["cache_read"]) / 1_000_000
+
+
+class UsageLedger:
+    """Process-wide usage totals per (agent, language), logged to JSONL."""
+
+    def __init__(self, path=METRICS_PATH):
+        self.path = Path(path) if path else None
+        self.totals: dict[tuple[str, str], Usage] = {}
+        self._lock = threading.Lock()
+
+    def record(self, usage: Usage, model: str, session: str, agent: str,
+               language: str, kind: str = "chat"):
+        with self._lock:
+            self.totals.setdefault((agent, language), Usage()).add(usage)
+            if self.path is not None:
+                record = {"ts": time.time(), "model": model, "session": session,
+                          "agent": agent, "language": language, "kind": kind,
+                          **asdict(usage)}
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def snapshot(self) -> dict:
+        """Totals as plain data, keyed "agent/language"."""
+        with self._lock:
+            return {f"{agent}/{language}": asdict(usage)
+                    for (agent, language), usage in sorted(self.totals.items())}
+
+
+def summarize(path=METRICS_PATH) -> dict:
+    """Aggregate a usage log per agent, per language and overall, with costs."""
+    groups: dict[str, dict[str, Usage]] = {"agent": {}, "language": {}, "total": {}}
+    costs: dict[str, float] = {}
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        record = json.loads(line)
+        usage = Usage(**{k: record[k] for k in asdict(Usage())})
+        for group, key in (("agent", record["agent"]), ("language", record["language"]),
+                           ("total", "all")):
+            groups[group].setdefault(key, Usage()).add(usage)
+        costs[record["model"]] = costs.get(record["model"], 0.0) + usage.cost(record["model"])
+    return {
+        **{group: {key: {**asdict(u), "cache_hit_rate": round(u.cache_hit_rate, 3)}
+                   for key, u in entries.items()}
+           for group, entries in groups.items()},
+        "cost_usd": {model: round(cost, 4) for model, cost in costs.items()},
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(summarize(sys.argv[1] if len(sys.argv) > 1 else METRICS_PATH),
+                     indent=2))